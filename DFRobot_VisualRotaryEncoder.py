@@ -13,9 +13,14 @@ import sys
 import time
 #import smbus
 #from smbus3 import SMBus as smbus
-import smbus3 as smbus
+#import smbus3 as smbus
+#buses are opened once per bus number and shared (smbus3 underneath)
+from i2c_bus import get_bus
 import logging
+from collections import namedtuple
 from ctypes import *
+from perf_stats import REGISTRY
+from button_gestures import ButtonGestures, PRESS, RELEASE
 
 logger = logging.getLogger()
 #logger.setLevel(logging.INFO)   # Display all print information
@@ -50,6 +55,13 @@ VISUAL_ROTARY_ENCODER_KEY_STATUS_REG  = 0x0A
 ## encoder incremental factor
 VISUAL_ROTARY_ENCODER_GAIN_REG        = 0x0B
 
+## latency histograms for every register access, see perf_stats
+_i2c_read_stats = REGISTRY.histogram("i2c_read")
+_i2c_write_stats = REGISTRY.histogram("i2c_write")
+
+## snapshot of count (0-1023), key status latch (0/1) and the monotonic time it was read at
+EncoderState = namedtuple('EncoderState', ['count', 'key', 'timestamp'])
+
 class DFRobot_VisualRotaryEncoder(object):
     '''!
       @brief define DFRobot_VisualRotaryEncoder as class
@@ -62,27 +74,50 @@ class DFRobot_VisualRotaryEncoder(object):
     I2C_addr = 0
     #counts the number of button presses
     button_count = 0
-    #counts the time since last button press
-    button_time = 0
-    #keeps track of last time since handle
+    #keeps track of last time since handle (monotonic)
     button_handle_time = 0
     #update interval time (s)
     button_handle_interval = 0.1
-    #reset button time (downward timeout)
+    #reset button time (downward timeout): a press this long without an edge that has not
+    #become a long press is a missed release (see button_gestures)
     button_down_time_reset = 2
+    #same for a long press, longer since the button may really be held
+    button_held_time_reset = 5
     #keeps track of if there is a unhandled button press
     button_down_unhandled = False
     button_up_unhandled = False
+    #press/release/double/long press state machine, see button_gestures
+    gestures = None
+    #gestures found by the last handle_sensor call
+    last_gestures = ()
+    #last snapshot returned by read_state
+    last_state = None
+    #adaptive polling, see enable_adaptive_polling (intervals in s)
+    adaptive = False
+    poll_fast_interval = 0.01
+    poll_idle_interval = 0.1
+    poll_idle_timeout = 2.0
+    #current poll interval and number of fast/idle switches
+    poll_interval = 0.1
+    poll_transitions = 0
+    last_activity_time = 0
+    next_poll_time = 0
 
     def __init__(self, i2c_addr=VISUAL_ROTARY_ENCODER_DEFAULT_I2C_ADDR, bus=1, gain_coefficient=25):
         '''!
           @brief Module init
           @param i2c_addr I2C communication address
-          @param bus I2C communication bus
+          @param bus I2C communication bus number, or an already open SMBus-like object
+          @n     a bus number gets the handle shared by all devices on that bus
         '''
         '''initialize configuration parameters'''
         self._i2c_addr = i2c_addr
-        self._i2c = smbus.SMBus(bus)
+        if isinstance(bus, int):
+            self._i2c = get_bus(bus)
+        else:
+            self._i2c = bus
+        self.gestures = ButtonGestures(release_timeout=self.button_down_time_reset,
+                                       held_timeout=self.button_held_time_reset)
         self.set_gain_coefficient(gain_coefficient)
 
     def begin(self):
@@ -120,6 +155,93 @@ class DFRobot_VisualRotaryEncoder(object):
         data = self._read_reg(VISUAL_ROTARY_ENCODER_COUNT_MSB_REG, 2)
         return (data[0] << 8) | data[1]
 
+    def read_state(self):
+        '''!
+          @brief read count and button status in one I2C block read (registers 0x08-0x0A)
+          @n     a set key status latch is cleared, so every press is reported exactly once
+          @return EncoderState(count, key, timestamp)
+        '''
+        return self.state_from_block(self._read_reg(VISUAL_ROTARY_ENCODER_COUNT_MSB_REG, 3))
+
+    def state_read_request(self):
+        '''!
+          @brief the block read behind read_state(), as a SharedBus.transaction() operation
+          @n     lets a scheduler read several encoders in one locked pass over the bus
+          @return ("read", i2c_addr, register, length)
+        '''
+        return ("read", self._i2c_addr, VISUAL_ROTARY_ENCODER_COUNT_MSB_REG, 3)
+
+    def state_from_block(self, data):
+        '''!
+          @brief turn the 3 bytes read by state_read_request() into a snapshot
+          @n     same handling as read_state(): clears the key latch, updates adaptive polling
+          @return EncoderState(count, key, timestamp)
+        '''
+        state = EncoderState((data[0] << 8) | data[1], data[2], time.monotonic())
+        if 1 == state.key:
+            self._write_reg(VISUAL_ROTARY_ENCODER_KEY_STATUS_REG, 0)
+        if self.adaptive:
+            self._update_poll_interval(self.last_state, state)
+        self.last_state = state
+        return state
+
+    def enable_adaptive_polling(self, fast_interval=0.01, idle_interval=0.1, idle_timeout=2.0):
+        '''!
+          @brief poll fast while the knob is in use and slowly while it is idle
+          @n     any count change or button press switches to fast_interval at once, after
+          @n     idle_timeout seconds without either the interval drops back to idle_interval
+          @param fast_interval poll interval while active (s)
+          @param idle_interval poll interval while idle (s)
+          @param idle_timeout quiet time before dropping to the idle interval (s)
+        '''
+        self.adaptive = True
+        self.poll_fast_interval = fast_interval
+        self.poll_idle_interval = idle_interval
+        self.poll_idle_timeout = idle_timeout
+        self.poll_interval = idle_interval
+        self.poll_transitions = 0
+
+    def poll(self):
+        '''!
+          @brief read a snapshot if the current poll interval has elapsed
+          @return EncoderState, or None when it is not time to poll yet
+        '''
+        now = time.monotonic()
+        if now < self.next_poll_time:
+            return None
+        state = self.read_state()
+        self.next_poll_time = now + self.poll_interval
+        return state
+
+    def time_to_next_poll(self):
+        '''!
+          @brief seconds until poll() will read the sensor again
+        '''
+        return max(0.0, self.next_poll_time - time.monotonic())
+
+    @property
+    def poll_rate(self):
+        '''!
+          @brief current poll rate (Hz)
+        '''
+        return 1.0 / self.poll_interval
+
+    def _update_poll_interval(self, prev, state):
+        '''!
+          @brief switch between fast and idle polling based on activity
+        '''
+        if 1 == state.key or (prev is not None and prev.count != state.count):
+            self.last_activity_time = state.timestamp
+            if self.poll_interval != self.poll_fast_interval:
+                self.poll_interval = self.poll_fast_interval
+                self.poll_transitions += 1
+                logger.info("encoder 0x%x active, polling every %.3f s", self._i2c_addr, self.poll_interval)
+        elif (self.poll_interval != self.poll_idle_interval and
+              state.timestamp - self.last_activity_time > self.poll_idle_timeout):
+            self.poll_interval = self.poll_idle_interval
+            self.poll_transitions += 1
+            logger.info("encoder 0x%x idle, polling every %.3f s", self._i2c_addr, self.poll_interval)
+
     def set_encoder_value(self, value):
         '''!
           @brief set the encoder count
@@ -145,27 +267,30 @@ class DFRobot_VisualRotaryEncoder(object):
         '''
         if ((0x01 <= gain_value) and (0x33 >= gain_value)):
             self._write_reg(VISUAL_ROTARY_ENCODER_GAIN_REG, gain_value)
-    def handle_sensor(self):
-        '''!
-          @brief handle the button press counting and timing
-        '''
-        if time.time() - self.button_handle_time > self.button_handle_interval:
-          prev_count = self.button_count
-          self.button_handle_time = time.time()
-
-          if self.detect_button_change():
-              self.button_count += 1
-              self.button_time = time.time()
-              #print("Button count:", self.button_count)
-          #handle odd number of button presses when timeout occurs
-          if time.time() - self.button_time > self.button_down_time_reset and self.button_count % 2 == 1:
-              self.button_count = 0
-              self.button_down_unhandled = False
-              print("Button count reset due to timeout")
-
-          #set unhandled flag if button count has changed
-          if prev_count % 2 == 0 and self.button_count % 2 == 1 and not self.button_down_unhandled:
-              self.button_down_unhandled = True
+    def handle_sensor(self, state=None):
+        '''!
+          @brief feed a snapshot to the button gesture state machine
+          @param state EncoderState from read_state(); when omitted the sensor is read
+          @n     itself, at most once every button_handle_interval seconds
+          @return list of button_gestures.GestureEvent (press, release, double_press,
+          @n      long_press), usually empty
+        '''
+        if state is None:
+          now = time.monotonic()
+          if now - self.button_handle_time <= self.button_handle_interval:
+            return ()
+          self.button_handle_time = now
+          state = self.read_state()
+
+        events = self.gestures.update(state.key, state.timestamp)
+        for event in events:
+            if event.kind == PRESS:
+                self.button_count += 1
+                self.button_down_unhandled = True
+            elif event.kind == RELEASE:
+                self.button_up_unhandled = True
+        self.last_gestures = events
+        return events
     
     def check_down_button_unhandled(self):
         '''!
@@ -183,7 +308,7 @@ class DFRobot_VisualRotaryEncoder(object):
           @brief detect if the button is pressed
           @return return true when the button pressed，otherwise, return false
         '''
-        return self.button_count % 2 == 1
+        return self.gestures.down
     
     def detect_button_change(self):
         '''!
@@ -196,12 +321,14 @@ class DFRobot_VisualRotaryEncoder(object):
             ret = True
         return ret
     
-    def encoder_as_float(self):
+    def encoder_as_float(self, state=None):
         '''!
           @brief gets encoder value as a float between 0.0 and 1.0`
+          @param state EncoderState from read_state(); when omitted the count is read from the sensor
           @return float value between 0.0 and 1.0
         '''
-        return self.get_encoder_value() / 1023.0
+        count = self.get_encoder_value() if state is None else state.count
+        return count / 1023.0
 
     def _write_reg(self, reg, data):
         '''!
@@ -212,7 +339,9 @@ class DFRobot_VisualRotaryEncoder(object):
         if isinstance(data, int):
             data = [data]
             #logger.info(data)
+        start = time.perf_counter()
         self._i2c.write_i2c_block_data(self._i2c_addr, reg, data)
+        _i2c_write_stats.record(time.perf_counter() - start)
 
     def _read_reg(self, reg, length):
         '''!
@@ -220,4 +349,7 @@ class DFRobot_VisualRotaryEncoder(object):
           @param reg register address
           @param length read data length
         '''
-        return self._i2c.read_i2c_block_data(self._i2c_addr, reg, length)
+        start = time.perf_counter()
+        data = self._i2c.read_i2c_block_data(self._i2c_addr, reg, length)
+        _i2c_read_stats.record(time.perf_counter() - start)
+        return data
@@ -0,0 +1,173 @@
+"""encoder_bridge end to end: simulated encoders, the X32 emulator in between.
+
+Two FakeSEN0502 encoders on a FakeSMBus are bound like the default
+encoder_bridge bindings (ch 9 fader and pan) and polled by an
+EncoderScheduler, either calling the bridge directly (as run() does) or
+through an encoder_shm block and EncoderReader in the same process (the
+--split path without the second process). Per mode the script checks:
+
+  first turn   the very first turn after start-up moves the fader by
+               the full DB_PER_COUNT per count (nothing swallowed while
+               seeding)
+  turns        later turns, both directions, keep the fader within one
+               console step of the dB the counts add up to
+  end stop     a turn past the re-centering margin still counts in full
+               and leaves the encoder re-centered
+  mute         pressing the fader encoder's button toggles the mute
+
+and prints knob-to-OSC latency. Exits 1 if a check fails.
+
+Usage: python bench_bridge.py [--rate 100]
+"""
+import argparse
+import sys
+import threading
+import time
+
+from DFRobot_VisualRotaryEncoder import DFRobot_VisualRotaryEncoder
+from encoder_bridge import DB_PER_COUNT, EncoderBridge, bindings
+from encoder_scheduler import EncoderScheduler
+from encoder_shm import ENCODER_CENTER, EncoderBlock, EncoderPublisher, EncoderReader
+from fader_law import db_to_step, fader_to_db, fader_to_step
+from fake_smbus import FakeSEN0502, FakeSMBus
+from x32_emulator import X32Emulator
+from x32_subscription import X32Subscription
+
+READ_INTERVAL = 0.002
+# counts per detent, as set by encoder_bridge.make_encoders()
+GAIN = 51
+
+
+def wait_for(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def make_encoders(devices):
+    bus = FakeSMBus(devices)
+    encoders = []
+    for device in devices:
+        encoder = DFRobot_VisualRotaryEncoder(i2c_addr=device.i2c_addr, bus=bus, gain_coefficient=GAIN)
+        encoder.set_encoder_value(ENCODER_CENTER)
+        encoders.append(encoder)
+    return encoders
+
+
+class Split:
+    """Scheduler -> EncoderPublisher -> shared block -> EncoderReader -> bridge."""
+
+    def __init__(self, bridge, encoders, rate):
+        self.block = EncoderBlock.create(len(encoders))
+        self.publisher = EncoderPublisher(self.block, encoders)
+        self.scheduler = EncoderScheduler(encoders, rate=rate, callback=self.publisher.handle)
+        self.reader = EncoderReader(self.block)
+        bridge.seed(self.reader.positions)
+        self._bridge = bridge
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="split-reader", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(READ_INTERVAL):
+            for event in self.reader.events():
+                self._bridge.handle(event)
+
+    def start(self):
+        self.scheduler.start()
+        self._thread.start()
+
+    def stop(self):
+        self.scheduler.stop()
+        self._stop.set()
+        self._thread.join()
+        self.reader = None
+        self.block.close()
+        self.block.unlink()
+
+
+def run(mode, rate):
+    devices = [FakeSEN0502(binding.i2c_addr) for binding in bindings]
+    knob = devices[0]
+    failures = []
+    with X32Emulator() as emulator, X32Subscription(emulator.host, emulator.port) as state:
+        bridge = EncoderBridge(state, bindings)
+        fader, mute = bridge.addresses[:2]
+        state.watch(*bridge.addresses)
+        if not wait_for(lambda: all(state.get(a) is not None for a in bridge.addresses)):
+            return ["cache not seeded"], bridge.stats()
+        encoders = make_encoders(devices)
+        if mode == "direct":
+            bridge.seed([encoder.get_encoder_value() for encoder in encoders])
+            runner = EncoderScheduler(encoders, rate=rate,
+                                      callback=lambda event: bridge.handle(event, encoders[event.encoder]))
+        else:
+            runner = Split(bridge, encoders, rate)
+        runner.start()
+        try:
+            # let the scheduler take its first reading
+            time.sleep(3.0 / rate)
+
+            start_db = fader_to_db(emulator.get_parameter(fader))
+            counts = [0]
+
+            def turn(name, detents):
+                knob.turn(detents)
+                counts[0] += detents * GAIN
+                wanted = db_to_step(start_db + counts[0] * DB_PER_COUNT)
+
+                def within_a_step():
+                    return abs(fader_to_step(emulator.get_parameter(fader)) - wanted) <= 1
+                if not wait_for(within_a_step):
+                    db = fader_to_db(emulator.get_parameter(fader))
+                    failures.append(f"{name}: {detents} detents left the fader at {db:.2f} dB, "
+                                    f"expected {start_db + counts[0] * DB_PER_COUNT:.2f} dB")
+
+            # counts stay inside 0..1023 so the fake encoder never clips
+            turn("first turn", -3)
+            for detents in (2, -4, 1, 5):
+                turn("turns", detents)
+            # past the margin: the bridge re-centers the encoder (direct) or
+            # the publisher does (split); either way the turn counts in full
+            turn("end stop", -9)
+            if not wait_for(lambda: knob.count == ENCODER_CENTER):
+                failures.append(f"end stop: encoder at {knob.count}, not re-centered")
+            turn("end stop", 2)
+
+            on = emulator.get_parameter(mute)
+            for _ in range(2):
+                knob.press()
+                time.sleep(3.0 / rate)
+                knob.release()
+                expected = 0 if on else 1
+                if not wait_for(lambda: emulator.get_parameter(mute) == expected):
+                    failures.append(f"mute: press left /mix/on at {emulator.get_parameter(mute)}")
+                on = expected
+                time.sleep(3.0 / rate)
+        finally:
+            runner.stop()
+    return failures, bridge.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encoder bridge against fake encoders and the emulator")
+    parser.add_argument("--rate", type=float, default=100.0, help="encoder poll rate (Hz)")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'mode':>7} {'sent':>5} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7}  result")
+    for mode in ("direct", "split"):
+        failures, stats = run(mode, args.rate)
+        print(f"{mode:>7} {stats['sent']:5d} {stats['p50'] * 1000:7.2f} {stats['p99'] * 1000:7.2f} "
+              f"{stats['max'] * 1000:7.2f}  {'OK' if not failures else 'FAILED'}")
+        for failure in failures:
+            print(f"        {failure}")
+        failed = failed or bool(failures)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
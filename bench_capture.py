@@ -0,0 +1,126 @@
+"""osc_capture end to end: log round trip, proxy capture and replay.
+
+  round trip  a synthetic show is written with CaptureWriter and read back;
+              every record must come back with its direction, client,
+              datagram and timestamp (to the microsecond)
+  capture     an X32Subscription talks to the X32Emulator through a
+              CaptureProxy; the log must hold its writes to the console and
+              the console's replies
+  replay      the synthetic show is played to the emulator and to an
+              X32Subscription at 1x, --speed x and maximum speed
+
+Exits 1 if a check fails or a replay drops more than --max-loss of its
+messages.
+
+Usage: python bench_capture.py [--speed 5] [--seconds 2] [--channels 32] [--max-loss 0.01]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from osc_capture import (FROM_CONSOLE, TO_CONSOLE, CaptureProxy, CaptureWriter, read_capture,
+                         replay_to_client, replay_to_emulator, synth_show)
+from x32_emulator import X32Emulator
+from x32_subscription import X32Subscription, build_message
+
+FADER = "/ch/01/mix/fader"
+
+
+def check_round_trip(path, channels, seconds):
+    """Write records with known timestamps, read them back; -> failures."""
+    written = []
+    with CaptureWriter(path) as writer:
+        start = time.monotonic()
+        for i in range(int(seconds * 1000)):
+            # irregular gaps, both directions, a few clients
+            when = start + i * 0.001 + (i % 7) * 1e-5
+            direction = FROM_CONSOLE if i % 3 == 0 else TO_CONSOLE
+            dgram = build_message(f"/ch/{i % channels + 1:02d}/mix/fader", (i % 100) / 100.0)
+            writer.write(direction, i % 4, dgram, when)
+            written.append((when - start, direction, i % 4, dgram))
+    read = list(read_capture(path))
+    if len(read) != len(written):
+        return [f"round trip: wrote {len(written)} records, read {len(read)}"]
+    failures = []
+    for i, (record, (offset, direction, client, dgram)) in enumerate(zip(read, written)):
+        if (record.direction, record.client, record.dgram) != (direction, client, dgram):
+            failures.append(f"round trip: record {i} came back as {record}")
+        elif abs(record.timestamp - offset) > 1.5e-6:
+            failures.append(f"round trip: record {i} at {record.timestamp:.6f} s, "
+                            f"written at {offset:.6f} s")
+        if len(failures) >= 5:
+            break
+    return failures
+
+
+def check_capture(path):
+    """Log the traffic of a client through a CaptureProxy; -> failures."""
+    with X32Emulator() as emulator, CaptureWriter(path) as writer, \
+            CaptureProxy(emulator.host, writer, emulator.port, host="127.0.0.1", port=0) as proxy, \
+            X32Subscription(proxy.host, proxy.port) as state:
+        state.set(FADER, 0.25)
+        state.watch(FADER)
+        deadline = time.monotonic() + 1.0
+        while proxy.from_console == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    records = list(read_capture(path))
+    failures = []
+    if not any(r.direction == TO_CONSOLE and r.dgram == build_message(FADER, 0.25) for r in records):
+        failures.append("capture: the fader write is not in the log")
+    if not any(r.direction == FROM_CONSOLE for r in records):
+        failures.append("capture: no console replies in the log")
+    if len(records) != proxy.to_console + proxy.from_console:
+        failures.append(f"capture: {len(records)} records for "
+                        f"{proxy.to_console + proxy.from_console} forwarded datagrams")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture log round trip and replay loss")
+    parser.add_argument("--speed", type=float, default=5.0, help="the Nx replay speed")
+    parser.add_argument("--seconds", type=float, default=2.0, help="length of the synthetic show")
+    parser.add_argument("--channels", type=int, default=32)
+    parser.add_argument("--max-loss", type=float, default=0.01,
+                        help="fraction of replayed messages that may be dropped")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, check in (("round trip", lambda path: check_round_trip(path, args.channels, args.seconds)),
+                            ("capture", check_capture)):
+            failures = check(os.path.join(tmp, name.replace(" ", "_") + ".x32c"))
+            print(f"{name:10s} {'OK' if not failures else 'FAILED'}")
+            for failure in failures:
+                print(f"           {failure}")
+            failed = failed or bool(failures)
+
+        path = os.path.join(tmp, "show.x32c")
+        synth_show(path, args.channels, seconds=args.seconds)
+        records = list(read_capture(path))
+    duration = records[-1].timestamp
+
+    print()
+    print(f"{'target':>8} {'speed':>5} {'sent':>5} {'dropped':>7} {'send s':>6} {'depth':>5} "
+          f"{'p50 ms':>7} {'p99 ms':>7}  result")
+    for target in ("emulator", "client"):
+        for speed in (1.0, args.speed, None):
+            if target == "emulator":
+                with X32Emulator() as emulator:
+                    report, elapsed = replay_to_emulator(records, emulator, speed)
+            else:
+                report, elapsed = replay_to_client(records, speed=speed)
+            ok = report["sent"] > 0 and report["dropped"] <= args.max_loss * report["sent"]
+            label = "max" if speed is None else f"{speed:g}x"
+            print(f"{target:>8} {label:>5} {report['sent']:5d} {report['dropped']:7d} {elapsed:6.2f} "
+                  f"{report['max_depth']:5d} {report['lag_p50'] * 1000:7.2f} "
+                  f"{report['lag_p99'] * 1000:7.2f}  {'OK' if ok else 'FAILED'}")
+            failed = failed or not ok
+    print(f"(show recorded over {duration:.2f} s)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Encoder driver benchmarks on the simulated SEN0502 bus.
+
+  per call   overhead and bus transactions of the driver entry points with an
+             instant fake bus (pure Python cost)
+  100 kHz    achievable calls/s once real wire time is simulated
+  replay     a recorded knob session replayed at 1x, 10x and max speed
+  adaptive   bus reads per second with adaptive polling while the knob is
+             idle, turned, and idle again, turn-to-event latency while it
+             is turned, and the fast/idle switch count; exits 1 if idle
+             polling is not slow, active polling not fast or the switches
+             are not exactly idle -> fast -> idle
+  shared bus four encoders on one SharedBus: transaction() results (a
+             missing device fails only its own slot), then an
+             EncoderScheduler reading them in batched passes, checked for
+             turns seen, batches used and every read in the i2c_read
+             histogram; exits 1 on a failed check
+
+Usage: python bench_encoder.py [--calls 20000]
+"""
+import argparse
+import sys
+import time
+
+from DFRobot_VisualRotaryEncoder import DFRobot_VisualRotaryEncoder
+from encoder_scheduler import EncoderScheduler, ROTATION
+from fake_smbus import FakeSEN0502, FakeSMBus, RecordingBus, ReplayBus
+from i2c_bus import SharedBus
+from perf_stats import REGISTRY
+
+ADDR = 0x54
+
+
+def make_encoder(speed=None):
+    device = FakeSEN0502(ADDR, count=512, gain=1)
+    bus = FakeSMBus([device], speed=speed)
+    return DFRobot_VisualRotaryEncoder(i2c_addr=ADDR, bus=bus), device, bus
+
+
+def calls(encoder):
+    state = encoder.read_state()
+    return {
+        "get_encoder_value": encoder.get_encoder_value,
+        "read_state": encoder.read_state,
+        "handle_sensor": lambda: encoder.handle_sensor(encoder.read_state()),
+        "handle_sensor()": encoder.handle_sensor,
+        "encoder_as_float": encoder.encoder_as_float,
+        "encoder_as_float(state)": lambda: encoder.encoder_as_float(state),
+    }
+
+
+def bench_calls(n, speed=None):
+    results = {}
+    encoder, device, bus = make_encoder(speed)
+    for name, call in calls(encoder).items():
+        # keep handle_sensor's interval gate out of the way
+        encoder.button_handle_interval = 0.0
+        before = bus.transactions
+        start = time.perf_counter()
+        for _ in range(n):
+            call()
+        elapsed = time.perf_counter() - start
+        results[name] = (elapsed / n, (bus.transactions - before) / n, n / elapsed)
+    return results
+
+
+def record_session(seconds=1.0, rate=100.0):
+    """A knob being turned and its button pressed, sampled at rate Hz."""
+    device = FakeSEN0502(ADDR, count=512, gain=1)
+    recorder = RecordingBus(FakeSMBus([device]))
+    encoder = DFRobot_VisualRotaryEncoder(i2c_addr=ADDR, bus=recorder)
+    steps = int(seconds * rate)
+    for i in range(steps):
+        device.turn(1 if (i // 20) % 2 == 0 else -1)
+        if i % 30 == 0:
+            device.press()
+        elif i % 30 == 5:
+            device.release()
+        encoder.handle_sensor(encoder.read_state())
+        time.sleep(1.0 / rate)
+    return recorder.trace
+
+
+def bench_replay(trace, speed):
+    bus = ReplayBus(trace, speed)
+    encoder = DFRobot_VisualRotaryEncoder(i2c_addr=ADDR, bus=bus)
+    presses = 0
+    start = time.perf_counter()
+    while not bus.finished:
+        encoder.handle_sensor(encoder.read_state())
+        if encoder.check_down_button_unhandled():
+            presses += 1
+    return time.perf_counter() - start, presses, bus.mismatches
+
+
+def bench_adaptive(fast=0.01, idle=0.1, idle_timeout=0.5, seconds=1.0, turn_every=0.03):
+    """Reads/s per phase, active turn-to-event latencies (s) and fast/idle switches."""
+    encoder, device, bus = make_encoder()
+    encoder.enable_adaptive_polling(fast, idle, idle_timeout)
+    turned = {}
+    latencies = []
+
+    def callback(event):
+        if event.kind == ROTATION and event.value in turned:
+            latencies.append(event.timestamp - turned.pop(event.value))
+
+    rates = {}
+
+    def phase(name, turning):
+        reads = device.reads
+        start = time.monotonic()
+        while time.monotonic() - start < seconds:
+            if turning:
+                device.turn(1)
+                turned[device.count] = time.monotonic()
+            time.sleep(turn_every)
+        rates[name] = (device.reads - reads) / (time.monotonic() - start)
+
+    with EncoderScheduler([encoder], callback=callback):
+        phase("idle", False)
+        phase("active", True)
+        # the first turn waited for an idle poll, the rest show the fast rate
+        waking, latencies[:] = latencies[:1], latencies[1:]
+        time.sleep(idle_timeout + idle)
+        phase("idle again", False)
+    return rates, sorted(latencies), waking, encoder.poll_transitions
+
+
+def check_shared_bus(rate=100.0, seconds=0.5):
+    """Failed checks of SharedBus.transaction() and the scheduler's batched reads."""
+    failures = []
+    addresses = [ADDR + i for i in range(4)]
+    devices = [FakeSEN0502(addr, count=512, gain=1) for addr in addresses]
+    bus = SharedBus(1, FakeSMBus(devices))
+
+    results = bus.transaction([("write", ADDR, 0x08, [0x01, 0x00]),
+                               ("read", ADDR, 0x08, 2),
+                               ("read", 0x70, 0x08, 2),
+                               ("read", ADDR + 1, 0x08, 3)])
+    if results[0] is not None or results[1] != [0x01, 0x00] or results[3] != [0x02, 0x00, 0]:
+        failures.append(f"transaction returned {results}")
+    if not isinstance(results[2], OSError) or bus.errors != 1:
+        failures.append("missing device did not fail its own slot only")
+    if bus.batches != 1 or bus.transactions != 4:
+        failures.append(f"{bus.batches} batches, {bus.transactions} transactions for one pass of 4")
+    devices[0].count = 512
+
+    encoders = [DFRobot_VisualRotaryEncoder(i2c_addr=addr, bus=bus, gain_coefficient=1)
+                for addr in addresses]
+    seen = {}
+
+    def callback(event):
+        if event.kind == ROTATION:
+            seen[event.encoder] = event.value
+
+    histogram = REGISTRY.histogram("i2c_read")
+    reads, batches = histogram.count, bus.batches
+    with EncoderScheduler(encoders, rate=rate, callback=callback) as scheduler:
+        time.sleep(seconds / 2)
+        for i, device in enumerate(devices):
+            device.turn(i + 1)
+        time.sleep(seconds / 2)
+    polls = sum(s["polls"] for s in scheduler.stats())
+    batches = bus.batches - batches
+    recorded = histogram.count - reads
+    print(f"  {polls} polls in {batches} batched passes, {recorded} reads in i2c_read")
+    if seen != {i: 512 + i + 1 for i in range(len(devices))}:
+        failures.append(f"turns seen {seen}")
+    if batches < polls / len(devices) / 2:
+        failures.append("encoders due together were not read in one pass")
+    if recorded < polls:
+        failures.append(f"{polls - recorded} reads missing from the i2c_read histogram")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encoder driver benchmarks")
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    print("per call (instant bus)")
+    for name, (per, transactions, _) in bench_calls(args.calls).items():
+        print(f"  {name:24s} {per * 1e6:7.2f} us  {transactions:.2f} transactions")
+
+    print("simulated 100 kHz bus")
+    for name, (per, transactions, rate) in bench_calls(max(1, args.calls // 20), speed=100000).items():
+        print(f"  {name:24s} {rate:7.0f} calls/s  {transactions * rate:7.0f} transactions/s")
+
+    trace = record_session()
+    duration = trace[-1][0]
+    print(f"replay of a {duration:.2f} s session, {len(trace)} transactions")
+    for speed in (1.0, 10.0, None):
+        elapsed, presses, mismatches = bench_replay(trace, speed)
+        label = "max" if speed is None else f"{speed:g}x"
+        print(f"  {label:4s} {elapsed:.3f} s, {presses} presses, {mismatches} out of order")
+
+    fast, idle = 0.01, 0.1
+    rates, latencies, waking, transitions = bench_adaptive(fast, idle)
+    print(f"adaptive polling ({fast * 1000:.0f} ms active, {idle * 1000:.0f} ms idle)")
+    for name, rate in rates.items():
+        print(f"  {name:10s} {rate:6.1f} reads/s")
+    p50 = latencies[len(latencies) // 2] if latencies else float("inf")
+    wake = f"{waking[0] * 1000:.1f} ms" if waking else "-"
+    print(f"  turn to event: {p50 * 1000:.1f} ms p50 while active, {wake} for the first turn")
+    print(f"  {transitions} fast/idle switches")
+    failures = []
+    if rates["idle"] > 1.5 / idle or rates["idle again"] > 1.5 / idle:
+        failures.append("idle polling faster than the idle interval")
+    if rates["active"] < 0.7 / fast:
+        failures.append("active polling slower than the fast interval")
+    if p50 > 2 * fast:
+        failures.append("turn to event latency above two fast intervals")
+    if transitions != 2:
+        failures.append(f"{transitions} fast/idle switches, expected 2")
+
+    print("shared bus, 4 encoders")
+    failures += check_shared_bus()
+    for failure in failures:
+        print(f"  FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
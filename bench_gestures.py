@@ -0,0 +1,202 @@
+"""Button gesture detection on the simulated SEN0502 bus.
+
+A scripted user (random single, double and long presses) works the buttons
+of several simulated encoders at once, each polled through the real driver
+at a different rate. For every poll rate it reports the detection latency
+(from the simulated edge to the poll that reported it) and how many of the
+expected press/release/double/long press events were missed or reported
+without having happened. Then two single button cases, each followed by a
+click:
+
+  long hold     held for longer than the driver's release timeout
+  merged click  pressed and released between two polls (one latched edge),
+                waited out past the driver's held timeout
+
+The bench exits 1 unless each reads as press, long press, release, press,
+release with the button up.
+
+Usage: python bench_gestures.py [--gestures 20] [--seed 1]
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+
+from button_gestures import (PRESS, RELEASE, DOUBLE_PRESS, LONG_PRESS,
+                             LONG_PRESS_TIME)
+from DFRobot_VisualRotaryEncoder import DFRobot_VisualRotaryEncoder
+from fake_smbus import FakeSEN0502, FakeSMBus
+
+ADDR = 0x54
+KINDS = (PRESS, RELEASE, DOUBLE_PRESS, LONG_PRESS)
+# (label, fixed poll interval in s, or None for adaptive 10 ms / 100 ms)
+POLLERS = (("adaptive", None), ("100 Hz", 0.01), ("50 Hz", 0.02), ("10 Hz", 0.1))
+
+
+def make_script(gestures, seed):
+    """-> [(offset, "press"/"release")], [(offset, expected kind)]"""
+    rng = random.Random(seed)
+    actions = []
+    expected = []
+    t = 0.2
+    for _ in range(gestures):
+        gesture = rng.choice(("single", "double", "long"))
+        if gesture == "single":
+            hold = rng.uniform(0.03, 0.15)
+            actions += [(t, "press"), (t + hold, "release")]
+            expected += [(t, PRESS), (t + hold, RELEASE)]
+            t += hold
+        elif gesture == "double":
+            hold, gap = rng.uniform(0.05, 0.1), rng.uniform(0.06, 0.15)
+            second = t + hold + gap
+            actions += [(t, "press"), (t + hold, "release"),
+                        (second, "press"), (second + hold, "release")]
+            expected += [(t, PRESS), (t + hold, RELEASE), (second, PRESS),
+                         (second, DOUBLE_PRESS), (second + hold, RELEASE)]
+            t = second + hold
+        else:
+            hold = rng.uniform(0.8, 1.2)
+            actions += [(t, "press"), (t + hold, "release")]
+            expected += [(t, PRESS), (t + LONG_PRESS_TIME, LONG_PRESS), (t + hold, RELEASE)]
+            t += hold
+        # longer than the double press window
+        t += rng.uniform(0.45, 0.7)
+    return actions, expected, t
+
+
+def poller(encoder, interval, detected, stop):
+    if interval is None:
+        encoder.enable_adaptive_polling()
+    next_poll = time.monotonic()
+    while not stop.is_set():
+        state = encoder.read_state()
+        for event in encoder.handle_sensor(state):
+            detected.append((event.kind, event.timestamp, time.monotonic()))
+        next_poll += encoder.poll_interval if interval is None else interval
+        delay = next_poll - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_poll = time.monotonic()
+
+
+def play(device, script, duration, interval=0.01):
+    """Run [(offset, action)] on device while polling it; -> gesture kinds, final down."""
+    encoder = DFRobot_VisualRotaryEncoder(i2c_addr=ADDR, bus=FakeSMBus([device]))
+    kinds = []
+    start = time.monotonic()
+    while time.monotonic() - start < duration:
+        while script and time.monotonic() - start >= script[0][0]:
+            script.pop(0)[1]()
+        kinds += [event.kind for event in encoder.handle_sensor(encoder.read_state())]
+        time.sleep(interval)
+    return kinds, encoder.gestures.down
+
+
+def check_long_hold(hold):
+    """A hold past the release timeout, then a click."""
+    device = FakeSEN0502(ADDR)
+    script = [(0.05, device.press), (0.05 + hold, device.release),
+              (0.25 + hold, device.press), (0.35 + hold, device.release)]
+    return play(device, script, hold + 0.5)
+
+
+def check_merged_click(wait):
+    """A click whose two edges latch as one, nothing for wait, then a click."""
+    device = FakeSEN0502(ADDR)
+
+    def merged_click():
+        device.press()
+        device.release()
+    script = [(0.05, merged_click), (0.05 + wait, device.press), (0.15 + wait, device.release)]
+    return play(device, script, wait + 0.3)
+
+
+def match(expected, detected):
+    """Pair each expected event with the first later detection of its kind.
+
+    Returns per kind: [latencies], missed count; and the unmatched detections.
+    """
+    latencies = {kind: [] for kind in KINDS}
+    missed = {kind: 0 for kind in KINDS}
+    remaining = list(detected)
+    for i, (when, kind) in enumerate(expected):
+        # a detection belongs to this event if it comes before the next
+        # expected event of the same kind
+        later = [w for w, k in expected[i + 1:] if k == kind]
+        limit = later[0] if later else float("inf")
+        for j, (d_kind, _, d_time) in enumerate(remaining):
+            if d_kind == kind and when <= d_time < limit:
+                latencies[kind].append(d_time - when)
+                del remaining[j]
+                break
+        else:
+            missed[kind] += 1
+    return latencies, missed, remaining
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Button gesture detection benchmark")
+    parser.add_argument("--gestures", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    actions, expected, duration = make_script(args.gestures, args.seed)
+    devices = [FakeSEN0502(ADDR) for _ in POLLERS]
+    encoders = [DFRobot_VisualRotaryEncoder(i2c_addr=ADDR, bus=FakeSMBus([d])) for d in devices]
+    detected = [[] for _ in POLLERS]
+    stop = threading.Event()
+    threads = [threading.Thread(target=poller, args=(encoder, interval, found, stop), daemon=True)
+               for encoder, (_, interval), found in zip(encoders, POLLERS, detected)]
+    print(f"{args.gestures} gestures, {len(expected)} expected events, {duration:.1f} s")
+
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for offset, action in actions:
+        delay = start + offset - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        for device in devices:
+            getattr(device, action)()
+    time.sleep(0.3)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    expected = [(start + offset, kind) for offset, kind in expected]
+    for (label, _), found, encoder in zip(POLLERS, detected, encoders):
+        latencies, missed, spurious = match(expected, found)
+        total_missed = sum(missed.values())
+        print(f"{label:9s} missed {total_missed}/{len(expected)} "
+              f"({total_missed / len(expected) * 100:.1f}%), {len(spurious)} spurious, "
+              f"{encoder.gestures.timeouts} release timeouts")
+        for kind in KINDS:
+            values = latencies[kind]
+            print(f"  {kind:13s} n={len(values):3d} missed={missed[kind]:2d} "
+                  f"latency p50 {percentile(values, 0.5) * 1000:6.1f} ms "
+                  f"p99 {percentile(values, 0.99) * 1000:6.1f} ms")
+
+    failed = False
+    hold = DFRobot_VisualRotaryEncoder.button_down_time_reset + 0.5
+    wait = DFRobot_VisualRotaryEncoder.button_held_time_reset + 0.5
+    for label, (kinds, down) in ((f"{hold:.1f} s hold then a click", check_long_hold(hold)),
+                                 (f"merged click, {wait:.1f} s, a click", check_merged_click(wait))):
+        ok = kinds == [PRESS, LONG_PRESS, RELEASE, PRESS, RELEASE] and not down
+        print(f"{label}: {', '.join(kinds)}, "
+              f"button {'down' if down else 'up'}: {'ok' if ok else 'WRONG'}")
+        failed = failed or not ok
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
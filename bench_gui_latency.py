@@ -0,0 +1,92 @@
+"""GUI frame time with a slow or lossy console.
+
+Runs MainWindow offscreen against the local X32 emulator, drags the fader
+every frame and pushes remote changes, and measures how late each 16 ms
+frame tick fires. With all mixer I/O on MixerWorker the frame time must not
+depend on the console: the run fails if the worst frame with 500 ms latency
+and packet loss exceeds the clean run's worst frame by more than --slack ms.
+
+Usage: python bench_gui_latency.py [--seconds 3] [--slack 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+
+from interface_test2 import MainWindow, MixerWorker
+from x32_emulator import X32Emulator
+
+FRAME_MS = 16
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))]
+
+
+def run(app, latency, loss, seconds):
+    with X32Emulator(latency=latency, loss=loss, seed=1) as emulator:
+        mixer = MixerWorker(emulator.host, emulator.port, connect_timeout=5)
+        window = MainWindow(mixer, [("ch", i) for i in range(8)])
+        mixer.watch(*window.addresses)
+        mixer.start()
+        window.show()
+
+        lateness = []
+        state = {"last": time.perf_counter(), "frame": 0}
+
+        def tick():
+            now = time.perf_counter()
+            lateness.append(now - state["last"] - FRAME_MS / 1000.0)
+            state["last"] = now
+            frame = state["frame"] = state["frame"] + 1
+            # user dragging strip 1, console moving strip 2
+            window.strips[0].slider.setValue(frame % 101)
+            if frame % 4 == 0:
+                emulator.set_parameter("/ch/02/mix/fader", (frame % 100) / 100.0)
+
+        timer = QTimer()
+        timer.setInterval(FRAME_MS)
+        timer.timeout.connect(tick)
+        timer.start()
+        QTimer.singleShot(int(seconds * 1000), app.quit)
+        app.exec()
+        timer.stop()
+        mixer.stop()
+        window.close()
+
+    ordered = sorted(max(0.0, x) for x in lateness[1:])
+    return {
+        "frames": len(ordered),
+        "p50": percentile(ordered, 50),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GUI frame time vs console latency")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--slack", type=float, default=20.0, help="allowed extra worst-case lateness (ms)")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = {}
+    for name, latency, loss in (("clean", 0.0, 0.0), ("slow+lossy", 0.5, 0.2)):
+        result = results[name] = run(app, latency, loss, args.seconds)
+        print(f"{name:11s} frames={result['frames']} late p50={result['p50'] * 1000:.2f} ms "
+              f"p99={result['p99'] * 1000:.2f} ms max={result['max'] * 1000:.2f} ms")
+
+    extra = (results["slow+lossy"]["max"] - results["clean"]["max"]) * 1000
+    if extra > args.slack:
+        print(f"FAIL: worst frame {extra:.1f} ms later with a slow console")
+        sys.exit(1)
+    print("OK: frame time independent of console latency")
+
+
+if __name__ == "__main__":
+    main()
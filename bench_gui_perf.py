@@ -0,0 +1,264 @@
+"""MainWindow cost versus number of strips, offscreen against the X32 emulator.
+
+For every strip count a MainWindow (with its MixerWorker) runs against the
+local emulator. A synthetic user drags one TouchSlider after the other
+(press, --moves mouse moves one per 16 ms frame, release) while the
+"console" changes random strip faders, mutes and names at --update-rate Hz.
+Recorded per run:
+
+  frame_late   how late each 16 ms event loop tick fired (s)
+  poll_mixer   duration of MainWindow._poll_mixer (perf_stats histogram)
+  value_from_pos  calls during the drags and cost per call (timeit, s)
+  paints       paint events per second, for the whole window and per
+               widget type
+
+Results go to --output as JSON (one record per strip count and update rate,
+plus the Python/Qt versions) so runs can be compared release to release.
+
+Usage: python bench_gui_perf.py [--strips 1,2,4,8,16,32] [--update-rate 40,100]
+                                [--seconds 2] [--output bench_gui_perf.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+import timeit
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import PySide6
+from PySide6.QtCore import QEvent, QObject, QPoint, QPointF, Qt, QTimer
+from PySide6.QtGui import QMouseEvent
+from PySide6.QtWidgets import QApplication, QWidget
+
+from interface_test2 import MainWindow, MixerWorker, TouchSlider
+from perf_stats import REGISTRY
+from x32_emulator import X32Emulator
+from x32_subscription import strip_address
+
+FRAME_MS = 16
+WARMUP = 0.5
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))] if ordered else 0.0
+
+
+class PaintCounter(QObject):
+    """Event filter counting paint events per widget class."""
+    def __init__(self, widgets):
+        super().__init__()
+        self.counts = {}
+        for widget in widgets:
+            widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            name = type(obj).__name__
+            self.counts[name] = self.counts.get(name, 0) + 1
+        return False
+
+
+def send_mouse(widget, kind, pos):
+    buttons = Qt.NoButton if kind == QEvent.MouseButtonRelease else Qt.LeftButton
+    point = QPointF(pos)
+    event = QMouseEvent(kind, point, widget.mapToGlobal(point), Qt.LeftButton, buttons, Qt.NoModifier)
+    QApplication.sendEvent(widget, event)
+
+
+class DragScript:
+    """Press, move and release the strips' sliders in turn, one step per frame."""
+    def __init__(self, strips, moves, seed):
+        self.strips = strips
+        self.moves = moves
+        self._random = random.Random(seed)
+        self._strip = 0
+        self._step = 0
+        self._pos = None
+        self.gestures = 0
+
+    def step(self):
+        slider = self.strips[self._strip].slider
+        width, height = max(1, slider.width()), max(1, slider.height())
+        if self._step == 0:
+            self._pos = QPoint(self._random.randrange(width), height // 2)
+            send_mouse(slider, QEvent.MouseButtonPress, self._pos)
+        elif self._step <= self.moves:
+            # mostly horizontal drags, some vertical swipes
+            if self._random.random() < 0.8:
+                self._pos = QPoint(min(max(self._pos.x() + self._random.randint(-40, 40), 0), width),
+                                   self._pos.y())
+            else:
+                self._pos = QPoint(self._pos.x(), self._pos.y() + self._random.randint(-15, 15))
+            send_mouse(slider, QEvent.MouseMove, self._pos)
+        else:
+            send_mouse(slider, QEvent.MouseButtonRelease, self._pos)
+            self._step = -1
+            self._strip = (self._strip + 1) % len(self.strips)
+            self.gestures += 1
+        self._step += 1
+
+
+def console_changes(emulator, strips, rate, stop, seed, counter):
+    """Change random strip parameters on the console at rate Hz."""
+    rng = random.Random(seed)
+    next_change = time.monotonic()
+    while not stop.is_set():
+        index = rng.randrange(strips)
+        roll = rng.random()
+        if roll < 0.8:
+            emulator.set_parameter(strip_address(index, "mix/fader"), rng.random())
+        elif roll < 0.95:
+            emulator.set_parameter(strip_address(index, "mix/on"), rng.randint(0, 1))
+        else:
+            emulator.set_parameter(strip_address(index, "config/name"), f"Src {rng.randrange(100)}")
+        counter[0] += 1
+        next_change += 1.0 / rate
+        delay = next_change - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def value_from_pos_cost(slider, number=20000):
+    """Seconds per TouchSlider._value_from_pos call on a laid out slider."""
+    pos = QPoint(slider.width() // 3, slider.height() // 2)
+    # the class method, not the counting wrapper installed by run()
+    value_from_pos = TouchSlider._value_from_pos
+    return min(timeit.repeat(lambda: value_from_pos(slider, pos), number=number, repeat=3)) / number
+
+
+def run(app, strips, update_rate, args):
+    with X32Emulator() as emulator:
+        mixer = MixerWorker(emulator.host, emulator.port, connect_timeout=5)
+        window = MainWindow(mixer, [("ch", i) for i in range(strips)])
+        mixer.watch(*window.addresses)
+        mixer.start()
+        window.show()
+
+        # count _value_from_pos calls made by the drags
+        calls = [0]
+        for strip in window.strips:
+            slider = strip.slider
+
+            def counted(pos, original=slider._value_from_pos):
+                calls[0] += 1
+                return original(pos)
+            slider._value_from_pos = counted
+        painted = PaintCounter([window] + window.findChildren(QWidget))
+        script = DragScript(window.strips, args.moves, args.seed)
+
+        lateness = []
+        changes = [0]
+        stop = threading.Event()
+        state = {"last": None, "measuring": False, "started": 0.0}
+
+        def tick():
+            now = time.perf_counter()
+            if state["measuring"] and state["last"] is not None:
+                lateness.append(now - state["last"] - FRAME_MS / 1000.0)
+            state["last"] = now
+            script.step()
+
+        def start_measuring():
+            # after the window is up and the cache is seeded
+            REGISTRY.reset()
+            painted.counts.clear()
+            calls[0] = 0
+            changes[0] = 0
+            script.gestures = 0
+            state["measuring"] = True
+            state["started"] = time.perf_counter()
+
+        timer = QTimer()
+        timer.setInterval(FRAME_MS)
+        timer.timeout.connect(tick)
+        timer.start()
+        changer = threading.Thread(target=console_changes,
+                                   args=(emulator, strips, update_rate, stop, args.seed, changes),
+                                   daemon=True)
+        changer.start()
+        QTimer.singleShot(int(WARMUP * 1000), start_measuring)
+        QTimer.singleShot(int((WARMUP + args.seconds) * 1000), app.quit)
+        app.exec()
+        elapsed = time.perf_counter() - state["started"]
+        stop.set()
+        changer.join()
+        timer.stop()
+        poll = REGISTRY.histogram("poll_mixer").snapshot()
+        view = window.view_stats()
+        drag_calls = calls[0]
+        cost = value_from_pos_cost(window.strips[0].slider)
+        mixer.stop()
+        window.close()
+
+    late = sorted(max(0.0, x) for x in lateness)
+    paints = dict(sorted(painted.counts.items()))
+    return {
+        "strips": strips,
+        "update_rate": update_rate,
+        "seconds": elapsed,
+        "console_changes": changes[0],
+        "gestures": script.gestures,
+        "frames": len(late),
+        "frame_late": {
+            "mean": sum(late) / len(late) if late else 0.0,
+            "p50": percentile(late, 50),
+            "p99": percentile(late, 99),
+            "max": late[-1] if late else 0.0,
+        },
+        "poll_mixer": {key: poll[key] for key in ("count", "mean", "p50", "p99", "max")},
+        "value_from_pos": {"calls": drag_calls, "cost": cost},
+        "paints": {
+            "total": sum(paints.values()),
+            "per_second": sum(paints.values()) / elapsed if elapsed > 0 else 0.0,
+            "by_widget": paints,
+        },
+        "view": view,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offscreen MainWindow performance")
+    parser.add_argument("--strips", default="1,2,4,8,16,32", help="strip counts to test")
+    parser.add_argument("--update-rate", default="40,100", help="console changes per second")
+    parser.add_argument("--seconds", type=float, default=2.0, help="measured time per run")
+    parser.add_argument("--moves", type=int, default=20, help="mouse moves per drag")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="bench_gui_perf.json", help="JSON results file")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    runs = []
+    print(f"{'strips':>6} {'upd/s':>6} {'frame late p50/p99/max ms':>26} {'poll_mixer mean/max us':>23} "
+          f"{'vfp calls':>9} {'vfp ns':>7} {'paints/s':>9}")
+    for update_rate in [float(r) for r in args.update_rate.split(",")]:
+        for strips in [int(n) for n in args.strips.split(",")]:
+            r = run(app, strips, update_rate, args)
+            runs.append(r)
+            late, poll, vfp = r["frame_late"], r["poll_mixer"], r["value_from_pos"]
+            print(f"{strips:6d} {update_rate:6.0f} "
+                  f"{late['p50'] * 1000:10.2f} {late['p99'] * 1000:7.2f} {late['max'] * 1000:7.2f} "
+                  f"{poll['mean'] * 1e6:13.1f} {poll['max'] * 1e6:9.1f} "
+                  f"{vfp['calls']:9d} {vfp['cost'] * 1e9:7.0f} {r['paints']['per_second']:9.0f}")
+
+    result = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pyside6": PySide6.__version__,
+        "platform": platform.platform(),
+        "qpa": os.environ.get("QT_QPA_PLATFORM"),
+        "frame_ms": FRAME_MS,
+        "moves": args.moves,
+        "runs": runs,
+    }
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=1)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
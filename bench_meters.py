@@ -0,0 +1,98 @@
+"""Meter decode and paint benchmarks against the local X32 emulator.
+
+  decode    MeterRing.push_blob on a /meters/1 blob (blobs per second)
+  osc+decode  the same including OSC parsing, as done on the receive thread
+  stream    frames per second actually received from the emulator
+  paint     per-frame MeterWidget paint cost for a full 32 channel surface (offscreen Qt)
+
+Usage: python bench_meters.py [--seconds 2]
+"""
+import argparse
+import os
+import struct
+import time
+
+from pythonosc.osc_message import OscMessage
+
+from x32_emulator import X32Emulator, build_message
+from x32_meters import METER_SIZES, MeterRing, MeterStream
+from x32_subscription import X32Subscription
+
+BANK = "/meters/1"
+
+
+def make_blob(count=METER_SIZES[BANK]) -> bytes:
+    return struct.pack(f"<i{count}f", count, *[i / count for i in range(count)])
+
+
+def bench_decode(n=100000):
+    blob = make_blob()
+    ring = MeterRing(METER_SIZES[BANK])
+    start = time.perf_counter()
+    for _ in range(n):
+        ring.push_blob(blob, 0.0)
+    elapsed = time.perf_counter() - start
+    return n / elapsed, elapsed / n
+
+
+def bench_osc_decode(n=50000):
+    dgram = build_message(BANK, make_blob())
+    ring = MeterRing(METER_SIZES[BANK])
+    start = time.perf_counter()
+    for _ in range(n):
+        ring.push_blob(OscMessage(dgram).params[0], 0.0)
+    elapsed = time.perf_counter() - start
+    return n / elapsed, elapsed / n
+
+
+def bench_stream(seconds):
+    with X32Emulator() as emulator, X32Subscription(emulator.host, emulator.port) as state:
+        stream = MeterStream(state, BANK)
+        time.sleep(seconds)
+        return stream.ring.count / seconds
+
+
+def bench_paint(frames=200, strips=32):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication, QVBoxLayout, QWidget
+    from interface_test2 import MeterWidget
+
+    app = QApplication.instance() or QApplication([])
+    ring = MeterRing(METER_SIZES[BANK])
+    container = QWidget()
+    layout = QVBoxLayout(container)
+    meters = [MeterWidget(ring, i) for i in range(strips)]
+    for meter in meters:
+        layout.addWidget(meter)
+    container.resize(800, 30 * strips)
+    container.show()
+    app.processEvents()
+
+    blob = make_blob()
+    start = time.perf_counter()
+    for _ in range(frames):
+        ring.push_blob(blob)
+        for meter in meters:
+            meter.refresh()
+            meter.repaint()
+    elapsed = time.perf_counter() - start
+    painted = sum(meter.paint_count for meter in meters)
+    return elapsed / frames, painted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="X32 meter benchmarks")
+    parser.add_argument("--seconds", type=float, default=2.0, help="stream duration")
+    args = parser.parse_args()
+
+    rate, per = bench_decode()
+    print(f"decode      {rate:.0f} blobs/s, {per * 1e6:.2f} us/blob")
+    rate, per = bench_osc_decode()
+    print(f"osc+decode  {rate:.0f} blobs/s, {per * 1e6:.2f} us/blob")
+    print(f"stream      {bench_stream(args.seconds):.1f} frames/s from the emulator")
+    per_frame, painted = bench_paint()
+    print(f"paint       {per_frame * 1000:.3f} ms/frame for 32 meters ({painted} paints)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Knob-to-fader latency with encoder polling in the GUI process or its own process.
+
+A simulated SEN0502 is turned one detent every 20-40 ms while an offscreen
+MainWindow with --strips strips repaints all of them every 16 ms (the GIL
+heavy part of the kiosk). Turns are read either by an EncoderScheduler
+thread in the GUI process ("single") or by an acquisition process that
+publishes them through encoder_shm ("split"); either way a 2 ms Qt timer
+moves strip 1's fader to the new position. Reported per mode: time from the
+turn to the fader update (p50/p99/max/std), turns never shown, how late the
+encoder polls ran and how late the GUI frames fired.
+
+Usage: python bench_multiprocess.py [--seconds 5] [--strips 16] [--rate 100]
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from functools import partial
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+
+from DFRobot_VisualRotaryEncoder import DFRobot_VisualRotaryEncoder
+from encoder_scheduler import EncoderScheduler, ROTATION
+from encoder_shm import EncoderBlock, EncoderReader, acquisition_main
+from fake_smbus import FakeSEN0502, FakeSMBus
+from interface_test2 import MainWindow
+
+ADDR = 0x54
+FRAME_MS = 16
+INTAKE_MS = 2
+# counts start here and only go up, so every turn has its own position
+START_COUNT = 200
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))] if ordered else 0.0
+
+
+def turner(device, turns, seconds, seed):
+    """Turn device one detent at a time; turns gets (count, time.monotonic())."""
+    rng = random.Random(seed)
+    end = time.monotonic() + seconds
+    time.sleep(0.2)
+    while time.monotonic() < end:
+        device.turn(1)
+        turns.put((device.count, time.monotonic()))
+        time.sleep(rng.uniform(0.02, 0.04))
+    turns.put(None)
+
+
+def make_turned_encoders(turns, seconds, seed):
+    """make_encoders for the acquisition process: one encoder plus its turner thread."""
+    device = FakeSEN0502(ADDR, count=START_COUNT)
+    encoder = DFRobot_VisualRotaryEncoder(i2c_addr=ADDR, bus=FakeSMBus([device]), gain_coefficient=1)
+    threading.Thread(target=turner, args=(device, turns, seconds, seed), daemon=True).start()
+    return [encoder]
+
+
+def split_main(name, turns, seconds, seed, rate, stop, stats):
+    stats.put(acquisition_main(name, partial(make_turned_encoders, turns, seconds, seed),
+                               rate, stop, recenter=False))
+
+
+def run(app, mode, args):
+    window = MainWindow(None, [("ch", i) for i in range(args.strips)])
+    window.show()
+    shown = []  # (position, time shown)
+    frames = []
+    state = {"last": time.perf_counter(), "frame": 0}
+
+    if mode == "single":
+        turns = queue.Queue()
+        device = FakeSEN0502(ADDR, count=START_COUNT)
+        encoder = DFRobot_VisualRotaryEncoder(i2c_addr=ADDR, bus=FakeSMBus([device]), gain_coefficient=1)
+        scheduler = EncoderScheduler([encoder], rate=args.rate)
+        scheduler.start()
+        threading.Thread(target=turner, args=(device, turns, args.seconds, args.seed), daemon=True).start()
+
+        def intake():
+            while True:
+                try:
+                    event = scheduler.events.get_nowait()
+                except queue.Empty:
+                    return
+                if event.kind == ROTATION:
+                    yield event.value
+    else:
+        turns = multiprocessing.Queue()
+        block = EncoderBlock.create(1)
+        stop = multiprocessing.Event()
+        stats = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=split_main, args=(block.name, turns, args.seconds, args.seed, args.rate, stop, stats),
+            daemon=True)
+        process.start()
+        while block.read(0).seq == 0:
+            time.sleep(0.001)
+        reader = EncoderReader(block)
+
+        def intake():
+            for event in reader.events():
+                if event.kind == ROTATION:
+                    yield event.value
+
+    def on_intake():
+        for position in intake():
+            window.strips[0].slider.setValue(position % 101)
+            shown.append((position, time.monotonic()))
+
+    def on_frame():
+        now = time.perf_counter()
+        frames.append(now - state["last"] - FRAME_MS / 1000.0)
+        state["last"] = now
+        frame = state["frame"] = state["frame"] + 1
+        # everything but the knob's strip moves, so every frame repaints
+        for strip in window.strips[1:]:
+            strip.slider.setValue((frame + strip.index) % 101)
+        window.repaint()
+
+    intake_timer = QTimer()
+    intake_timer.setInterval(INTAKE_MS)
+    intake_timer.timeout.connect(on_intake)
+    frame_timer = QTimer()
+    frame_timer.setInterval(FRAME_MS)
+    frame_timer.timeout.connect(on_frame)
+    intake_timer.start()
+    frame_timer.start()
+    QTimer.singleShot(int((args.seconds + 0.3) * 1000), app.quit)
+    app.exec()
+    intake_timer.stop()
+    frame_timer.stop()
+
+    turned = []
+    while True:
+        item = turns.get(timeout=2)
+        if item is None:
+            break
+        turned.append(item)
+    if mode == "single":
+        scheduler.stop()
+        poll_stats = scheduler.stats()[0]
+        retries = 0
+    else:
+        stop.set()
+        poll_stats = stats.get(timeout=5)[0]
+        process.join()
+        retries = reader.block.read_retries
+        block.close()
+        block.unlink()
+    window.close()
+
+    shown_at = {}
+    for position, t in shown:
+        shown_at.setdefault(position, t)
+    latencies = [shown_at[count] - t for count, t in turned if count in shown_at]
+    # a turn not shown itself but overtaken by a later one still reached the fader
+    missed = sum(1 for count, _ in turned if count not in shown_at
+                 and not any(p > count for p in shown_at))
+    ordered = sorted(latencies)
+    mean = sum(latencies) / len(latencies) if latencies else 0.0
+    std = math.sqrt(sum((x - mean) ** 2 for x in latencies) / len(latencies)) if latencies else 0.0
+    late = sorted(frames[1:])
+    return {
+        "turns": len(turned),
+        "shown": len(latencies),
+        "missed": missed,
+        "p50": percentile(ordered, 50),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else 0.0,
+        "std": std,
+        "poll_jitter_mean": poll_stats["jitter_mean"],
+        "poll_jitter_max": poll_stats["jitter_max"],
+        "frame_late_p99": percentile(late, 99),
+        "frame_late_max": late[-1] if late else 0.0,
+        "read_retries": retries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single vs split process encoder latency")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--strips", type=int, default=16, help="strips repainted every frame")
+    parser.add_argument("--rate", type=float, default=100.0, help="encoder poll rate (Hz)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--modes", default="single,split")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    print(f"{os.cpu_count()} CPU(s), {args.strips} strips repainted every {FRAME_MS} ms, "
+          f"encoder polled at {args.rate:.0f} Hz")
+    print(f"{'mode':>6} {'turns':>6} {'missed':>6} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7} "
+          f"{'std ms':>7} {'poll late':>10} {'frame late p99':>15} {'retries':>8}")
+    for mode in args.modes.split(","):
+        r = run(app, mode, args)
+        print(f"{mode:>6} {r['turns']:6d} {r['missed']:6d} {r['p50'] * 1000:7.2f} {r['p99'] * 1000:7.2f} "
+              f"{r['max'] * 1000:7.2f} {r['std'] * 1000:7.2f} {r['poll_jitter_mean'] * 1000:8.2f}ms "
+              f"{r['frame_late_p99'] * 1000:13.2f}ms {r['read_retries']:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Fader snap-back and write-back traffic with and without optimistic state.
+
+Runs one strip of MainWindow offscreen against the emulator with --latency
+reply delay while a poller queries the fader every --poll-ms (like a client
+that keeps reading the value back). A synthetic user drags the TouchSlider
+(press, moves, release) and lets go for a while; some drags are crossed by
+a change made on the console itself, some of the pauses too. Each
+mode runs the same script:
+
+  optimistic   pending local writes checked against console values
+  off          pending writes expire at once, console values always win
+
+Reported: user slider changes, writes sent to the console and the writes
+saved (redundant writes not sent, console values shown without being
+written back), echoes/stale replies/conflicts handled, how often the handle
+jumped after release without a console change (snap-back) and how often the
+pause ended with console and slider disagreeing (diverged). With optimistic
+state the bench exits 1 on any snap-back, or if there are more conflicts
+than console changes (a reply to our own writes taken for someone else's).
+
+Then two X32Subscription clients set() the same fader once, at the same
+time: each sees the other's write as a conflict. Reported: console writes
+in the next second and whether both caches end up with the console's
+value; the bench exits 1 if the clients keep writing (more than one write
+each) or disagree with the console.
+
+Usage: python bench_optimistic.py [--gestures 30] [--latency 0.03] [--poll-ms 40]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEvent, QPoint, QPointF, Qt, QTimer
+from PySide6.QtGui import QMouseEvent
+from PySide6.QtWidgets import QApplication
+
+from fader_law import fader_to_db
+from interface_test2 import MainWindow, MixerWorker, db_to_slider
+from optimistic_state import same_value
+from x32_emulator import X32Emulator
+from x32_subscription import X32Subscription, strip_address
+
+FRAME_MS = 16
+FADER = strip_address(0, "mix/fader")
+# frames per gesture: drag moves, then the pause after release
+MOVES = 20
+PAUSE = 25
+
+
+def send_mouse(widget, kind, pos):
+    buttons = Qt.NoButton if kind == QEvent.MouseButtonRelease else Qt.LeftButton
+    point = QPointF(pos)
+    QApplication.sendEvent(widget, QMouseEvent(kind, point, widget.mapToGlobal(point),
+                                               Qt.LeftButton, buttons, Qt.NoModifier))
+
+
+def run(app, mode, args):
+    rng = random.Random(args.seed)
+    with X32Emulator(latency=args.latency) as emulator:
+        mixer = MixerWorker(emulator.host, emulator.port, connect_timeout=5)
+        if mode == "off":
+            mixer.state.pending.timeout = 0.0
+        window = MainWindow(mixer, [("ch", 0)])
+        mixer.watch(*window.addresses)
+        mixer.start()
+        window.show()
+        strip = window.strips[0]
+        slider = strip.slider
+
+        user_changes = [0]
+        # valueChanged only fires for the user: console values are shown blocked
+        slider.valueChanged.connect(lambda value: user_changes.__setitem__(0, user_changes[0] + 1))
+        result = {"gestures": 0, "snap_backs": 0, "diverged": 0, "remote_changes": 0}
+        script = {"frame": 0, "pos": None, "released": None, "remote": False, "jumped": False}
+
+        def poll():
+            mixer.state.watch(FADER)
+
+        def remote_change():
+            emulator.set_parameter(FADER, round(rng.random(), 3))
+            script["remote"] = True
+            result["remote_changes"] += 1
+
+        def tick():
+            step = script["frame"] % (MOVES + 2 + PAUSE)
+            gesture = script["frame"] // (MOVES + 2 + PAUSE)
+            script["frame"] += 1
+            if gesture >= args.gestures:
+                app.quit()
+                return
+            height = max(1, slider.height())
+            if step == 0:
+                script["remote"] = script["jumped"] = False
+                script["pos"] = QPoint(slider.width() // 2, rng.randrange(height))
+                send_mouse(slider, QEvent.MouseButtonPress, script["pos"])
+            elif step <= MOVES:
+                # vertical swipe
+                y = min(max(script["pos"].y() + rng.randint(-30, 30), 0), height)
+                script["pos"] = QPoint(script["pos"].x(), y)
+                send_mouse(slider, QEvent.MouseMove, script["pos"])
+                if gesture % 3 == 1 and step == MOVES // 2:
+                    # someone on the console moves the same fader mid drag
+                    remote_change()
+            elif step == MOVES + 1:
+                send_mouse(slider, QEvent.MouseButtonRelease, script["pos"])
+                script["released"] = slider.value()
+            else:
+                if gesture % 4 == 3 and step == MOVES + 1 + PAUSE // 2:
+                    remote_change()
+                if (not script["remote"] and not script["jumped"]
+                        and slider.value() != script["released"]):
+                    script["jumped"] = True
+                    result["snap_backs"] += 1
+                if step == MOVES + 1 + PAUSE:
+                    result["gestures"] += 1
+                    console = emulator.get_parameter(FADER)
+                    if db_to_slider(fader_to_db(console)) != slider.value():
+                        result["diverged"] += 1
+
+        frame_timer = QTimer()
+        frame_timer.setInterval(FRAME_MS)
+        frame_timer.timeout.connect(tick)
+        poll_timer = QTimer()
+        poll_timer.setInterval(args.poll_ms)
+        poll_timer.timeout.connect(poll)
+        # let the cache seed before the first drag
+        QTimer.singleShot(500, frame_timer.start)
+        QTimer.singleShot(500, poll_timer.start)
+        app.exec()
+        frame_timer.stop()
+        poll_timer.stop()
+        writes = emulator.writes
+        mixer.stop()
+        view = window.view_stats()
+        pending = mixer.state.pending.stats()
+        window.close()
+
+    result.update(user_changes=user_changes[0], console_writes=writes,
+                  write_backs_avoided=view["write_backs_avoided"], **pending)
+    return result
+
+
+def two_clients(latency, seconds=1.0):
+    """Two clients write the same fader once each, at the same time."""
+    with X32Emulator(latency=latency) as emulator, \
+            X32Subscription(emulator.host, emulator.port) as first, \
+            X32Subscription(emulator.host, emulator.port) as second:
+        clients = (first, second)
+        for state in clients:
+            state.watch(FADER)
+        deadline = time.monotonic() + 2
+        while any(state.get(FADER) is None for state in clients) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writes = emulator.writes
+        first.set(FADER, 0.25)
+        second.set(FADER, 0.5)
+        time.sleep(seconds)
+        console = emulator.get_parameter(FADER)
+        return {
+            "console_writes": emulator.writes - writes,
+            "conflicts": sum(state.pending.conflicts for state in clients),
+            "agree": all(same_value(state.get(FADER), console) for state in clients),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimistic state: snap-back and write-back traffic")
+    parser.add_argument("--gestures", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.03, help="console reply delay (s)")
+    parser.add_argument("--poll-ms", type=int, default=40, help="fader read-back interval")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    print(f"{'mode':>10} {'user':>5} {'sent':>5} {'redundant':>9} {'not written back':>16} "
+          f"{'echo':>5} {'stale':>5} {'remote':>6} {'conflict':>8} {'snap-back':>9} {'diverged':>8}")
+    for mode in ("optimistic", "off"):
+        r = run(app, mode, args)
+        print(f"{mode:>10} {r['user_changes']:5d} {r['console_writes']:5d} {r['redundant']:9d} "
+              f"{r['write_backs_avoided']:16d} {r['confirmed']:5d} {r['stale']:5d} "
+              f"{r['remote_changes']:6d} {r['conflicts']:8d} {r['snap_backs']:9d} {r['diverged']:8d}")
+        if mode == "optimistic":
+            optimistic_ok = r["snap_backs"] == 0 and r["conflicts"] <= r["remote_changes"]
+    print(f"optimistic: conflicts within console changes, no snap-back: "
+          f"{'ok' if optimistic_ok else 'FAILED'}")
+
+    r = two_clients(args.latency)
+    ok = r["console_writes"] <= 2 and r["agree"]
+    print(f"two clients, one set() each: {r['console_writes']} console writes, "
+          f"{r['conflicts']} conflicts, caches {'agree' if r['agree'] else 'DISAGREE'} "
+          f"with the console: {'ok' if ok else 'FAILED'}")
+    if not optimistic_ok or not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
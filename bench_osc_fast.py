@@ -0,0 +1,175 @@
+"""osc_fast templates versus the generic message builder.
+
+Checks first that the fast path is byte for byte what build_message() (and
+pythonosc's bundle builder) produce for every strip fader, pan, send level
+and mute address, and that the local emulator applies the same values from
+single messages and from bundles. Then times, per write:
+
+  encode        build_message() vs MessageTemplate.pack()
+  encode+send   the same plus sendto() to the emulator
+  bundle        8 fader writes as 8 datagrams vs one bundle
+  peak alloc    bytes allocated while encoding one write (tracemalloc)
+
+Usage: python bench_osc_fast.py [--count 20000]
+"""
+import argparse
+import random
+import socket
+import struct
+import sys
+import time
+import tracemalloc
+
+from pythonosc.osc_bundle_builder import IMMEDIATELY, OscBundleBuilder
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+from osc_fast import FastSender, MessageTemplate, message_tag
+from x32_emulator import X32Emulator, default_parameters
+from x32_subscription import build_message, strip_address
+
+
+def float32(value):
+    return struct.unpack(">f", struct.pack(">f", value))[0]
+
+
+def sample_value(rng, address):
+    return rng.randint(0, 1) if message_tag(address) == "i" else rng.random()
+
+
+def check_bytes(addresses, rng):
+    """Addresses whose template bytes differ from build_message()."""
+    bad = []
+    for address in addresses:
+        template = MessageTemplate(address, message_tag(address))
+        for value in (0, 1) if template.tag == "i" else (0.0, 1.0, rng.random(), 0.75):
+            if bytes(template.pack(value)) != build_message(address, value):
+                bad.append(address)
+                break
+    return bad
+
+
+def check_bundle(addresses, rng):
+    """True if a FastSender bundle is identical to pythonosc's."""
+    class Capture:
+        def sendto(self, data, target):
+            self.data = bytes(data)
+
+    capture = Capture()
+    items = [(address, sample_value(rng, address)) for address in addresses[:16]]
+    FastSender(capture, None).send_bundle(items)
+    builder = OscBundleBuilder(IMMEDIATELY)
+    for address, value in items:
+        message = OscMessageBuilder(address=address)
+        message.add_arg(value)
+        builder.add_content(message.build())
+    return capture.data == builder.build().dgram
+
+
+def check_emulator(addresses, rng):
+    """Addresses the emulator did not apply, sent one by one and as bundles."""
+    bad = []
+    with X32Emulator() as emulator:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender = FastSender(sock, (emulator.host, emulator.port))
+        for bundled in (False, True):
+            items = [(address, sample_value(rng, address)) for address in addresses]
+            if bundled:
+                sender.send_bundle(items)
+            else:
+                for i, (address, value) in enumerate(items):
+                    sender.send(address, value)
+                    if i % 16 == 15:
+                        # paced: hundreds of back to back datagrams overflow
+                        # the emulator's receive buffer, bundles do not
+                        time.sleep(0.001)
+            deadline = time.monotonic() + 2
+            while emulator.writes < len(items) * (2 if bundled else 1) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            for address, value in items:
+                expected = float32(value) if isinstance(value, float) else value
+                if emulator.get_parameter(address) != expected:
+                    bad.append((address, bundled))
+        sock.close()
+    return bad
+
+
+def per_call(function, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        function()
+    return (time.perf_counter() - start) / count
+
+
+def peak_bytes_per_call(function, count):
+    """Average peak of memory allocated (and maybe freed again) during one call."""
+    function()
+    total = 0
+    tracemalloc.start()
+    for _ in range(count):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        function()
+        total += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return total / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast-path OSC encoder benchmark")
+    parser.add_argument("--count", type=int, default=20000, help="writes per measurement")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    addresses = [address for address in default_parameters() if message_tag(address)]
+    bad = check_bytes(addresses, rng)
+    print(f"bytes: {len(addresses) - len(bad)}/{len(addresses)} addresses identical to build_message()")
+    bundle_ok = check_bundle(addresses, rng)
+    print(f"bundle: {'identical' if bundle_ok else 'DIFFERENT'} to pythonosc's bundle builder")
+    rejected = check_emulator(addresses, rng)
+    print(f"emulator: {2 * len(addresses) - len(rejected)}/{2 * len(addresses)} writes applied")
+
+    fader = strip_address(8, "mix/fader")
+    template = MessageTemplate(fader, "f")
+    values = [rng.random() for _ in range(1024)]
+    n = args.count
+    state = {"i": 0}
+
+    def next_value():
+        state["i"] = (state["i"] + 1) & 1023
+        return values[state["i"]]
+
+    rows = []
+    rows.append(("encode", per_call(lambda: build_message(fader, next_value()), n),
+                 per_call(lambda: template.pack(next_value()), n)))
+    with X32Emulator() as emulator:
+        target = (emulator.host, emulator.port)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender = FastSender(sock, target)
+        rows.append(("encode+send",
+                     per_call(lambda: sock.sendto(build_message(fader, next_value()), target), n),
+                     per_call(lambda: sender.send(fader, next_value()), n)))
+        faders = [strip_address(i, "mix/fader") for i in range(8)]
+
+        def eight_datagrams():
+            for address in faders:
+                sock.sendto(build_message(address, next_value()), target)
+
+        def one_bundle():
+            sender.send_bundle([(address, next_value()) for address in faders])
+
+        rows.append(("8 faders", per_call(eight_datagrams, n // 8), per_call(one_bundle, n // 8)))
+        sock.close()
+    allocated = (peak_bytes_per_call(lambda: build_message(fader, next_value()), 2000),
+                 peak_bytes_per_call(lambda: template.pack(next_value()), 2000))
+
+    print(f"{'per write':>12} {'generic us':>11} {'fast us':>8} {'speedup':>8}")
+    for name, slow, fast in rows:
+        print(f"{name:>12} {slow * 1e6:11.2f} {fast * 1e6:8.2f} {slow / fast:7.1f}x")
+    print(f"{'peak alloc':>12} {allocated[0]:10.0f}B {allocated[1]:7.0f}B")
+    if bad or rejected or not bundle_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Console-side message rate versus number of panels, direct and through x32_proxy.
+
+Every simulated panel registers with /xremote, polls the parameters of
+--strips strips at --poll-rate and drags the first strip's fader at
+--write-rate, like a kiosk running its own xair_api session. The emulator
+counts what reaches the "console". Direct, the console load grows with the
+number of panels; through the proxy it should stay flat.
+
+Also checks that xair_api works through the proxy unchanged, and that
+X32Subscription.set_many() (one OSC bundle) reaches the console through it.
+Exits 1 if either check fails, or if the console load through the proxy
+with the most panels is more than --max-growth times that with the fewest.
+
+Usage: python bench_proxy.py [--clients 1,2,4,8] [--seconds 2] [--strips 8] [--max-growth 1.5]
+"""
+import argparse
+import socket
+import sys
+import threading
+import time
+
+import xair_api
+
+from x32_emulator import X32Emulator
+from x32_proxy import X32Proxy
+from x32_subscription import X32Subscription, build_message, strip_address
+
+PARAMS = ("mix/fader", "mix/on", "config/name")
+
+
+def panel(target, index, args, stop, counts):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(0.001)
+    sock.sendto(build_message("/xremote"), target)
+    queries = [build_message(strip_address(i, p)) for i in range(args.strips) for p in PARAMS]
+    # all panels show the same strips
+    fader = strip_address(0, "mix/fader")
+    next_poll = next_write = time.monotonic()
+    step = 0
+    while not stop.is_set():
+        now = time.monotonic()
+        if now >= next_poll:
+            for query in queries:
+                sock.sendto(query, target)
+            next_poll += 1.0 / args.poll_rate
+        if now >= next_write:
+            step += 1
+            sock.sendto(build_message(fader, (step % 100) / 100.0), target)
+            next_write += 1.0 / args.write_rate
+        try:
+            while True:
+                sock.recvfrom(4096)
+                counts[index] += 1
+        except OSError:
+            pass
+    sock.close()
+
+
+def console_rate(emulator, target, clients, args):
+    stop = threading.Event()
+    counts = [0] * clients
+    threads = [threading.Thread(target=panel, args=(target, i, args, stop, counts), daemon=True)
+               for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)  # warm up: cache seeded, subscriptions registered
+    received, start = emulator.received, time.perf_counter()
+    replies = sum(counts)
+    time.sleep(args.seconds)
+    elapsed = time.perf_counter() - start
+    rate = (emulator.received - received) / elapsed
+    reply_rate = (sum(counts) - replies) / elapsed / clients
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return rate, reply_rate
+
+
+def check_xair_api(proxy, emulator):
+    with xair_api.connect("X32", ip="127.0.0.1", port=proxy.port, connect_timeout=2) as mixer:
+        mixer.strip[8].mix.fader = -10.0
+        time.sleep(0.1)
+        fader = mixer.strip[8].mix.fader
+        on = mixer.strip[8].mix.on
+    console = emulator.get_parameter(strip_address(8, "mix/fader"))
+    return abs(fader + 10.0) < 0.5 and on is True and console == proxy.state.get(strip_address(8, "mix/fader"))
+
+
+def check_set_many(proxy, emulator):
+    """True if a set_many() bundle sent to the proxy reaches the console."""
+    items = [(strip_address(i, "mix/fader"), 0.25 * (i + 1)) for i in range(3)]
+    with X32Subscription("127.0.0.1", proxy.port) as state:
+        state.set_many(items)
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline:
+            if all(emulator.get_parameter(address) == value for address, value in items):
+                return True
+            time.sleep(0.01)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fan-out proxy benchmark")
+    parser.add_argument("--clients", default="1,2,4,8", help="panel counts to test")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--strips", type=int, default=8, help="strips shown per panel")
+    parser.add_argument("--poll-rate", type=float, default=10.0, help="parameter polls per second")
+    parser.add_argument("--write-rate", type=float, default=50.0, help="fader writes per second")
+    parser.add_argument("--max-growth", type=float, default=1.5,
+                        help="allowed proxy console load, most panels over fewest")
+    args = parser.parse_args()
+    counts = sorted(int(n) for n in args.clients.split(","))
+
+    print(f"{'panels':>6} {'direct msg/s':>13} {'proxy msg/s':>12} {'replies/s per panel':>20} "
+          f"{'cache hits':>10} {'forwarded':>9} {'coalesced':>9}")
+    proxy_rates = []
+    for clients in counts:
+        with X32Emulator() as emulator:
+            direct, _ = console_rate(emulator, (emulator.host, emulator.port), clients, args)
+        with X32Emulator() as emulator, \
+                X32Proxy(emulator.host, emulator.port, host="127.0.0.1", port=0) as proxy:
+            proxied, replies = console_rate(emulator, (proxy.host, proxy.port), clients, args)
+            stats = proxy.stats()
+        proxy_rates.append(proxied)
+        print(f"{clients:6d} {direct:13.0f} {proxied:12.0f} {replies:20.0f} "
+              f"{stats['cache_hits']:10d} {stats['forwarded']:9d} {stats['coalesced']:9d}")
+    growth = proxy_rates[-1] / proxy_rates[0] if proxy_rates[0] else float("inf")
+    flat_ok = growth <= args.max_growth
+    print(f"proxy console load, {counts[-1]} panels over {counts[0]}: {growth:.2f}x "
+          f"(max {args.max_growth:g}x): {'ok' if flat_ok else 'FAILED'}")
+
+    with X32Emulator() as emulator, \
+            X32Proxy(emulator.host, emulator.port, host="127.0.0.1", port=0) as proxy:
+        xair_ok = check_xair_api(proxy, emulator)
+        print(f"xair_api through the proxy: {'ok' if xair_ok else 'FAILED'}")
+        bundle_ok = check_set_many(proxy, emulator)
+        print(f"set_many bundle through the proxy: {'ok' if bundle_ok else 'FAILED'}")
+    if not flat_ok or not xair_ok or not bundle_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
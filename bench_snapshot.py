@@ -0,0 +1,91 @@
+"""Scene snapshot/restore timing against the local X32 emulator.
+
+Compares a full 32 channel fader/mute/name snapshot taken one blocking
+xair_api read at a time with the pipelined x32_snapshot path, then times a
+pipelined restore and a save/load of the scene file.
+
+Usage: python bench_snapshot.py [--latency 0.005] [--loss 0.01] [--window 32]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import xair_api
+
+from x32_emulator import X32Emulator
+from x32_snapshot import (NAME_SIZE, NUM_CHANNELS, load_scene, restore_snapshot, save_scene,
+                          snapshot_addresses, take_snapshot)
+
+
+def sequential_snapshot(mixer):
+    scene = {}
+    errors = 0
+    for i in range(NUM_CHANNELS):
+        strip = mixer.strip[i]
+        try:
+            scene[i] = (strip.mix.fader, strip.mix.on, strip.config.name)
+        except Exception:
+            # xair_api returns whatever reply arrived last, a late or lost
+            # reply shows up as a value of the wrong type
+            errors += 1
+    return scene, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="X32 snapshot benchmark")
+    parser.add_argument("--latency", type=float, default=0.005, help="injected reply delay (s)")
+    parser.add_argument("--loss", type=float, default=0.01, help="injected packet loss 0..1")
+    parser.add_argument("--window", type=int, default=32, help="requests in flight")
+    args = parser.parse_args()
+
+    with X32Emulator(latency=args.latency, loss=args.loss, seed=1) as emulator:
+        host, port = emulator.host, emulator.port
+        for i in range(NUM_CHANNELS):
+            emulator.set_parameter(f"/ch/{i + 1:02d}/config/name", f"Input {i + 1}")
+        print(f"emulator latency {args.latency * 1000:.1f} ms, loss {args.loss * 100:.1f}%, "
+              f"{len(snapshot_addresses())} parameters")
+
+        with xair_api.connect("X32", ip=host, port=port, connect_timeout=5) as mixer:
+            start = time.perf_counter()
+            _, errors = sequential_snapshot(mixer)
+            print(f"sequential  {(time.perf_counter() - start) * 1000:.0f} ms (xair_api reads), "
+                  f"{errors} channels with bad replies")
+
+        start = time.perf_counter()
+        scene, failed = take_snapshot(host, port, window=args.window)
+        print(f"snapshot    {(time.perf_counter() - start) * 1000:.0f} ms, "
+              f"{len(scene)} values, {len(failed)} failed")
+
+        for address in scene:
+            if address.endswith("mix/fader"):
+                scene[address] = 0.5
+        start = time.perf_counter()
+        confirmed, failed = restore_snapshot(host, scene, port, window=args.window)
+        print(f"restore     {(time.perf_counter() - start) * 1000:.0f} ms, "
+              f"{len(confirmed)} confirmed, {len(failed)} failed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scene.x32s")
+        save_scene(path, scene)
+        start = time.perf_counter()
+        for _ in range(1000):
+            loaded = load_scene(path)
+        per = (time.perf_counter() - start) / 1000
+        print(f"file        {os.path.getsize(path)} bytes, load {per * 1e6:.0f} us, "
+              f"round trip {'ok' if loaded == scene else 'MISMATCH'}")
+
+        # longer than NAME_SIZE bytes, the cut falls inside the "Ü"
+        name_address = snapshot_addresses(1)[2]
+        long_name = "Kontrabaß ÜÖ"
+        save_scene(path, {name_address: long_name}, channels=1)
+        stored = load_scene(path)[name_address]
+        name_ok = long_name.startswith(stored) and len(stored.encode("utf-8")) <= NAME_SIZE
+        print(f"long name   {long_name!r} stored as {stored!r}: {'ok' if name_ok else 'BAD'}")
+    if loaded != scene or not name_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Startup time of x32_app against the local X32 emulator.
+
+  importtime   python -X importtime: total import time and the slowest top
+               level imports of each mode; the headless mode must not load
+               Qt, xair_api, numpy or smbus3 at all
+  ready        wall time from spawning the process to the first rendered
+               frame (GUI, offscreen Qt) or a seeded state cache (headless),
+               median of --runs
+
+Exits with status 1 if a median is over its threshold or headless imports one
+of those modules, so it can gate changes.
+
+Usage: python bench_startup.py [--runs 5] [--max-gui 1.5] [--max-headless 0.5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from x32_emulator import X32Emulator
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "x32_app.py")
+# never imported by the headless path
+HEADLESS_FORBIDDEN = ("PySide6", "xair_api", "numpy", "smbus3")
+
+
+def app_command(host, port, headless):
+    command = [sys.executable, APP, "--ip", host, "--port", str(port),
+               "--exit-when-ready", "--windowed", "--stats-file", ""]
+    if headless:
+        command.append("--headless")
+    return command
+
+
+def app_env():
+    env = dict(os.environ)
+    env["QT_QPA_PLATFORM"] = "offscreen"
+    return env
+
+
+def parse_importtime(stderr):
+    """-> list of (module, self_us, cumulative_us, depth) from -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative), depth))
+    return imports
+
+
+def importtime(host, port, headless):
+    command = app_command(host, port, headless)
+    command[1:1] = ["-X", "importtime"]
+    result = subprocess.run(command, env=app_env(), capture_output=True, text=True, timeout=60)
+    return parse_importtime(result.stderr)
+
+
+def time_to_ready(host, port, headless):
+    start = time.perf_counter()
+    process = subprocess.Popen(app_command(host, port, headless), env=app_env(),
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    elapsed = None
+    for line in process.stdout:
+        if line.startswith("ready") and elapsed is None:
+            elapsed = time.perf_counter() - start
+    process.wait(timeout=30)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="x32_app startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-gui", type=float, default=1.5, help="first frame threshold (s)")
+    parser.add_argument("--max-headless", type=float, default=0.5, help="headless ready threshold (s)")
+    parser.add_argument("--top", type=int, default=6, help="slowest imports to list")
+    args = parser.parse_args()
+
+    failed = False
+    with X32Emulator() as emulator:
+        host, port = emulator.host, emulator.port
+        for mode, headless, limit in (("gui", False, args.max_gui),
+                                      ("headless", True, args.max_headless)):
+            imports = importtime(host, port, headless)
+            total = sum(self_us for _, self_us, _, _ in imports)
+            print(f"{mode:8s} imports {len(imports)} modules, {total / 1000:.0f} ms")
+            top = sorted((i for i in imports if i[3] == 0), key=lambda i: -i[2])[:args.top]
+            for name, _, cumulative, _ in top:
+                print(f"           {cumulative / 1000:7.1f} ms  {name}")
+            if headless:
+                loaded = sorted({name.split(".")[0] for name, _, _, _ in imports} & set(HEADLESS_FORBIDDEN))
+                if loaded:
+                    print(f"FAIL: headless imported {', '.join(loaded)}")
+                    failed = True
+
+            times = [time_to_ready(host, port, headless) for _ in range(args.runs)]
+            if None in times:
+                print(f"FAIL: {mode} never became ready")
+                failed = True
+                continue
+            median = statistics.median(times)
+            print(f"         ready median {median * 1000:.0f} ms, min {min(times) * 1000:.0f} ms, "
+                  f"max {max(times) * 1000:.0f} ms (limit {limit * 1000:.0f} ms)")
+            if median > limit:
+                print(f"FAIL: {mode} startup over the limit")
+                failed = True
+
+    print("FAIL" if failed else "OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
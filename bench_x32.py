@@ -0,0 +1,183 @@
+"""Latency/throughput benchmarks against the local X32 emulator.
+
+Measures the mixer paths the app uses:
+
+  raw query     one OSC query and its reply on a bare UDP socket
+  xair read     mixer.strip[8].mix.fader (xair_api query, includes its fixed delay)
+  xair write    mixer.strip[8].mix.fader = db, sustained, counted at the emulator
+  coalesced     the same writes through CoalescingWriter
+  push          xair_api write until X32Subscription sees it via /xremote
+  bulk read     every channel/bus parameter through osc_bulk.BulkQuery
+
+Usage: python bench_x32.py [--latency 0.005] [--loss 0.01] [--count 200]
+"""
+import argparse
+import socket
+import statistics
+import time
+
+import xair_api
+
+from osc_bulk import BulkQuery
+from write_behind import CoalescingWriter
+from x32_emulator import X32Emulator, build_message, default_parameters
+from x32_subscription import X32Subscription, strip_address
+
+FADER = strip_address(8, "mix/fader")
+
+
+def percentiles(samples) -> dict:
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))]
+
+    return {
+        "n": len(ordered),
+        "p50": pct(50),
+        "p90": pct(90),
+        "p99": pct(99),
+        "max": ordered[-1],
+        "mean": statistics.fmean(ordered),
+    }
+
+
+def report(name, result, unit="ms", scale=1000.0):
+    if result.get("n", 0) == 0:
+        print(f"{name:12s} no samples")
+        return
+    parts = [f"n={result['n']}"]
+    for key in ("p50", "p90", "p99", "max", "mean"):
+        parts.append(f"{key}={result[key] * scale:.2f}{unit}")
+    print(f"{name:12s} " + " ".join(parts))
+
+
+def bench_raw_query(emulator, count, timeout=0.5):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(timeout)
+    query = build_message(FADER)
+    samples = []
+    lost = 0
+    for _ in range(count):
+        start = time.perf_counter()
+        sock.sendto(query, (emulator.host, emulator.port))
+        try:
+            sock.recvfrom(4096)
+        except socket.timeout:
+            lost += 1
+            continue
+        samples.append(time.perf_counter() - start)
+    sock.close()
+    return percentiles(samples), lost
+
+
+def bench_xair_read(mixer, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        mixer.strip[8].mix.fader
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def sweep(count):
+    # fader swipe from -60 dB to +10 dB
+    return [-60.0 + 70.0 * i / max(1, count - 1) for i in range(count)]
+
+
+def bench_xair_write(mixer, emulator, count):
+    before = emulator.writes
+    start = time.perf_counter()
+    for db in sweep(count):
+        mixer.strip[8].mix.fader = db
+    elapsed = time.perf_counter() - start
+    time.sleep(0.1 + emulator.latency)
+    return count / elapsed, emulator.writes - before
+
+
+def bench_coalesced_write(mixer, emulator, count, max_rate=50.0):
+    before = emulator.writes
+
+    def send(db):
+        mixer.strip[8].mix.fader = db
+
+    start = time.perf_counter()
+    with CoalescingWriter(max_rate) as writer:
+        for db in sweep(count):
+            writer.write(FADER, db, send)
+        submit_elapsed = time.perf_counter() - start
+    time.sleep(0.1 + emulator.latency)
+    return count / submit_elapsed, writer.stats(), emulator.writes - before
+
+
+def bench_push(mixer, emulator, count):
+    samples = []
+    with X32Subscription(emulator.host, emulator.port) as state:
+        time.sleep(0.05 + emulator.latency)
+        for db in sweep(count):
+            version = state.version
+            start = time.perf_counter()
+            mixer.strip[8].mix.fader = db
+            deadline = start + 0.5 + 2 * emulator.latency
+            while state.version == version and time.perf_counter() < deadline:
+                time.sleep(0.0002)
+            if state.version != version:
+                samples.append(time.perf_counter() - start)
+    return percentiles(samples), count - len(samples)
+
+
+def bench_bulk(emulator, window=32):
+    addresses = sorted(default_parameters())
+    bulk = BulkQuery(emulator.host, emulator.port, window)
+    start = time.perf_counter()
+    latencies = []
+    failed = 0
+    for reply in bulk.iter(addresses):
+        if reply.ok:
+            latencies.append(reply.latency)
+        else:
+            failed += 1
+    elapsed = time.perf_counter() - start
+    return len(addresses), elapsed, failed, bulk.resent, percentiles(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="X32 OSC latency/throughput benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="injected reply delay (s)")
+    parser.add_argument("--loss", type=float, default=0.0, help="injected packet loss 0..1")
+    parser.add_argument("--count", type=int, default=200, help="samples per benchmark")
+    args = parser.parse_args()
+
+    with X32Emulator(latency=args.latency, loss=args.loss, seed=1) as emulator:
+        print(f"emulator on port {emulator.port}, latency {args.latency * 1000:.1f} ms, "
+              f"loss {args.loss * 100:.1f}%")
+
+        result, lost = bench_raw_query(emulator, args.count)
+        report("raw query", result)
+        print(f"{'':12s} lost={lost}")
+
+        with xair_api.connect("X32", ip=emulator.host, port=emulator.port,
+                              connect_timeout=5) as mixer:
+            report("xair read", bench_xair_read(mixer, args.count))
+
+            rate, arrived = bench_xair_write(mixer, emulator, args.count)
+            print(f"{'xair write':12s} {rate:.0f} writes/s, {arrived}/{args.count} arrived")
+
+            rate, stats, arrived = bench_coalesced_write(mixer, emulator, args.count)
+            print(f"{'coalesced':12s} {rate:.0f} submits/s, sent={stats['sent']} "
+                  f"coalesced={stats['coalesced']}, {arrived} arrived")
+
+            result, missed = bench_push(mixer, emulator, min(args.count, 100))
+            report("push", result)
+            print(f"{'':12s} missed={missed}")
+
+        count, elapsed, failed, resent, result = bench_bulk(emulator)
+        print(f"{'bulk read':12s} {count} parameters in {elapsed * 1000:.0f} ms "
+              f"({count / elapsed:.0f} reads/s), failed={failed} resent={resent}")
+        report("", result)
+
+
+if __name__ == "__main__":
+    main()
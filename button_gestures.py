@@ -0,0 +1,104 @@
+"""Press, release, double press and long press from encoder snapshots.
+
+The SEN0502 key status register is a latch that is set on every button edge
+(down and up) and cleared by the driver after each read, so every snapshot
+with key == 1 is one edge. ButtonGestures is a small state machine fed with
+(key, timestamp) for every poll; timestamps are time.monotonic() values like
+EncoderState.timestamp, so detection does not depend on when it is called.
+
+  PRESS         button went down
+  RELEASE       button went up
+  DOUBLE_PRESS  second press within double_press s of a short click's release
+  LONG_PRESS    button held for long_press s (once per hold, while still down)
+
+Two edges between polls read as one, which leaves the machine out of step
+with the button: a quick click merged into one edge looks like a press that
+never ends. A press that sees no edge for release_timeout (only possible
+when that is below long_press), or a long press that sees none for
+held_timeout, is taken as a missed release and reset. held_timeout is much
+longer than release_timeout because a long press can really be held for a
+while; a real hold past it is reset too, and its release edge then reads
+as a press.
+"""
+from collections import namedtuple
+
+# gesture kinds
+PRESS = "press"
+RELEASE = "release"
+DOUBLE_PRESS = "double_press"
+LONG_PRESS = "long_press"
+
+## kind: one of the above, timestamp: monotonic time the gesture happened
+## (the snapshot that showed it, or the moment a hold became long)
+GestureEvent = namedtuple("GestureEvent", ["kind", "timestamp"])
+
+LONG_PRESS_TIME = 0.6
+DOUBLE_PRESS_TIME = 0.35
+RELEASE_TIMEOUT = 2.0
+HELD_TIMEOUT = 5.0
+
+# machine states
+_UP = 0
+_DOWN = 1
+_HELD = 2
+
+_NONE = ()
+
+
+class ButtonGestures:
+    """Gesture state of one encoder button."""
+
+    __slots__ = ("long_press", "double_press", "release_timeout", "held_timeout",
+                 "state", "down_time", "last_click", "presses", "timeouts")
+
+    def __init__(self, long_press=LONG_PRESS_TIME, double_press=DOUBLE_PRESS_TIME,
+                 release_timeout=RELEASE_TIMEOUT, held_timeout=HELD_TIMEOUT):
+        self.long_press = long_press
+        self.double_press = double_press
+        # for presses not long yet and for long presses; None disables them
+        self.release_timeout = release_timeout
+        self.held_timeout = held_timeout
+        self.state = _UP
+        self.down_time = 0.0
+        # release time of the last short press, for double presses
+        self.last_click = None
+        self.presses = 0
+        self.timeouts = 0
+
+    @property
+    def down(self) -> bool:
+        return self.state != _UP
+
+    def update(self, key, timestamp):
+        """Feed one snapshot; returns the gestures it completes (usually none)."""
+        if key == 1:
+            if self.state == _UP:
+                self.state = _DOWN
+                self.down_time = timestamp
+                self.presses += 1
+                last_click, self.last_click = self.last_click, None
+                if last_click is not None and timestamp - last_click <= self.double_press:
+                    return [GestureEvent(PRESS, timestamp), GestureEvent(DOUBLE_PRESS, timestamp)]
+                return [GestureEvent(PRESS, timestamp)]
+            # only a short press can start a double press
+            self.last_click = timestamp if self.state == _DOWN else None
+            self.state = _UP
+            return [GestureEvent(RELEASE, timestamp)]
+
+        if self.state == _UP:
+            return _NONE
+        held = timestamp - self.down_time
+        if self.state == _DOWN:
+            if held >= self.long_press:
+                self.state = _HELD
+                return [GestureEvent(LONG_PRESS, self.down_time + self.long_press)]
+            timeout = self.release_timeout
+        else:
+            timeout = self.held_timeout
+        if timeout is not None and held > timeout:
+            # a release edge was merged with another one and lost
+            self.state = _UP
+            self.last_click = None
+            self.timeouts += 1
+            return [GestureEvent(RELEASE, timestamp)]
+        return _NONE
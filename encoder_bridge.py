@@ -0,0 +1,272 @@
+"""Headless bridge: DFRobot rotary encoders drive X32 strip parameters.
+
+Runs on the Pi without the GUI. Each encoder is bound to a strip parameter
+(fader, pan or a bus send level). Fader and send level deltas are converted
+to dB through the fader law (DB_PER_COUNT per encoder count, so a detent
+moves the same number of dB anywhere on the travel), pan moves in 101
+linear positions, and a message is only sent when the quantized value
+actually changes. Pressing an encoder's button toggles the strip's mute.
+
+Latency from the I2C read to the OSC datagram leaving is measured for every
+send. Budget: LATENCY_BUDGET after the read, so knob-to-OSC stays under one
+poll period plus LATENCY_BUDGET (25 ms at the default 50 Hz poll rate).
+
+With --split the I2C polling runs in its own process (encoder_shm) and this
+process only reads the shared memory block, so a busy interpreter here (GUI,
+OSC) cannot delay the encoder reads.
+
+Usage: python encoder_bridge.py [--ip 192.168.20.226] [--port 10023] [--bus 1] [--split]
+"""
+import argparse
+import collections
+import logging
+import time
+from collections import namedtuple
+from functools import partial
+
+from DFRobot_VisualRotaryEncoder import DFRobot_VisualRotaryEncoder
+from encoder_scheduler import EncoderScheduler, ROTATION, BUTTON
+from encoder_shm import ENCODER_CENTER, RECENTER_MARGIN, EncoderReader, start_acquisition
+from fader_law import DB_CEIL, DB_FLOOR, FADER_MAX_STEP, db_to_fader, fader_to_db, fader_to_step
+from x32_subscription import X32Subscription, X32_PORT, channel_address
+
+logger = logging.getLogger(__name__)
+
+## i2c_addr: encoder address, kind/index: strip ("ch"/"bus", 0 based),
+## param: "fader", "pan" or "send/NN" (level of the send to bus NN)
+Binding = namedtuple("Binding", ["i2c_addr", "kind", "index", "param"])
+
+# seconds from I2C read to OSC send
+LATENCY_BUDGET = 0.005
+# how often --split mode reads the shared encoder block (s)
+SPLIT_READ_INTERVAL = 0.002
+# fader and send level change per encoder count; at the gain of 51 set by
+# make_encoders() one detent is about 1 dB
+DB_PER_COUNT = 0.02
+# pan positions, and how far one encoder count moves the pan
+PAN_POSITIONS = 101
+PAN_PER_COUNT = (PAN_POSITIONS - 1) / FADER_MAX_STEP
+
+# default knobs: ch 9 fader and pan
+bindings = [
+    Binding(0x54, "ch", 8, "fader"),
+    Binding(0x55, "ch", 8, "pan"),
+]
+
+
+def binding_address(binding) -> str:
+    if binding.param == "fader":
+        return channel_address(binding.kind, binding.index, "mix/fader")
+    if binding.param == "pan":
+        return channel_address(binding.kind, binding.index, "mix/pan")
+    if binding.param.startswith("send/"):
+        bus = int(binding.param[5:])
+        return channel_address(binding.kind, binding.index, f"mix/{bus:02d}/level")
+    raise ValueError(f"unknown parameter {binding.param!r}")
+
+
+class _Control:
+    __slots__ = ("binding", "address", "mute_address", "pan", "residual", "last_count")
+
+    def __init__(self, binding):
+        self.binding = binding
+        self.address = binding_address(binding)
+        self.mute_address = channel_address(binding.kind, binding.index, "mix/on")
+        self.pan = binding.param == "pan"
+        # part of a move carried over between events (pan positions or dB)
+        self.residual = 0.0
+        self.last_count = None
+
+
+class EncoderBridge:
+    """Turns EncoderScheduler events into OSC writes on an X32Subscription.
+
+    Pass handle as the scheduler callback; encoder i of the scheduler maps
+    to bindings[i]. Call seed() with the encoders' counts before the first
+    event, otherwise the first ROTATION of each encoder only sets its
+    reference count and that turn is lost.
+    """
+
+    def __init__(self, state, bindings, budget=LATENCY_BUDGET):
+        self.state = state
+        self.budget = budget
+        self._controls = [_Control(binding) for binding in bindings]
+        # recent latencies (s), for percentiles
+        self.latencies = collections.deque(maxlen=1000)
+        self.sent = 0
+        self.skipped = 0
+        self.over_budget = 0
+        self.max_latency = 0.0
+
+    @property
+    def addresses(self):
+        """Addresses the bridge reads, for seeding the state cache."""
+        result = []
+        for control in self._controls:
+            result += [control.address, control.mute_address]
+        return result
+
+    def seed(self, counts):
+        """Reference count per encoder (same order as bindings) to take deltas from."""
+        for control, count in zip(self._controls, counts):
+            control.last_count = count
+
+    def handle(self, event, encoder=None):
+        """Scheduler callback. encoder is used to re-center it near its end stops."""
+        control = self._controls[event.encoder]
+        if event.kind == ROTATION:
+            self._rotate(control, event, encoder)
+        elif event.kind == BUTTON and event.value:
+            on = self.state.get(control.mute_address, 1)
+            self._send(control.mute_address, 0 if on else 1, event.timestamp)
+
+    def _rotate(self, control, event, encoder):
+        count = event.value
+        if control.last_count is None:
+            control.last_count = count
+            return
+        delta = count - control.last_count
+        control.last_count = count
+        if encoder is not None and not RECENTER_MARGIN <= count <= 1023 - RECENTER_MARGIN:
+            encoder.set_encoder_value(ENCODER_CENTER)
+            control.last_count = ENCODER_CENTER
+
+        current = self.state.get(control.address)
+        if current is None:
+            # not seeded yet, nothing sensible to move from
+            return
+        if control.pan:
+            top = PAN_POSITIONS - 1
+            position = int(round(min(max(current, 0.0), 1.0) * top))
+            moved = control.residual + delta * PAN_PER_COUNT
+            target = min(max(position + int(moved), 0), top)
+            control.residual = moved - int(moved)
+            changed = target != position
+            value = target / top
+        else:
+            # nearest console step to the wanted dB; what is left over of the
+            # move (less than half a step) carries to the next event
+            wanted = min(max(fader_to_db(current) + control.residual + delta * DB_PER_COUNT,
+                             DB_FLOOR), DB_CEIL)
+            value = db_to_fader(wanted)
+            control.residual = wanted - fader_to_db(value)
+            changed = fader_to_step(value) != fader_to_step(current)
+        if not changed:
+            self.skipped += 1
+            return
+        self._send(control.address, value, event.timestamp)
+
+    def _send(self, address, value, timestamp):
+        self.state.set(address, value)
+        latency = time.monotonic() - timestamp
+        self.sent += 1
+        self.latencies.append(latency)
+        if latency > self.max_latency:
+            self.max_latency = latency
+        if latency > self.budget:
+            self.over_budget += 1
+            logger.warning("%s sent %.1f ms after read (budget %.1f ms)",
+                           address, latency * 1000, self.budget * 1000)
+
+    def stats(self) -> dict:
+        ordered = sorted(self.latencies)
+
+        def pct(p):
+            return ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))] if ordered else 0.0
+
+        return {
+            "sent": self.sent,
+            "skipped": self.skipped,
+            "over_budget": self.over_budget,
+            "p50": pct(50),
+            "p99": pct(99),
+            "max": self.max_latency,
+        }
+
+
+def run(state, encoders, bindings, rate):
+    bridge = EncoderBridge(state, bindings)
+    state.watch(*bridge.addresses)
+    bridge.seed([encoder.get_encoder_value() for encoder in encoders])
+
+    def callback(event):
+        bridge.handle(event, encoders[event.encoder])
+
+    with EncoderScheduler(encoders, rate=rate, callback=callback) as scheduler:
+        try:
+            while True:
+                time.sleep(5)
+                stats = bridge.stats()
+                print(f"sent {stats['sent']}, unchanged {stats['skipped']}, "
+                      f"latency p50 {stats['p50'] * 1000:.2f} ms p99 {stats['p99'] * 1000:.2f} ms, "
+                      f"over budget {stats['over_budget']}")
+        except KeyboardInterrupt:
+            pass
+    return bridge, scheduler
+
+
+def run_split(state, bus, bindings, rate, read_interval=SPLIT_READ_INTERVAL):
+    """Like run(), with the I2C polling in a separate process (encoder_shm)."""
+    bridge = EncoderBridge(state, bindings)
+    state.watch(*bridge.addresses)
+    process, block, stop = start_acquisition(partial(make_encoders, bus), len(bindings), rate)
+    try:
+        # the block is all zeros until the acquisition process has published
+        # every encoder once; deltas are taken from those first positions
+        while any(block.read(i).seq == 0 for i in range(block.slots)):
+            if not process.is_alive():
+                raise RuntimeError("encoder acquisition process exited")
+            time.sleep(read_interval)
+        reader = EncoderReader(block)
+        bridge.seed(reader.positions)
+        next_report = time.monotonic() + 5
+        while process.is_alive():
+            # no encoder: the acquisition process re-centers them itself
+            for event in reader.events():
+                bridge.handle(event)
+            if time.monotonic() >= next_report:
+                next_report += 5
+                stats = bridge.stats()
+                print(f"sent {stats['sent']}, unchanged {stats['skipped']}, "
+                      f"latency p50 {stats['p50'] * 1000:.2f} ms p99 {stats['p99'] * 1000:.2f} ms, "
+                      f"over budget {stats['over_budget']}")
+            time.sleep(read_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        process.join()
+        block.close()
+        block.unlink()
+    return bridge
+
+
+def make_encoders(bus):
+    """One encoder per binding, centered."""
+    encoders = []
+    for binding in bindings:
+        encoder = DFRobot_VisualRotaryEncoder(i2c_addr=binding.i2c_addr, bus=bus, gain_coefficient=51)
+        encoder.set_encoder_value(ENCODER_CENTER)
+        encoders.append(encoder)
+    return encoders
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encoder to X32 bridge")
+    parser.add_argument("--ip", default="192.168.20.226")
+    parser.add_argument("--port", type=int, default=X32_PORT)
+    parser.add_argument("--bus", type=int, default=1, help="I2C bus number")
+    parser.add_argument("--rate", type=float, default=50.0, help="encoder poll rate (Hz)")
+    parser.add_argument("--split", action="store_true",
+                        help="poll the encoders in a separate process (shared memory)")
+    args = parser.parse_args()
+
+    with X32Subscription(args.ip, args.port) as state:
+        if args.split:
+            run_split(state, args.bus, bindings, args.rate)
+        else:
+            run(state, make_encoders(args.bus), bindings, args.rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Background polling of several DFRobot_VisualRotaryEncoder instances.
+
+One thread polls every encoder at its own fixed rate and sleeps until the
+next poll is due, so CPU use scales with the poll rate instead of spinning.
+Encoders due at the same time on one SharedBus are read in a single locked
+bus pass.
+Changes are delivered as EncoderEvent tuples to a thread-safe queue and/or a
+callback (called from the polling thread).
+"""
+import logging
+import math
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from button_gestures import PRESS, RELEASE
+from perf_stats import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# the driver's register read histogram; batched reads bypass _read_reg
+_i2c_read_stats = REGISTRY.histogram("i2c_read")
+
+# event kinds, plus DOUBLE_PRESS and LONG_PRESS (import those from button_gestures)
+ROTATION = "rotation"
+BUTTON = "button"
+
+## encoder: index into the scheduler's encoder list
+## kind: ROTATION (value = new count), BUTTON (value = True on press, False on
+## release), DOUBLE_PRESS or LONG_PRESS (value = True)
+## timestamp: monotonic time of the snapshot (or of the hold becoming long)
+EncoderEvent = namedtuple("EncoderEvent", ["encoder", "kind", "value", "timestamp"])
+
+DEFAULT_POLL_RATE = 50.0
+
+
+class _Device:
+    __slots__ = ("encoder", "interval", "next_due", "last_count",
+                 "polls", "errors", "late_sum", "late_sq_sum", "late_max", "started")
+
+    def __init__(self, encoder, rate):
+        self.encoder = encoder
+        self.interval = 1.0 / rate
+        self.next_due = 0.0
+        self.last_count = None
+        self.polls = 0
+        self.errors = 0
+        self.late_sum = 0.0
+        self.late_sq_sum = 0.0
+        self.late_max = 0.0
+        self.started = 0.0
+
+
+class EncoderScheduler:
+    """Polls encoders on one background thread.
+
+    rate is the poll rate in Hz for every encoder, rates optionally gives a
+    per-encoder rate instead. Encoders with adaptive polling enabled set their
+    own rate. Events go to self.events (a queue.Queue) and, if given, to
+    callback(event).
+    """
+
+    def __init__(self, encoders, rate=DEFAULT_POLL_RATE, rates=None, callback=None):
+        if rates is None:
+            rates = [rate] * len(encoders)
+        self._devices = [_Device(enc, r) for enc, r in zip(encoders, rates)]
+        self.callback = callback
+        self.events = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.stop()
+
+    @property
+    def encoders(self):
+        return [dev.encoder for dev in self._devices]
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        now = time.monotonic()
+        for dev in self._devices:
+            dev.next_due = now
+            dev.started = now
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        """Per encoder: achieved poll rate (Hz) and scheduling jitter (s).
+
+        Jitter is how late each poll started relative to its slot: mean,
+        standard deviation and maximum.
+        """
+        now = time.monotonic()
+        result = []
+        for dev in self._devices:
+            n = dev.polls
+            mean = dev.late_sum / n if n else 0.0
+            var = dev.late_sq_sum / n - mean * mean if n else 0.0
+            elapsed = now - dev.started
+            result.append({
+                "target_rate": 1.0 / dev.interval,
+                "rate": n / elapsed if elapsed > 0 else 0.0,
+                "polls": n,
+                "errors": dev.errors,
+                "jitter_mean": mean,
+                "jitter_std": math.sqrt(max(0.0, var)),
+                "jitter_max": dev.late_max,
+            })
+        return result
+
+    def _emit(self, event):
+        self.events.put(event)
+        if self.callback is not None:
+            self.callback(event)
+
+    def _poll(self, index, dev, now, data=None):
+        # data: block already read for this encoder in a batched bus pass
+        late = now - dev.next_due
+        dev.polls += 1
+        dev.late_sum += late
+        dev.late_sq_sum += late * late
+        if late > dev.late_max:
+            dev.late_max = late
+
+        encoder = dev.encoder
+        try:
+            if isinstance(data, OSError):
+                raise data
+            state = encoder.read_state() if data is None else encoder.state_from_block(data)
+        except OSError:
+            state = None
+            dev.errors += 1
+            logger.warning("encoder %d read failed", index)
+
+        if getattr(encoder, "adaptive", False):
+            # the encoder picks its own fast/idle interval from activity
+            dev.interval = encoder.poll_interval
+        dev.next_due += dev.interval
+        if dev.next_due < now:
+            # fell behind by more than a period; skip missed slots instead of bursting
+            dev.next_due = now + dev.interval
+        if state is None:
+            return
+        gestures = encoder.handle_sensor(state)
+        if state.count != dev.last_count:
+            if dev.last_count is not None:
+                self._emit(EncoderEvent(index, ROTATION, state.count, state.timestamp))
+            dev.last_count = state.count
+        for gesture in gestures:
+            if gesture.kind == PRESS or gesture.kind == RELEASE:
+                self._emit(EncoderEvent(index, BUTTON, gesture.kind == PRESS, gesture.timestamp))
+            else:
+                self._emit(EncoderEvent(index, gesture.kind, True, gesture.timestamp))
+
+    def _batched_reads(self, due):
+        # read every due encoder that sits on a SharedBus in one locked pass
+        # per bus; returns {index: data}
+        by_bus = {}
+        for index, dev in due:
+            bus = getattr(dev.encoder, "_i2c", None)
+            if hasattr(bus, "transaction") and hasattr(dev.encoder, "state_read_request"):
+                by_bus.setdefault(id(bus), (bus, []))[1].append(index)
+        blocks = {}
+        for bus, indexes in by_bus.values():
+            if len(indexes) < 2:
+                continue
+            requests = [self._devices[i].encoder.state_read_request() for i in indexes]
+            start = time.perf_counter()
+            results = bus.transaction(requests)
+            # one sample per encoder read, each its share of the bus pass
+            share = (time.perf_counter() - start) / len(requests)
+            for _ in requests:
+                _i2c_read_stats.record(share)
+            blocks.update(zip(indexes, results))
+        return blocks
+
+    def _run(self):
+        devices = self._devices
+        while not self._stop.is_set():
+            now = time.monotonic()
+            due = [(index, dev) for index, dev in enumerate(devices) if dev.next_due <= now]
+            blocks = self._batched_reads(due) if len(due) > 1 else {}
+            for index, dev in due:
+                self._poll(index, dev, time.monotonic(), blocks.get(index))
+            next_due = None
+            for dev in devices:
+                if next_due is None or dev.next_due < next_due:
+                    next_due = dev.next_due
+            if next_due is None:
+                break
+            delay = next_due - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
@@ -0,0 +1,284 @@
+"""Encoder snapshots shared between processes.
+
+I2C polling and Qt painting fight over the GIL when they run in one
+interpreter. In split mode an acquisition process polls the encoders
+(EncoderScheduler) and publishes every change into a fixed layout
+multiprocessing.shared_memory block; the GUI and OSC processes read it with
+struct.unpack_from, no pickling and no queue in between.
+
+Layout (little endian): header "X32E", version (u16), slot count (u16), then
+one 40 byte slot per encoder:
+
+  seq        u32  seqlock: odd while the slot is being written
+  position   i32  cumulative count; re-centering the encoder does not show
+  down       u8   button is held
+  presses, releases, double_presses, long_presses   u32 each, running totals
+  timestamp  f64  time.monotonic() of the change (system wide on Linux)
+
+There is a single writer per block. Readers retry while seq is odd or
+changed during the read, so they never see a half written slot and never
+block the writer. Counters rather than flags mean a reader that polls
+slower than the writer still sees every press.
+
+Usage: python encoder_shm.py [--bus 1] [--rate 100] [--name x32_encoders]
+       (publishes the encoder_bridge bindings for encoder_bridge.py --split)
+"""
+import argparse
+import multiprocessing
+import struct
+import threading
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+from button_gestures import DOUBLE_PRESS, LONG_PRESS
+from encoder_scheduler import EncoderEvent, EncoderScheduler, ROTATION, BUTTON, DEFAULT_POLL_RATE
+
+MAGIC = b"X32E"
+VERSION = 1
+DEFAULT_NAME = "x32_encoders"
+_HEADER = struct.Struct("<4sHH")
+_SEQ = struct.Struct("<I")
+_FIELDS = struct.Struct("<iB3xIIII4xd")
+SLOT_SIZE = _SEQ.size + _FIELDS.size
+
+# re-center an encoder this close to its end stops (counts)
+RECENTER_MARGIN = 128
+ENCODER_CENTER = 512
+
+EncoderSnapshot = namedtuple("EncoderSnapshot", ["position", "down", "presses", "releases",
+                                                 "double_presses", "long_presses", "timestamp",
+                                                 "seq"])
+
+
+class EncoderBlock:
+    """A shared memory block of encoder slots.
+
+    EncoderBlock.create(slots) makes a new block, EncoderBlock.attach(name)
+    opens an existing one (e.g. in another process).
+    """
+
+    def __init__(self, shm, slots):
+        self._shm = shm
+        self._buf = shm.buf
+        self.name = shm.name
+        self.slots = slots
+        # next seq per slot, only used by the writer
+        self._seq = [0] * slots
+        # counters
+        self.writes = 0
+        self.read_retries = 0
+
+    @classmethod
+    def create(cls, slots, name=None):
+        shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER.size + slots * SLOT_SIZE)
+        _HEADER.pack_into(shm.buf, 0, MAGIC, VERSION, slots)
+        return cls(shm, slots)
+
+    @classmethod
+    def attach(cls, name):
+        shm = shared_memory.SharedMemory(name=name)
+        magic, version, slots = _HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            shm.close()
+            raise ValueError(f"shared memory {name!r} is not an encoder block")
+        return cls(shm, slots)
+
+    def _offset(self, index):
+        if not 0 <= index < self.slots:
+            raise IndexError(f"encoder slot {index} out of range")
+        return _HEADER.size + index * SLOT_SIZE
+
+    def write(self, index, position, down, presses, releases, double_presses, long_presses, timestamp):
+        offset = self._offset(index)
+        seq = self._seq[index] + 1
+        _SEQ.pack_into(self._buf, offset, seq)  # odd: being written
+        _FIELDS.pack_into(self._buf, offset + _SEQ.size, position, down, presses, releases,
+                          double_presses, long_presses, timestamp)
+        self._seq[index] = seq + 1
+        _SEQ.pack_into(self._buf, offset, seq + 1)
+        self.writes += 1
+
+    def read(self, index) -> EncoderSnapshot:
+        offset = self._offset(index)
+        buf = self._buf
+        while True:
+            seq = _SEQ.unpack_from(buf, offset)[0]
+            if not seq & 1:
+                fields = _FIELDS.unpack_from(buf, offset + _SEQ.size)
+                if _SEQ.unpack_from(buf, offset)[0] == seq:
+                    return EncoderSnapshot(*fields, seq)
+            self.read_retries += 1
+
+    def close(self):
+        # memoryviews into the block must be gone before it can be closed
+        self._buf = None
+        self._shm.close()
+
+    def unlink(self):
+        self._shm.unlink()
+
+
+class _Slot:
+    __slots__ = ("encoder", "last_count", "position", "down",
+                 "presses", "releases", "double_presses", "long_presses")
+
+    def __init__(self, encoder, count):
+        self.encoder = encoder
+        self.last_count = count
+        self.position = count
+        self.down = 0
+        self.presses = 0
+        self.releases = 0
+        self.double_presses = 0
+        self.long_presses = 0
+
+
+class EncoderPublisher:
+    """EncoderScheduler callback that writes every change into an EncoderBlock.
+
+    Runs in the acquisition process, the only one that talks to the bus, so
+    it also re-centers encoders near their end stops (recenter=True).
+    """
+
+    def __init__(self, block, encoders, recenter=True):
+        self.block = block
+        self.recenter = recenter
+        self._slots = [_Slot(encoder, encoder.get_encoder_value()) for encoder in encoders]
+        for index in range(len(self._slots)):
+            self._publish(index, time.monotonic())
+
+    def handle(self, event):
+        slot = self._slots[event.encoder]
+        if event.kind == ROTATION:
+            slot.position += event.value - slot.last_count
+            slot.last_count = event.value
+            if self.recenter and not RECENTER_MARGIN <= event.value <= 1023 - RECENTER_MARGIN:
+                slot.encoder.set_encoder_value(ENCODER_CENTER)
+                slot.last_count = ENCODER_CENTER
+        elif event.kind == BUTTON:
+            if event.value:
+                slot.presses += 1
+                slot.down = 1
+            else:
+                slot.releases += 1
+                slot.down = 0
+        elif event.kind == DOUBLE_PRESS:
+            slot.double_presses += 1
+        elif event.kind == LONG_PRESS:
+            slot.long_presses += 1
+        self._publish(event.encoder, event.timestamp)
+
+    def _publish(self, index, timestamp):
+        slot = self._slots[index]
+        self.block.write(index, slot.position, slot.down, slot.presses, slot.releases,
+                         slot.double_presses, slot.long_presses, timestamp)
+
+
+class EncoderReader:
+    """Turns changes in an EncoderBlock back into EncoderEvents.
+
+    ROTATION values are cumulative positions rather than raw counts, so
+    only deltas are meaningful, and the reader cannot re-center encoders.
+    """
+
+    def __init__(self, block):
+        self.block = block
+        self._last = [block.read(i) for i in range(block.slots)]
+
+    def read(self, index) -> EncoderSnapshot:
+        return self.block.read(index)
+
+    @property
+    def positions(self):
+        """Position of every encoder as of the last events() call."""
+        return [snap.position for snap in self._last]
+
+    def events(self):
+        """Events for everything that changed since the last call."""
+        events = []
+        for index, last in enumerate(self._last):
+            snap = self.block.read(index)
+            if snap.seq == last.seq:
+                continue
+            self._last[index] = snap
+            t = snap.timestamp
+            if snap.position != last.position:
+                events.append(EncoderEvent(index, ROTATION, snap.position, t))
+            presses = snap.presses - last.presses
+            releases = snap.releases - last.releases
+            down = bool(last.down)
+            while presses or releases:
+                # alternate, starting with whatever the last state allows
+                if presses and (not down or not releases):
+                    presses -= 1
+                    down = True
+                else:
+                    releases -= 1
+                    down = False
+                events.append(EncoderEvent(index, BUTTON, down, t))
+            for _ in range(snap.double_presses - last.double_presses):
+                events.append(EncoderEvent(index, DOUBLE_PRESS, True, t))
+            for _ in range(snap.long_presses - last.long_presses):
+                events.append(EncoderEvent(index, LONG_PRESS, True, t))
+        return events
+
+
+def acquisition_main(name, make_encoders, rate=DEFAULT_POLL_RATE, stop=None, recenter=True):
+    """Acquisition process body: poll make_encoders() into the block called name.
+
+    Runs until stop (a multiprocessing.Event) is set, or forever. Returns
+    the scheduler stats.
+    """
+    block = EncoderBlock.attach(name)
+    encoders = make_encoders()
+    publisher = EncoderPublisher(block, encoders, recenter)
+    try:
+        with EncoderScheduler(encoders, rate=rate, callback=publisher.handle) as scheduler:
+            if stop is None:
+                stop = threading.Event()
+            while not stop.wait(0.1):
+                pass
+        return scheduler.stats()
+    finally:
+        block.close()
+
+
+def start_acquisition(make_encoders, slots, rate=DEFAULT_POLL_RATE, name=None, recenter=True):
+    """Create a block and start acquisition_main in a child process.
+
+    make_encoders must be picklable (a module level function or a partial of
+    one). Returns (process, block, stop); set stop and join the process to
+    end it, then close and unlink the block.
+    """
+    block = EncoderBlock.create(slots, name)
+    stop = multiprocessing.Event()
+    process = multiprocessing.Process(target=acquisition_main, name="encoder-acquisition",
+                                      args=(block.name, make_encoders, rate, stop, recenter),
+                                      daemon=True)
+    process.start()
+    return process, block, stop
+
+
+def main():
+    # imported here so the module itself needs no hardware
+    from encoder_bridge import bindings, make_encoders
+
+    parser = argparse.ArgumentParser(description="Encoder acquisition process")
+    parser.add_argument("--bus", type=int, default=1, help="I2C bus number")
+    parser.add_argument("--rate", type=float, default=100.0, help="poll rate (Hz)")
+    parser.add_argument("--name", default=DEFAULT_NAME, help="shared memory block name")
+    args = parser.parse_args()
+
+    block = EncoderBlock.create(len(bindings), args.name)
+    try:
+        acquisition_main(block.name, lambda: make_encoders(args.bus), args.rate)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        block.close()
+        block.unlink()
+
+
+if __name__ == "__main__":
+    main()
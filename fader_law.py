@@ -0,0 +1,226 @@
+"""X32 fader law as precomputed lookup tables.
+
+The console stores a fader as one of 1024 steps of a 0..1 float and maps it
+to dB with a piecewise linear law (-90 dB at 0, +10 dB at 1). Everything here
+is quantized to those steps, so a value converted to dB and back lands on the
+same step, and what we display is exactly what the console shows.
+
+Scalar conversions are O(1) table lookups. The *_array variants convert
+whole scenes at once with NumPy (imported on first use, so the scalar path
+has no NumPy dependency).
+
+Run "python fader_law.py" to verify the round trips at every step.
+"""
+import math
+
+FADER_STEPS = 1024
+FADER_MAX_STEP = FADER_STEPS - 1
+DB_FLOOR = -90.0
+DB_CEIL = 10.0
+
+
+def _law_db(fader: float) -> float:
+    # X32 native law, fader 0..1 -> dB
+    if fader >= 0.5:
+        return fader * 40.0 - 30.0
+    elif fader >= 0.25:
+        return fader * 80.0 - 50.0
+    elif fader >= 0.0625:
+        return fader * 160.0 - 70.0
+    return fader * 480.0 - 90.0
+
+
+def _law_fader(db: float) -> float:
+    # inverse of _law_db, dB -> fader 0..1 (unquantized)
+    if db >= -10.0:
+        fader = (db + 30.0) / 40.0
+    elif db >= -30.0:
+        fader = (db + 50.0) / 80.0
+    elif db >= -60.0:
+        fader = (db + 70.0) / 160.0
+    else:
+        fader = (db + 90.0) / 480.0
+    return min(max(fader, 0.0), 1.0)
+
+
+## dB for every fader step, strictly increasing
+STEP_DB = tuple(_law_db(step / FADER_MAX_STEP) for step in range(FADER_STEPS))
+
+
+def fader_to_step(fader: float) -> int:
+    return int(round(min(max(fader, 0.0), 1.0) * FADER_MAX_STEP))
+
+
+def step_to_fader(step: int) -> float:
+    return step / FADER_MAX_STEP
+
+
+def db_to_step(db: float) -> int:
+    """Fader step whose dB value is nearest to db."""
+    step = fader_to_step(_law_fader(db))
+    # the inverse law can be off by one step at segment edges and through
+    # float rounding; settle on the nearest table entry
+    while step > 0 and abs(STEP_DB[step - 1] - db) < abs(STEP_DB[step] - db):
+        step -= 1
+    while step < FADER_MAX_STEP and abs(STEP_DB[step + 1] - db) < abs(STEP_DB[step] - db):
+        step += 1
+    return step
+
+
+def fader_to_db(fader: float) -> float:
+    """Raw console fader value (0..1) -> dB as the console displays it."""
+    return STEP_DB[fader_to_step(fader)]
+
+
+def db_to_fader(db: float) -> float:
+    """dB -> raw console fader value, quantized to a console step."""
+    return step_to_fader(db_to_step(db))
+
+
+def _step_db_array():
+    import numpy as np
+    global _STEP_DB_ARRAY
+    if _STEP_DB_ARRAY is None:
+        _STEP_DB_ARRAY = np.array(STEP_DB, dtype=np.float64)
+    return _STEP_DB_ARRAY
+
+
+_STEP_DB_ARRAY = None
+
+
+def fader_to_step_array(faders):
+    import numpy as np
+    faders = np.clip(np.asarray(faders, dtype=np.float64), 0.0, 1.0)
+    return np.rint(faders * FADER_MAX_STEP).astype(np.intp)
+
+
+def db_to_step_array(dbs):
+    """Vectorized db_to_step."""
+    import numpy as np
+    table = _step_db_array()
+    dbs = np.asarray(dbs, dtype=np.float64)
+    upper = np.clip(np.searchsorted(table, dbs), 1, FADER_MAX_STEP)
+    lower = upper - 1
+    nearer_lower = np.abs(table[lower] - dbs) <= np.abs(table[upper] - dbs)
+    return np.where(nearer_lower, lower, upper)
+
+
+def fader_to_db_array(faders):
+    return _step_db_array()[fader_to_step_array(faders)]
+
+
+def db_to_fader_array(dbs):
+    return db_to_step_array(dbs) / FADER_MAX_STEP
+
+
+class Taper:
+    """Slider position <-> console step mapping for a custom taper curve.
+
+    The default curve is the power curve the touch slider has always used:
+    db = db_min + frac ** gamma * (db_max - db_min). Each slider position is
+    pinned to a distinct console step, so slider -> dB -> slider is exact.
+    """
+
+    def __init__(self, slider_min=0, slider_max=100, gamma=0.25,
+                 db_min=DB_FLOOR, db_max=DB_CEIL, curve=None):
+        self.slider_min = slider_min
+        self.slider_max = slider_max
+        span = max(1, slider_max - slider_min)
+        if curve is None:
+            def curve(frac):
+                return db_min + frac ** gamma * (db_max - db_min)
+
+        steps = []
+        for position in range(slider_min, slider_max + 1):
+            step = db_to_step(curve((position - slider_min) / span))
+            if steps and step <= steps[-1]:
+                # keep positions distinct so every one round-trips
+                step = steps[-1] + 1
+            steps.append(step)
+        if steps[-1] > FADER_MAX_STEP:
+            raise ValueError("taper has more positions than the console has fader steps")
+        ## console step for every slider position
+        self.steps = tuple(steps)
+
+        # nearest slider position for every console step, split halfway
+        # (in dB) between neighbouring positions
+        positions = []
+        index = 0
+        for step in range(FADER_STEPS):
+            while (index + 1 < len(steps) and
+                   STEP_DB[step] - STEP_DB[steps[index]] > STEP_DB[steps[index + 1]] - STEP_DB[step]):
+                index += 1
+            positions.append(slider_min + index)
+        self.positions = tuple(positions)
+        self._steps_array = None
+        self._positions_array = None
+
+    def _clamp(self, value: int) -> int:
+        return min(max(int(value), self.slider_min), self.slider_max)
+
+    def slider_to_step(self, value: int) -> int:
+        return self.steps[self._clamp(value) - self.slider_min]
+
+    def step_to_slider(self, step: int) -> int:
+        return self.positions[min(max(step, 0), FADER_MAX_STEP)]
+
+    def slider_to_db(self, value: int) -> float:
+        return STEP_DB[self.slider_to_step(value)]
+
+    def db_to_slider(self, db: float) -> int:
+        if math.isnan(db):
+            return self.slider_min
+        return self.positions[db_to_step(db)]
+
+    def slider_to_fader(self, value: int) -> float:
+        return step_to_fader(self.slider_to_step(value))
+
+    def fader_to_slider(self, fader: float) -> int:
+        return self.positions[fader_to_step(fader)]
+
+    def _arrays(self):
+        import numpy as np
+        if self._steps_array is None:
+            self._steps_array = np.array(self.steps, dtype=np.intp)
+            self._positions_array = np.array(self.positions, dtype=np.intp)
+        return self._steps_array, self._positions_array
+
+    def slider_to_db_array(self, values):
+        import numpy as np
+        steps, _ = self._arrays()
+        values = np.clip(np.asarray(values, dtype=np.intp), self.slider_min, self.slider_max)
+        return _step_db_array()[steps[values - self.slider_min]]
+
+    def db_to_slider_array(self, dbs):
+        _, positions = self._arrays()
+        return positions[db_to_step_array(dbs)]
+
+    def fader_to_slider_array(self, faders):
+        _, positions = self._arrays()
+        return positions[fader_to_step_array(faders)]
+
+
+def _self_check():
+    import numpy as np
+
+    # native law: every step survives fader -> dB -> fader
+    for step in range(FADER_STEPS):
+        assert db_to_step(STEP_DB[step]) == step, step
+        assert fader_to_step(db_to_fader(fader_to_db(step_to_fader(step)))) == step, step
+    assert all(a < b for a, b in zip(STEP_DB, STEP_DB[1:]))
+    assert STEP_DB[0] == DB_FLOOR and STEP_DB[-1] == DB_CEIL
+    all_steps = np.arange(FADER_STEPS)
+    assert (db_to_step_array(fader_to_db_array(all_steps / FADER_MAX_STEP)) == all_steps).all()
+
+    # tapers: every slider position survives slider -> dB -> slider
+    for taper in (Taper(), Taper(0, 100, gamma=1.0), Taper(0, 1023, gamma=1.0), Taper(-50, 50, gamma=0.5)):
+        for position in range(taper.slider_min, taper.slider_max + 1):
+            assert taper.db_to_slider(taper.slider_to_db(position)) == position, position
+            assert taper.fader_to_slider(taper.slider_to_fader(position)) == position, position
+        positions = np.arange(taper.slider_min, taper.slider_max + 1)
+        assert (taper.db_to_slider_array(taper.slider_to_db_array(positions)) == positions).all()
+    print("fader law round trips OK")
+
+
+if __name__ == "__main__":
+    _self_check()
@@ -0,0 +1,232 @@
+"""Hardware-free SMBus backends for the encoder driver.
+
+FakeSMBus     a bus with simulated devices on it
+FakeSEN0502   register-level model of the DFRobot visual rotary encoder
+RecordingBus  wraps a real (or fake) bus and records every transaction
+ReplayBus     plays a recorded trace back to the driver, at the original
+              speed, accelerated, or as fast as possible
+
+All of them have the read_i2c_block_data/write_i2c_block_data interface of
+smbus3.SMBus, so they can be passed straight to DFRobot_VisualRotaryEncoder
+or used as a BusManager backend.
+"""
+import errno
+import json
+import time
+
+from DFRobot_VisualRotaryEncoder import (
+    VISUAL_ROTARY_ENCODER_ADDR_REG,
+    VISUAL_ROTARY_ENCODER_COUNT_LSB_REG,
+    VISUAL_ROTARY_ENCODER_COUNT_MSB_REG,
+    VISUAL_ROTARY_ENCODER_DEFAULT_I2C_ADDR,
+    VISUAL_ROTARY_ENCODER_GAIN_REG,
+    VISUAL_ROTARY_ENCODER_KEY_STATUS_REG,
+    VISUAL_ROTARY_ENCODER_PID,
+)
+
+SEN0502_VID = 0x3343
+SEN0502_VERSION = 0x0100
+COUNT_MAX = 0x3FF
+
+
+class FakeSEN0502:
+    """Register file of one SEN0502 encoder.
+
+    turn() and press()/release() simulate the user; the key status latch is
+    set on every button edge and cleared when 0 is written to it, like the
+    real module.
+    """
+
+    def __init__(self, i2c_addr=VISUAL_ROTARY_ENCODER_DEFAULT_I2C_ADDR, count=0, gain=1):
+        self.i2c_addr = i2c_addr
+        self.count = count
+        self.gain = gain
+        self.key = 0
+        self.pressed = False
+        self.reads = 0
+        self.writes = 0
+
+    def turn(self, detents: int):
+        """Rotate by detents (negative = counter clockwise); count moves by gain per detent."""
+        self.count = min(max(self.count + detents * self.gain, 0), COUNT_MAX)
+
+    def press(self):
+        self.pressed = True
+        self.key = 1
+
+    def release(self):
+        self.pressed = False
+        self.key = 1
+
+    def _register(self, register: int) -> int:
+        if register == 0x00:
+            return VISUAL_ROTARY_ENCODER_PID >> 8
+        if register == 0x01:
+            return VISUAL_ROTARY_ENCODER_PID & 0xFF
+        if register == 0x02:
+            return SEN0502_VID >> 8
+        if register == 0x03:
+            return SEN0502_VID & 0xFF
+        if register == 0x04:
+            return SEN0502_VERSION >> 8
+        if register == 0x05:
+            return SEN0502_VERSION & 0xFF
+        if register == VISUAL_ROTARY_ENCODER_ADDR_REG:
+            return self.i2c_addr
+        if register == VISUAL_ROTARY_ENCODER_COUNT_MSB_REG:
+            return self.count >> 8
+        if register == VISUAL_ROTARY_ENCODER_COUNT_LSB_REG:
+            return self.count & 0xFF
+        if register == VISUAL_ROTARY_ENCODER_KEY_STATUS_REG:
+            return self.key
+        if register == VISUAL_ROTARY_ENCODER_GAIN_REG:
+            return self.gain
+        return 0
+
+    def read(self, register, length):
+        self.reads += 1
+        return [self._register(register + i) for i in range(length)]
+
+    def write(self, register, data):
+        self.writes += 1
+        if register == VISUAL_ROTARY_ENCODER_COUNT_MSB_REG and len(data) >= 2:
+            value = (data[0] << 8) | data[1]
+            if value <= COUNT_MAX:
+                self.count = value
+        elif register == VISUAL_ROTARY_ENCODER_KEY_STATUS_REG:
+            self.key = data[0]
+        elif register == VISUAL_ROTARY_ENCODER_GAIN_REG:
+            if 1 <= data[0] <= 51:
+                self.gain = data[0]
+
+
+class FakeSMBus:
+    """Bus with simulated devices; speed (Hz) adds realistic wire time."""
+
+    def __init__(self, devices=(), speed=None):
+        self.speed = speed
+        self.devices = {}
+        self.transactions = 0
+        for device in devices:
+            self.add_device(device)
+
+    def add_device(self, device):
+        self.devices[device.i2c_addr] = device
+        return device
+
+    def _device(self, i2c_addr):
+        self.transactions += 1
+        device = self.devices.get(i2c_addr)
+        if device is None:
+            raise OSError(errno.EREMOTEIO, f"no device at 0x{i2c_addr:02x}")
+        return device
+
+    def _wire(self, nbytes):
+        if self.speed:
+            # address + register + data bytes, 9 bits each
+            time.sleep((nbytes + 2) * 9 / self.speed)
+
+    def read_i2c_block_data(self, i2c_addr, register, length):
+        device = self._device(i2c_addr)
+        self._wire(length)
+        return device.read(register, length)
+
+    def write_i2c_block_data(self, i2c_addr, register, data):
+        device = self._device(i2c_addr)
+        self._wire(len(data))
+        device.write(register, list(data))
+
+    def close(self):
+        pass
+
+
+class RecordingBus:
+    """Passes transactions through to bus and records them with timestamps.
+
+    Each trace entry is [seconds since start, "r"/"w", addr, register, data].
+    """
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.trace = []
+        self._start = time.perf_counter()
+
+    def read_i2c_block_data(self, i2c_addr, register, length):
+        data = self.bus.read_i2c_block_data(i2c_addr, register, length)
+        self.trace.append([time.perf_counter() - self._start, "r", i2c_addr, register, list(data)])
+        return data
+
+    def write_i2c_block_data(self, i2c_addr, register, data):
+        self.bus.write_i2c_block_data(i2c_addr, register, data)
+        self.trace.append([time.perf_counter() - self._start, "w", i2c_addr, register, list(data)])
+
+    def save(self, path):
+        with open(path, "w") as f:
+            for entry in self.trace:
+                f.write(json.dumps(entry) + "\n")
+
+    def close(self):
+        close = getattr(self.bus, "close", None)
+        if close is not None:
+            close()
+
+
+def load_trace(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayBus:
+    """Answers reads from a recorded trace.
+
+    speed=1.0 replays at the recorded pace, 10.0 ten times faster, None as
+    fast as possible. Reads return the next recorded read for the same
+    device and register; writes are checked off against the trace but not
+    enforced. When the trace runs out, reads repeat the last recorded value.
+    """
+
+    def __init__(self, trace, speed=1.0):
+        self.trace = trace
+        self.speed = speed
+        self.position = 0
+        self.mismatches = 0
+        self._last = {}
+        self._start = None
+
+    @property
+    def finished(self) -> bool:
+        return self.position >= len(self.trace)
+
+    def _pace(self, offset):
+        if not self.speed:
+            return
+        if self._start is None:
+            self._start = time.perf_counter() - offset / self.speed
+        delay = self._start + offset / self.speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _next(self, kind, i2c_addr, register):
+        # skip ahead to the next matching entry
+        for i in range(self.position, len(self.trace)):
+            offset, entry_kind, addr, reg, data = self.trace[i]
+            if entry_kind == kind and addr == i2c_addr and reg == register:
+                if i != self.position:
+                    self.mismatches += 1
+                self.position = i + 1
+                self._pace(offset)
+                return data
+        return None
+
+    def read_i2c_block_data(self, i2c_addr, register, length):
+        data = self._next("r", i2c_addr, register)
+        if data is None:
+            data = self._last.get((i2c_addr, register), [0] * length)
+        self._last[(i2c_addr, register)] = data
+        return list(data[:length])
+
+    def write_i2c_block_data(self, i2c_addr, register, data):
+        self._next("w", i2c_addr, register)
+
+    def close(self):
+        pass
@@ -66,24 +66,30 @@ def setup():
   gain_coefficient = sensor.get_gain_coefficient()
   print("Encoder current gain coefficient: %d\n" %gain_coefficient)
 
+  #poll every 10 ms while the knob is in use, every 100 ms after 2 s idle
+  sensor.enable_adaptive_polling(fast_interval=0.01, idle_interval=0.1, idle_timeout=2.0)
+
   time.sleep(1.5)
 
 
 
 def loop():
   '''
-    get the encoder current count
-    return value range： 0-1023
+    read the encoder count and button status in one bus transaction
+    count range： 0-1023
   '''
-  encoder_value = sensor.get_encoder_value()
- #print("The encoder current counts: %d" %encoder_value)
+  time.sleep(sensor.time_to_next_poll())
+  state = sensor.poll()
+  if state is None:
+    return
+ #print("The encoder current counts: %d" %state.count)
 
   #handle button
-  sensor.handle_sensor()
+  sensor.handle_sensor(state)
   #check button state
   if sensor.check_down_button_unhandled():
     print("Button pressed!")
-  print("Encoder value as float: %.3f" %sensor.encoder_as_float())
+  print("Encoder value as float: %.3f" %sensor.encoder_as_float(state))
   #time.sleep(0.1)
 
 
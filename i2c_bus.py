@@ -0,0 +1,152 @@
+"""Shared, thread-safe I2C bus handles.
+
+Every device on a bus used to open its own SMBus file descriptor, and
+transactions from different threads could interleave. BusManager hands out
+one SharedBus per bus number; each transaction holds the bus lock, and
+transaction() runs a list of reads/writes for several devices under a single
+lock hold, e.g. one pass over all encoders.
+
+SharedBus has the same read/write methods as smbus3.SMBus, so drivers use it
+unchanged. For tests and benchmarks without hardware, fake_smbus.FakeSMBus
+is a backend with simulated encoders on it:
+BusManager(backend=lambda number: FakeSMBus([FakeSEN0502(0x54)])).
+"""
+import threading
+import time
+
+# smbus3 transfers at 100 kHz: ~9 bit times per byte
+DEFAULT_BUS_SPEED = 100000
+
+
+def _smbus_backend(number):
+    # imported on first use so nothing needs smbus3 until a real bus is opened
+    import smbus3
+    return smbus3.SMBus(number)
+
+
+class SharedBus:
+    """One open bus, shared by all devices on it."""
+
+    def __init__(self, number, handle):
+        self.number = number
+        self._handle = handle
+        self.lock = threading.RLock()
+        self.created = time.monotonic()
+        # statistics
+        self.transactions = 0
+        self.batches = 0
+        self.bytes = 0
+        self.errors = 0
+        self.busy_time = 0.0
+
+    def read_i2c_block_data(self, i2c_addr, register, length):
+        with self.lock:
+            return self._read(i2c_addr, register, length)
+
+    def write_i2c_block_data(self, i2c_addr, register, data):
+        with self.lock:
+            self._write(i2c_addr, register, data)
+
+    def transaction(self, operations):
+        """Run ("read", addr, reg, length) / ("write", addr, reg, data) operations
+        back to back under one lock hold.
+
+        Returns one entry per operation: the data read, or None for writes.
+        An OSError from a device is returned in its slot instead of aborting
+        the rest of the batch.
+        """
+        results = []
+        with self.lock:
+            self.batches += 1
+            for kind, i2c_addr, register, arg in operations:
+                try:
+                    if kind == "read":
+                        results.append(self._read(i2c_addr, register, arg))
+                    else:
+                        self._write(i2c_addr, register, arg)
+                        results.append(None)
+                except OSError as e:
+                    results.append(e)
+        return results
+
+    def _read(self, i2c_addr, register, length):
+        start = time.perf_counter()
+        try:
+            return self._handle.read_i2c_block_data(i2c_addr, register, length)
+        except OSError:
+            self.errors += 1
+            raise
+        finally:
+            self.busy_time += time.perf_counter() - start
+            self.transactions += 1
+            self.bytes += length
+
+    def _write(self, i2c_addr, register, data):
+        start = time.perf_counter()
+        try:
+            self._handle.write_i2c_block_data(i2c_addr, register, data)
+        except OSError:
+            self.errors += 1
+            raise
+        finally:
+            self.busy_time += time.perf_counter() - start
+            self.transactions += 1
+            self.bytes += len(data)
+
+    def utilization(self) -> float:
+        """Fraction of wall time spent inside bus transactions."""
+        elapsed = time.monotonic() - self.created
+        return self.busy_time / elapsed if elapsed > 0 else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "bus": self.number,
+            "transactions": self.transactions,
+            "batches": self.batches,
+            "bytes": self.bytes,
+            "errors": self.errors,
+            "busy_time": self.busy_time,
+            "utilization": self.utilization(),
+        }
+
+    def close(self):
+        with self.lock:
+            close = getattr(self._handle, "close", None)
+            if close is not None:
+                close()
+
+
+class BusManager:
+    """Hands out one SharedBus per bus number.
+
+    backend(number) opens the underlying SMBus-like object, smbus3 by default.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or _smbus_backend
+        self._buses = {}
+        self._lock = threading.Lock()
+
+    def get(self, number) -> SharedBus:
+        with self._lock:
+            bus = self._buses.get(number)
+            if bus is None:
+                bus = self._buses[number] = SharedBus(number, self.backend(number))
+            return bus
+
+    def stats(self):
+        return [bus.stats() for bus in self._buses.values()]
+
+    def close_all(self):
+        with self._lock:
+            for bus in self._buses.values():
+                bus.close()
+            self._buses.clear()
+
+
+DEFAULT_MANAGER = BusManager()
+
+
+def get_bus(number) -> SharedBus:
+    """Shared handle for a bus number from the default manager."""
+    return DEFAULT_MANAGER.get(number)
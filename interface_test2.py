@@ -1,24 +1,36 @@
 import sys
+import logging
+import queue
+import time
+from functools import partial
 from PySide6.QtWidgets import (
     QApplication,
     QLabel,
     QLineEdit,
     QMainWindow,
     QVBoxLayout,
+    QScrollArea,
     QSlider,
     QWidget,
 )
 from PySide6.QtCore import Qt
 from PySide6.QtCore import QPoint
-from PySide6.QtGui import QFont
+from PySide6.QtGui import QFont, QColor, QPainter
 
 from PySide6.QtCore import QPoint
-from PySide6.QtCore import QThread, QObject, Signal, Slot, QTimer
+from PySide6.QtCore import QThread, QObject, Signal, Slot, QTimer, QEvent, QSignalBlocker
 
 from PySide6.QtWidgets import QPushButton
 
 #stuff for x32
-import xair_api
+from x32_subscription import X32Subscription, channel_address
+from write_behind import CoalescingWriter
+from fader_law import Taper, db_to_fader, fader_to_db
+from x32_meters import MeterStream, meter_index, levels_to_db, METER_DB_FLOOR
+from perf_stats import REGISTRY
+from view_model import DirtySet, ViewModel
+
+logger = logging.getLogger(__name__)
 
 
 class TouchSlider(QSlider):
@@ -90,46 +102,180 @@ class TouchSlider(QSlider):
         return self._start_pos is not None or self.isSliderDown()
 
 
-# helpers: map slider (0..100) <-> dB (-90..10) using power curve (gamma)
+# helpers: map slider (0..100) <-> dB (-90..10) using power curve (gamma),
+# precomputed against the console's 1024 step fader law so that values
+# round-trip exactly (see fader_law.py)
 DB_MIN = -90.0
 DB_MAX = 10.0
 GAMMA = 0.25  # increase for more fine control at low volumes
 
-def slider_to_db(slider_value: int, slider_min=0, slider_max=100) -> float:
-    frac = (slider_value - slider_min) / max(1, (slider_max - slider_min))
-    curv = frac ** GAMMA
-    return DB_MIN + curv * (DB_MAX - DB_MIN)
+taper = Taper(slider_min=0, slider_max=100, gamma=GAMMA, db_min=DB_MIN, db_max=DB_MAX)
+slider_to_db = taper.slider_to_db
+db_to_slider = taper.db_to_slider
 
-def db_to_slider(db_value: float, slider_min=0, slider_max=100) -> int:
-    frac = (db_value - DB_MIN) / max(1e-6, (DB_MAX - DB_MIN))
-    frac = min(max(frac, 0.0), 1.0)
-    inv = frac ** (1.0 / GAMMA)
-    return int(round(slider_min + inv * (slider_max - slider_min)))
 
+class MixerWorker(QThread):
+    """Owns the console connection on its own thread.
 
-class MainWindow(QMainWindow):
-    def __init__(self, console=None):
-        super().__init__()
+    Nothing here blocks the GUI: connecting (which waits for the console to
+    answer /xinfo) happens on the worker thread, commands are queued to it,
+    writes are queued to a CoalescingWriter and the display reads the
+    X32Subscription cache. Results and failures come back as Qt signals,
+    delivered on the GUI thread.
 
-        self.console = console
-
-        self.setWindowTitle("My App")
+    state is an X32Subscription that may already be running (see x32_app),
+    so the cache can be seeding while the UI is still being built.
+    """
+    connected = Signal(str)
+    error = Signal(str)
 
-        self.label = QLabel(text="strip 8")
+    def __init__(self, ip, port=10023, max_write_rate=50, connect_timeout=2, state=None):
+        super().__init__()
+        self.ip = ip
+        self.port = port
+        self.connect_timeout = connect_timeout
+        # created up front so the GUI can read (empty) state and queue
+        # subscriptions straight away
+        self.state = state if state is not None else X32Subscription(ip, port)
+        self.writer = CoalescingWriter(max_write_rate)
+        self._commands = queue.Queue()
+
+    def watch(self, *addresses):
+        """Seed the state cache for addresses once connected."""
+        self._commands.put((self._sync, addresses))
+
+    def write(self, kind, index, param, value):
+        """Queue a mix parameter write ("fader" in dB or "on"), latest value wins.
+
+        The state cache takes the value at once (optimistic); a value the
+        cache already holds is not sent again.
+        """
+        address = channel_address(kind, index, f"mix/{param}")
+        value = db_to_fader(value) if param == "fader" else int(bool(value))
+        if not self.state.update(address, value):
+            return
+        self.writer.write(address, value, partial(self._send, address, param))
+
+    def stop(self):
+        self._commands.put(None)
+        self.wait()
+
+    def _sync(self, *addresses):
+        # all addresses in about one round trip, lost replies are retried
+        failed = self.state.sync(addresses)
+        if failed:
+            self.error.emit(f"no reply for {len(failed)} of {len(addresses)} parameters")
+
+    def _send(self, address, param, value):
+        # runs on the writer thread; fader and mute go out through the
+        # subscription's preallocated templates (osc_fast) rather than
+        # xair_api's generic message building. A failure is reported to the
+        # UI here and not raised, so the writer does not log it a second time
+        try:
+            with REGISTRY.timed(f"osc_set_{param}"):
+                self.state.send(address, value)
+        except OSError as e:
+            self.error.emit(f"write {address} failed: {e}")
+
+    def _reachable(self, retry=0.25):
+        # the subscription's own socket asks, the reply lands in its cache;
+        # asked again every retry seconds in case a datagram was lost
+        deadline = time.monotonic() + self.connect_timeout
+        while time.monotonic() < deadline:
+            self.state.watch("/xinfo")
+            ask_again = min(time.monotonic() + retry, deadline)
+            while time.monotonic() < ask_again:
+                if self.state.get("/xinfo") is not None:
+                    return True
+                time.sleep(0.01)
+        return False
+
+    def run(self):
+        try:
+            self.state.start()
+            failure = None if self._reachable() else "no reply to /xinfo"
+        except OSError as e:
+            failure = str(e)
+        if failure is not None:
+            self.state.stop()
+            self.error.emit(f"could not connect to {self.ip}:{self.port}: {failure}")
+            return
+        self.writer.start()
+        self.connected.emit(f"{self.ip}:{self.port}")
+        try:
+            while True:
+                command = self._commands.get()
+                if command is None:
+                    break
+                function, args = command
+                try:
+                    function(*args)
+                except Exception as e:
+                    self.error.emit(str(e))
+        finally:
+            self.writer.stop()
+            self.state.stop()
+
+
+class MeterWidget(QWidget):
+    """Level bar painted from the newest frame of a MeterRing.
+
+    refresh() is called at display rate and only schedules a repaint when a
+    new meter frame has arrived; painting reads the ring in place.
+    """
+    def __init__(self, ring, index, parent=None):
+        super().__init__(parent)
+        self.ring = ring
+        self.index = index
+        self._painted_count = -1
+        self.paint_count = 0
+        self.setFixedHeight(24)
+        self._background = QColor("#222")
+        self._colors = (QColor("#2ecc71"), QColor("#f1c40f"), QColor("#e74c3c"))
+
+    def refresh(self):
+        if self.ring.count != self._painted_count:
+            self.update()
+
+    def paintEvent(self, event):
+        self.paint_count += 1
+        self._painted_count = self.ring.count
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self._background)
+        frame = self.ring.latest()
+        if frame is not None:
+            db = float(levels_to_db(frame[self.index]))
+            frac = (db - METER_DB_FLOOR) / -METER_DB_FLOOR
+            # green up to -12 dB, yellow up to -3 dB, red above
+            color = self._colors[0] if db < -12 else self._colors[1] if db < -3 else self._colors[2]
+            painter.fillRect(0, 0, int(frac * self.width()), self.height(), color)
+        painter.end()
+
+
+class StripWidget(QWidget):
+    """Name, level, fader and mute controls for one console strip.
+
+    kind is "ch" or "bus", index is 0 based like mixer.strip[] / mixer.bus[].
+    """
+    def __init__(self, kind="ch", index=8, mixer=None, meters=None, parent=None):
+        super().__init__(parent)
+
+        self.kind = kind
+        self.index = index
+        # MixerWorker, all writes are queued to it
+        self.mixer = mixer
+        self._name_address = channel_address(kind, index, "config/name")
+        self._fader_address = channel_address(kind, index, "mix/fader")
+        self._on_address = channel_address(kind, index, "mix/on")
+
+        self.label = QLabel(text=f"{kind} {index + 1}")
         # larger label font for visibility
         self.label.setStyleSheet("font-size: 36px; font-weight: 300;")
 
-        #display for volume of ch09
+        #display for volume of the strip
         self.volume_display = QLabel(text="NAN")
         self.volume_display.setStyleSheet("font-size: 18px; font-weight: 300;")
 
-        # poll mixer every 10 ms (0.01 s) and update volume_display
-        self._poll_timer = QTimer(self)
-        self._poll_timer.setInterval(25)  # milliseconds
-        self._poll_timer.timeout.connect(self._poll_mixer)
-        self._poll_timer.start()
-
-
         # use the top-level TouchSlider which accepts touches anywhere
         # and supports vertical swipes to change the value when the
         # user drags up/down.
@@ -137,8 +283,6 @@ class MainWindow(QMainWindow):
         #self.slider = QSlider()
         self.slider.setTracking(True)
 
-
-
         # touch-friendly visuals: much larger groove + very large handle
         self.slider.setStyleSheet("""
         QSlider::groove:horizontal {
@@ -163,6 +307,7 @@ class MainWindow(QMainWindow):
         #self.slider.setMinimumHeight(300)
 
         self.slider.valueChanged.connect(self.on_slider_value_changed)
+        self.slider.sliderReleased.connect(self.on_slider_released)
 
         #button to enable/disable mute
         self.mute_button = QPushButton("Mute")
@@ -205,67 +350,302 @@ class MainWindow(QMainWindow):
         """)
 
         layout = QVBoxLayout()
-        # make spacing and margins much larger so controls aren't cramped
+        # make spacing much larger so controls aren't cramped
         layout.setSpacing(48)
-        layout.setContentsMargins(80, 80, 80, 80)
+        layout.setContentsMargins(0, 0, 0, 0)
         layout.addWidget(self.label)
         layout.addWidget(self.volume_display)
+        # level meter, only when a MeterRing is supplied
+        self.meter = None
+        if meters is not None:
+            self.meter = MeterWidget(meters, meter_index(kind, index))
+            layout.addWidget(self.meter)
         layout.addWidget(self.slider)
         layout.addWidget(self.mute_button)
+        layout.setAlignment(Qt.AlignCenter)
+        self.setLayout(layout)
+
+        # what is on screen; refresh() only touches widgets whose value changed
+        self.view = ViewModel()
+        self.view.bind("name", self.label.setText)
+        self.view.bind("level", self.volume_display.setText)
+        # values from the console are shown with signals blocked, so they
+        # are not written straight back to it
+        self.view.bind("slider", partial(self._show, self.slider, self.slider.setValue))
+        self.view.bind("muted", partial(self._show, self.mute_button, self.mute_button.setChecked))
+        self.write_backs_avoided = 0
+
+    def _show(self, widget, setter, value):
+        blocker = QSignalBlocker(widget)
+        setter(value)
+        blocker.unblock()
+        self.write_backs_avoided += 1
+
+    @property
+    def addresses(self):
+        """OSC addresses this strip displays, for seeding the state cache."""
+        return (self._name_address, self._fader_address, self._on_address)
+
+    def on_mute_toggled(self, checked):
+        self.view.note("muted", checked)
+        if self.mixer is not None:
+            self.mixer.write(self.kind, self.index, "on", not(checked))
+
+    def on_slider_value_changed(self, value):
+        self.view.note("slider", value)
+        if self.mixer is not None:
+            self.mixer.write(self.kind, self.index, "fader", slider_to_db(value))
+
+    def on_slider_released(self):
+        # refresh() leaves the slider alone during a drag and only runs when
+        # an address changes, so catch up with the console once it is let go
+        if self.mixer is not None:
+            self.refresh(self.mixer.state)
+            self.flush()
+
+    def refresh(self, state):
+        """Queue widget updates from the state cache (no network traffic).
+
+        Only values that differ from what is on screen are queued; flush()
+        applies them.
+        """
+        name = state.get(self._name_address)
+        fader = state.get(self._fader_address)
+        on = state.get(self._on_address)
+        if name is None or fader is None or on is None:
+            # cache not seeded yet
+            return
+        #update the label with its name
+        self.view.update("name", name)
+        # convert raw fader value to dB and format for display
+        fader_val = fader_to_db(fader)
+        # format as needed (two decimals shown here)
+        self.view.update("level", f"{fader_val:.2f}")
+
+        #update slider position if user is not manipulating it
+        if not self.slider.manipulating:
+            self.view.update("slider", db_to_slider(fader_val))
+
+        #update the mute button state
+        # checked == True means the UI shows "muted"
+        self.view.update("muted", not bool(on))
+
+    def flush(self):
+        """Apply the queued widget updates; returns the number applied."""
+        return self.view.flush()
+
+
+class MainWindow(QMainWindow):
+    """Control surface for one or more strips.
+
+    strips is a list of (kind, index) pairs, e.g. [("ch", i) for i in range(32)]
+    plus [("bus", i) for i in range(16)] for the whole console. All strips are
+    refreshed from the X32Subscription cache on one timer, so the
+    network cost per tick is zero no matter how many strips are shown; the
+    cache is kept current by /xremote pushes. Target: 32 channels + 16 buses
+    refreshed at 40 Hz (25 ms timer) on a Raspberry Pi.
+    """
+    def __init__(self, mixer=None, strips=(("ch", 8),), meters=None):
+        super().__init__()
+
+        # MixerWorker, owns the console connection on its own thread
+        self.mixer = mixer
+        # X32Subscription cache, kept current by the console pushing changes
+        self.state = mixer.state if mixer is not None else None
+        # _poll_timer tick timing, see perf_stats
+        self._last_tick = None
+        self._tick_jitter = REGISTRY.histogram("poll_timer_jitter")
+        self._poll_stats = REGISTRY.histogram("poll_mixer")
+
+        self.setWindowTitle("My App")
+
+        # connection status, hidden once connected
+        self.status = QLabel(text="connecting...")
+        self.status.setStyleSheet("font-size: 18px; font-weight: 300;")
+        if mixer is not None:
+            mixer.connected.connect(self.on_mixer_connected)
+            mixer.error.connect(self.on_mixer_error)
+
+        self.strips = [StripWidget(kind, index, mixer, meters) for kind, index in strips]
+        # address -> strips showing it, so a push only refreshes its own strip
+        self._strips_by_address = {}
+        for strip in self.strips:
+            for address in strip.addresses:
+                self._strips_by_address.setdefault(address, []).append(strip)
+        # addresses pushed since the last tick, filled by the receive thread
+        self._dirty = DirtySet(self._strips_by_address)
+        if self.state is not None:
+            self.state.add_listener(self._dirty)
+
+        # refresh from the state cache every 25 ms; this costs no network
+        # traffic, the cache is updated by the console via /xremote
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(25)  # milliseconds
+        self._poll_timer.timeout.connect(self._poll_mixer)
+        self._poll_timer.start()
+
+        # repaint meters at display rate (~30 fps) from the newest frame
+        self._meter_timer = QTimer(self)
+        self._meter_timer.setInterval(33)  # milliseconds
+        self._meter_timer.timeout.connect(self._refresh_meters)
+        if meters is not None:
+            self._meter_timer.start()
+
+        layout = QVBoxLayout()
+        # make spacing and margins much larger so controls aren't cramped
+        layout.setSpacing(48)
+        layout.setContentsMargins(80, 80, 80, 80)
+        layout.addWidget(self.status)
+        for strip in self.strips:
+            layout.addWidget(strip)
         # center widgets horizontally and vertically inside the layout
         layout.setAlignment(Qt.AlignCenter)
-        
 
         container = QWidget()
         container.setLayout(layout)
 
-        self.setCentralWidget(container)
+        if len(self.strips) > 1:
+            # many strips don't fit on one touch panel; swipe to scroll
+            scroll = QScrollArea()
+            scroll.setWidgetResizable(True)
+            scroll.setWidget(container)
+            self.setCentralWidget(scroll)
+        else:
+            self.setCentralWidget(container)
 
-    def on_mute_toggled(self, checked):
-        self.console.strip[8].mix.on = not(checked)
+    @property
+    def addresses(self):
+        """Every OSC address shown by this window, for seeding the state cache."""
+        return [address for strip in self.strips for address in strip.addresses]
+
+    def on_mixer_connected(self, address):
+        self.status.hide()
+
+    def on_mixer_error(self, message):
+        logger.warning(message)
+        self.status.setText(message)
+        self.status.show()
+
+    def _refresh_meters(self):
+        for strip in self.strips:
+            if strip.meter is not None:
+                strip.meter.refresh()
+
+    def view_stats(self):
+        """Widget updates applied vs skipped because the screen already matched,
+        and console values shown without being written back to it."""
+        return {
+            "applied": sum(strip.view.applied for strip in self.strips),
+            "skipped": sum(strip.view.skipped for strip in self.strips),
+            "write_backs_avoided": sum(strip.write_backs_avoided for strip in self.strips),
+        }
 
-    def on_slider_value_changed(self, value):
-        db = slider_to_db(value)
-        mixer.strip[8].mix.fader = db
-        
     def _poll_mixer(self):
-        """Called on the main thread via QTimer to update the volume display."""
+        """Called on the main thread via QTimer to update changed strips from the cache.
+
+        Strips are refreshed only for addresses pushed since the last tick, and
+        the resulting widget updates are applied together, once per tick.
+        """
+        start = time.perf_counter()
+        if self._last_tick is not None:
+            # how far this tick is off the timer interval
+            period = start - self._last_tick
+            self._tick_jitter.record(abs(period - self._poll_timer.interval() / 1000.0))
+        self._last_tick = start
         try:
-            if self.console is None:
-                return              
-            #update the label with its name
-            self.label.setText(self.console.strip[8].config.name)
-            # read fader value from mixer and format for display
-            fader_val = self.console.strip[8].mix.fader
-            # format as needed (two decimals shown here)
-            self.volume_display.setText(f"{fader_val:.2f} {self.slider.manipulating}")
-
-            #update slider position if user is not manipulating it
-            if not self.slider.manipulating:
-                slider_val = db_to_slider(fader_val)
-                self.slider.setValue(slider_val)
-            
-            #update the mute button state
-            # checked == True means the UI shows "muted"
-            muted = not bool(self.console.strip[8].mix.on)
-            self.mute_button.setChecked(muted)
+            if self.state is None or not self._dirty:
+                # nothing changed since the last tick
+                return
+            changed = set()
+            for address in self._dirty.take():
+                changed.update(self._strips_by_address[address])
+            for strip in changed:
+                strip.refresh(self.state)
+            for strip in changed:
+                strip.flush()
         except Exception:
-            # ignore transient errors (connection etc.)
-            pass
+            # the cache is local, so this is a bug rather than a network error
+            logger.exception("refreshing strips failed")
+        finally:
+            self._poll_stats.record(time.perf_counter() - start)
+
+
+class _FirstFrame(QObject):
+    """Calls callback once, right after the window has painted for the first time."""
+    def __init__(self, window, callback):
+        super().__init__(window)
+        self._callback = callback
+        window.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self._callback is not None:
+            callback, self._callback = self._callback, None
+            # after the paint has finished
+            QTimer.singleShot(0, callback)
+        return False
+
+
+def run_gui(ip, port=10023, strips=(("ch", 8),), max_write_rate=50,
+            stats_file=None, state=None, connect_timeout=2, fullscreen=True,
+            on_first_frame=None):
+    """Build the window and run the Qt event loop until it is closed.
+
+    state and connect_timeout are passed to MixerWorker, see there. on_first_frame(app)
+    is called once the window has been painted.
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    # make the application font larger so all widgets scale
+    app.setFont(QFont("Sans", 36))
+
+    # connects in the background; the window comes up immediately
+    mixer = MixerWorker(ip, port, max_write_rate, connect_timeout, state=state)
+    mixer.start()
+    # level meters for all channels/buses, streamed by the console
+    meters = MeterStream(mixer.state)
+
+    window = MainWindow(mixer, strips, meters.ring)
+    # seed the cache, /xremote keeps it current afterwards
+    mixer.watch(*window.addresses)
+    if on_first_frame is not None:
+        _FirstFrame(window, partial(on_first_frame, app))
+    if fullscreen:
+        window.showFullScreen()
+    else:
+        window.show()
+    app.exec()
+    mixer.stop()
+
+    writer = mixer.writer
+    print(f"writes: {writer.sent} sent, {writer.coalesced} coalesced")
+    view = window.view_stats()
+    print(f"widget updates: {view['applied']} applied, {view['skipped']} skipped")
+    pending = mixer.state.pending.stats()
+    print(f"write-back avoided: {view['write_backs_avoided']} console values shown, "
+          f"{pending['redundant']} redundant writes, {pending['confirmed']} echoes and "
+          f"{pending['stale']} stale replies dropped, {pending['conflicts']} conflicts read back")
+    if stats_file:
+        REGISTRY.dump(stats_file)
 
 
 #do console initialization
 ip = "192.168.20.226"
 port = 10023
 server_port = 10023  # Port your client listens on
-kind_id = "X32"
 
-with xair_api.connect(kind_id, ip=ip) as mixer:
-    app = QApplication(sys.argv)
-    # make the application font larger so all widgets scale
-    app.setFont(QFont("Sans", 36))
+# max fader/mute writes per second per parameter
+max_write_rate = 50
+# strips to show as (kind, index); e.g. all channels:
+# strips = [("ch", i) for i in range(32)] + [("bus", i) for i in range(16)]
+strips = [("ch", 8)]
+# latency histograms are written here on exit (.json or Prometheus text),
+# None to disable; perf_stats.REGISTRY can also be queried at runtime
+stats_file = "mixer_stats.prom"
+
+def main():
+    # x32_app.py is the faster entry point (command line options, headless
+    # mode); this runs the GUI with the settings above
+    run_gui(ip, port, strips, max_write_rate, stats_file)
+
 
-    window = MainWindow(mixer)
-    #window.show()
-    window.showFullScreen()
-    app.exec()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Optimistic local values for parameters the user is changing.
+
+A local write (fader drag, encoder turn) goes into the cache at once and is
+recorded as pending, with a sequence number and a timestamp. Values that
+then arrive from the console for that parameter are checked against the
+pending writes before they may replace it:
+
+  ECHO      the newest pending value: the console confirmed it
+  STALE     an older pending value, or the value from before the first
+            pending write: a reply that crossed a newer write in flight.
+            Dropped, so the fader does not snap back.
+  CONFLICT  any other value: someone else moved it while our write was in
+            flight. The console wins: the value is stored and becomes the
+            new base, so its repeats are dropped as stale like the replies
+            to our writes. Which write the console applied last cannot be
+            told from a push, so the caller reads the value back (a read
+            changes nothing on the console, so two clients writing the
+            same parameter cannot set each other off). An echo of the
+            newest write after that is returned as ACCEPT: the console
+            applied our write last and the cache takes it back.
+  ACCEPT    nothing pending: stored as usual
+
+Pending, with the history of sent values, ends CONFIRM_TIMEOUT after the
+last local write, echoed or not (an X32 does not push a client's own writes
+back to it, and replies to a read can arrive twice or late); from then on
+the console's values are taken as they come.
+"""
+import collections
+import threading
+import time
+
+ACCEPT = "accept"
+ECHO = "echo"
+STALE = "stale"
+CONFLICT = "conflict"
+
+# seconds after the last local write during which console values are checked
+CONFIRM_TIMEOUT = 0.5
+# local writes per address kept to match console values against
+HISTORY = 128
+
+
+def same_value(a, b) -> bool:
+    # the console stores float32, compare floats with a little slack
+    if isinstance(a, float) or isinstance(b, float):
+        return isinstance(a, (int, float)) and isinstance(b, (int, float)) and abs(a - b) < 1e-6
+    return a == b
+
+
+class _Pending:
+    __slots__ = ("base", "writes", "last", "conflicted")
+
+    def __init__(self, base):
+        # console value before the first pending write, or the last
+        # conflicting one
+        self.base = base
+        # (seq, value), oldest first
+        self.writes = collections.deque(maxlen=HISTORY)
+        self.last = 0.0
+        # the cache holds a conflicting console value
+        self.conflicted = False
+
+
+class PendingWrites:
+    """Local writes per address that the console has not confirmed yet.
+
+    local() is called for every write, remote() for every value received
+    from the console; both are thread safe.
+    """
+
+    def __init__(self, timeout=CONFIRM_TIMEOUT, clock=time.monotonic):
+        self.timeout = timeout
+        self._clock = clock
+        self._pending = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        # counters
+        self.writes = 0
+        self.redundant = 0
+        self.confirmed = 0
+        self.stale = 0
+        self.conflicts = 0
+        self.expired = 0
+
+    def local(self, address, value, current=None) -> int:
+        """Record a local write; current is the cached value before it.
+
+        Returns the write's sequence number, or 0 for a redundant write (the
+        value is already cached and nothing is pending), which need not be
+        sent at all.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._live(address, now)
+            if entry is None:
+                if current is not None and same_value(value, current):
+                    self.redundant += 1
+                    return 0
+                entry = self._pending[address] = _Pending(current)
+            self._seq += 1
+            entry.writes.append((self._seq, value))
+            entry.last = now
+            # the cache takes this value over a conflicting one
+            entry.conflicted = False
+            self.writes += 1
+            return self._seq
+
+    def remote(self, address, value) -> str:
+        """Decide what to do with a value received from the console."""
+        with self._lock:
+            entry = self._live(address, self._clock())
+            if entry is None:
+                return ACCEPT
+            writes = entry.writes
+            if same_value(value, writes[-1][1]):
+                self.confirmed += 1
+                if entry.conflicted:
+                    entry.conflicted = False
+                    return ACCEPT
+                return ECHO
+            if (any(same_value(value, pending) for _, pending in writes)
+                    or entry.base is not None and same_value(value, entry.base)):
+                self.stale += 1
+                return STALE
+            # the history stays until the timeout, so replies to our writes
+            # still in flight cannot undo this
+            entry.base = value
+            entry.conflicted = True
+            self.conflicts += 1
+            return CONFLICT
+
+    def _live(self, address, now):
+        # caller holds self._lock
+        entry = self._pending.get(address)
+        if entry is not None and now - entry.last > self.timeout:
+            del self._pending[address]
+            self.expired += 1
+            entry = None
+        return entry
+
+    def stats(self) -> dict:
+        """Local writes, and console values dropped because of them."""
+        with self._lock:
+            return {
+                "writes": self.writes,
+                "redundant": self.redundant,
+                "pending": len(self._pending),
+                "confirmed": self.confirmed,
+                "stale": self.stale,
+                "conflicts": self.conflicts,
+                "expired": self.expired,
+            }
@@ -0,0 +1,160 @@
+"""Pipelined bulk OSC queries.
+
+A plain read (mixer.strip[8].mix.fader) waits a full round trip before the
+next one goes out, so 5-10 ms of Wi-Fi RTT caps it at ~100 reads/s.
+BulkQuery sends many queries at once, keeping up to `window` in flight,
+matches replies by OSC address and re-sends anything not answered within its
+timeout, so hundreds of parameters take roughly one RTT plus send time.
+
+  for reply in BulkQuery(ip).iter(addresses):   # as replies arrive
+      ...
+  values, failed = BulkQuery(ip).query(addresses)          # all at once
+  futures = BulkQuery(ip).submit(addresses)                # {address: Future}
+
+timeout and retries can be given per address as {address: value} dicts.
+With values, each address is set first and only a reply carrying the new
+value counts, so lost sets are retried too (see x32_snapshot restore).
+"""
+import collections
+import socket
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+from pythonosc.osc_message import OscMessage, ParseError
+
+from optimistic_state import same_value
+from x32_subscription import X32_PORT, build_message
+
+DEFAULT_WINDOW = 32
+DEFAULT_TIMEOUT = 0.1
+DEFAULT_RETRIES = 5
+
+## ok: False if there was no (matching) reply after all retries, value is
+## then None; tries: number of times the query was sent; latency: seconds
+## from the first send to the reply (or to giving up)
+Reply = namedtuple("Reply", ["address", "value", "ok", "tries", "latency"])
+
+
+def _per_address(setting, address, default):
+    if setting is None:
+        return default
+    if isinstance(setting, dict):
+        return setting.get(address, default)
+    return setting
+
+
+class BulkQuery:
+    """Windowed request/reply exchange with one console, matched by address.
+
+    Every call uses its own socket, so calls from several threads do not see
+    each other's replies.
+    """
+
+    def __init__(self, ip, port=X32_PORT, window=DEFAULT_WINDOW,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        self.console_address = (ip, port)
+        self.window = window
+        self.timeout = timeout
+        self.retries = retries
+        # counters
+        self.sent = 0
+        self.resent = 0
+
+    def iter(self, addresses, values=None, timeout=None, retries=None):
+        """Yield a Reply per address, in the order they complete.
+
+        timeout/retries override the defaults, either for all addresses or
+        per address as dicts. Duplicate addresses are queried once.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("", 0))
+        try:
+            yield from self._run(sock, list(dict.fromkeys(addresses)), values, timeout, retries)
+        finally:
+            sock.close()
+
+    def query(self, addresses, values=None, timeout=None, retries=None):
+        """Blocking form of iter(). Returns ({address: value}, [failed addresses])."""
+        results = {}
+        failed = []
+        for reply in self.iter(addresses, values, timeout, retries):
+            if reply.ok:
+                results[reply.address] = reply.value
+            else:
+                failed.append(reply.address)
+        return results, failed
+
+    def submit(self, addresses, values=None, timeout=None, retries=None):
+        """Run iter() on a background thread. Returns {address: Future}.
+
+        A future resolves to the value, or raises TimeoutError when the
+        address did not answer.
+        """
+        futures = {address: Future() for address in addresses}
+
+        def run():
+            try:
+                for reply in self.iter(futures, values, timeout, retries):
+                    if reply.ok:
+                        futures[reply.address].set_result(reply.value)
+                    else:
+                        futures[reply.address].set_exception(
+                            TimeoutError(f"no reply for {reply.address} after {reply.tries} tries"))
+            except Exception as e:
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(e)
+
+        threading.Thread(target=run, name="osc-bulk", daemon=True).start()
+        return futures
+
+    def _send(self, sock, address, values):
+        if values is not None:
+            sock.sendto(build_message(address, values[address]), self.console_address)
+        sock.sendto(build_message(address), self.console_address)
+        self.sent += 1
+
+    def _run(self, sock, addresses, values, timeout, retries):
+        todo = collections.deque(addresses)
+        inflight = {}  # address -> [deadline, tries, first sent]
+        while todo or inflight:
+            while todo and len(inflight) < self.window:
+                address = todo.popleft()
+                self._send(sock, address, values)
+                now = time.monotonic()
+                inflight[address] = [now + _per_address(timeout, address, self.timeout), 1, now]
+
+            now = time.monotonic()
+            wait = min(entry[0] for entry in inflight.values()) - now
+            sock.settimeout(max(0.0005, wait))
+            try:
+                dgram, _ = sock.recvfrom(4096)
+            except socket.timeout:
+                dgram = None
+            if dgram is not None:
+                try:
+                    msg = OscMessage(dgram)
+                except ParseError:
+                    msg = None
+                if msg is not None and msg.address in inflight and msg.params:
+                    params = msg.params
+                    value = params[0] if len(params) == 1 else tuple(params)
+                    if values is None or same_value(value, values[msg.address]):
+                        _, tries, first = inflight.pop(msg.address)
+                        yield Reply(msg.address, value, True, tries, time.monotonic() - first)
+
+            now = time.monotonic()
+            for address, entry in list(inflight.items()):
+                deadline, tries, first = entry
+                if deadline > now:
+                    continue
+                if tries > _per_address(retries, address, self.retries):
+                    del inflight[address]
+                    yield Reply(address, None, False, tries, now - first)
+                else:
+                    self._send(sock, address, values)
+                    self.resent += 1
+                    entry[0] = now + _per_address(timeout, address, self.timeout)
+                    entry[1] = tries + 1
@@ -0,0 +1,430 @@
+"""OSC traffic capture and replay for load testing.
+
+capture  CaptureProxy sits between the clients and the console: point the
+         app (or xair_api) at the proxy and every datagram in both
+         directions is forwarded and written to a capture log
+replay   plays a log back at 1x, Nx or maximum speed (as fast as the
+         target keeps up: at most MAX_IN_FLIGHT messages unanswered), either
+           --target emulator: the client -> console messages are sent to a
+             local X32Emulator, set messages are timed until the console
+             pushes them to a monitoring X32Subscription
+           --target client: the console -> client messages are sent to an
+             X32Subscription as if this were the console, timed until they
+             reach its cache
+         and reports dropped messages, queue depth (sent but not yet
+         processed) and end-to-end lag
+synth    writes a log of a busy show (faders moving on many channels) for
+         when there is no console to capture from
+
+Datagrams go through plain UDP sockets rather than a pythonosc client and
+dispatcher: the proxy forwards and the replay sends the recorded bytes as
+they are, without decoding and re-encoding them.
+
+Log format: the header "X32C", version (u8), then one record per datagram:
+microseconds since the previous record (u32), direction bit (0x80 = from the
+console) ORed with the client number (u8), length (u16), and the datagram.
+Everything is little endian; 7 bytes of overhead per message.
+
+Usage: python osc_capture.py capture show.x32c --console 192.168.20.226 [--listen-port 10023]
+       python osc_capture.py replay show.x32c [--target client] [--speed 10 | --max]
+       python osc_capture.py synth show.x32c [--channels 32] [--rate 30] [--seconds 10]
+"""
+import argparse
+import collections
+import math
+import select
+import socket
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from pythonosc.osc_message import OscMessage, ParseError
+
+from x32_subscription import X32Subscription, X32_PORT, build_message
+
+MAGIC = b"X32C"
+VERSION = 1
+_HEADER = struct.Struct("<4sB")
+_RECORD = struct.Struct("<IBH")
+
+# direction, stored in the top bit of the client byte
+TO_CONSOLE = 0
+FROM_CONSOLE = 1
+_FROM_CONSOLE_BIT = 0x80
+MAX_CLIENTS = 0x7F
+
+# replay at maximum speed: messages sent but not yet seen by the target
+MAX_IN_FLIGHT = 64
+# ... and how long to wait for one of them before sending anyway (s)
+IN_FLIGHT_WAIT = 0.05
+
+## timestamp: seconds since the first record, client: number of the client
+## socket the datagram belongs to (in order of first appearance)
+CaptureRecord = namedtuple("CaptureRecord", ["timestamp", "direction", "client", "dgram"])
+
+
+class CaptureWriter:
+    """Appends datagrams to a capture log; safe to call from several threads."""
+
+    def __init__(self, path):
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, VERSION))
+        self._lock = threading.Lock()
+        self._last = None
+        self.records = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    def write(self, direction, client, dgram, timestamp=None):
+        """timestamp is time.monotonic() by default."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self._lock:
+            if self._last is None:
+                self._last = timestamp
+            delta = max(0, int(round((timestamp - self._last) * 1e6)))
+            # advance by the rounded delta so rounding errors do not add up
+            self._last += delta / 1e6
+            flags = (client & MAX_CLIENTS) | (_FROM_CONSOLE_BIT if direction == FROM_CONSOLE else 0)
+            self._file.write(_RECORD.pack(min(delta, 0xFFFFFFFF), flags, len(dgram)))
+            self._file.write(dgram)
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read_capture(path):
+    """Yield the CaptureRecords of a log in order."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a capture log")
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported capture version {version}")
+    offset = _HEADER.size
+    elapsed_us = 0
+    while offset + _RECORD.size <= len(data):
+        delta, flags, length = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        elapsed_us += delta
+        direction = FROM_CONSOLE if flags & _FROM_CONSOLE_BIT else TO_CONSOLE
+        yield CaptureRecord(elapsed_us / 1e6, direction, flags & MAX_CLIENTS,
+                            data[offset:offset + length])
+        offset += length
+
+
+class CaptureProxy:
+    """UDP proxy between clients and the console that logs all traffic.
+
+    Each client gets its own upstream socket so replies and /xremote pushes
+    go back to the right client.
+    """
+
+    def __init__(self, console_ip, writer, console_port=X32_PORT, host="0.0.0.0", port=X32_PORT):
+        self.console_address = (console_ip, console_port)
+        self.writer = writer
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, port))
+        self.host, self.port = self._sock.getsockname()
+        # client address -> (client number, upstream socket)
+        self._clients = {}
+        self._upstream = {}  # upstream socket -> client address
+        self._running = False
+        self._thread = None
+        # counters
+        self.to_console = 0
+        self.from_console = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.stop()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._sock.close()
+        for upstream in self._upstream:
+            upstream.close()
+
+    def _client(self, address):
+        client = self._clients.get(address)
+        if client is None:
+            upstream = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            upstream.bind(("", 0))
+            client = self._clients[address] = (len(self._clients) & MAX_CLIENTS, upstream)
+            self._upstream[upstream] = address
+        return client
+
+    def _run(self):
+        while self._running:
+            try:
+                readable, _, _ = select.select([self._sock, *self._upstream], [], [], 0.05)
+            except (OSError, ValueError):
+                break
+            for sock in readable:
+                try:
+                    dgram, source = sock.recvfrom(65536)
+                except OSError:
+                    continue
+                if sock is self._sock:
+                    number, upstream = self._client(source)
+                    self.writer.write(TO_CONSOLE, number, dgram)
+                    upstream.sendto(dgram, self.console_address)
+                    self.to_console += 1
+                else:
+                    address = self._upstream[sock]
+                    self.writer.write(FROM_CONSOLE, self._clients[address][0], dgram)
+                    self._sock.sendto(dgram, address)
+                    self.from_console += 1
+
+
+def _key(dgram):
+    """(address, value) the way X32Subscription stores it, None for queries."""
+    try:
+        msg = OscMessage(dgram)
+    except ParseError:
+        return None
+    params = msg.params
+    if not params:
+        return None
+    return msg.address, params[0] if len(params) == 1 else tuple(params)
+
+
+class LoadProbe:
+    """Times messages from send() until they reach a state listener.
+
+    Messages are matched by (address, value); one still waiting at the end
+    counts as dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Condition()
+        self._waiting = collections.defaultdict(collections.deque)
+        self.lags = []
+        self.sent = 0
+        self.arrived = 0
+        self.max_depth = 0
+        self._depth_sum = 0
+
+    def sending(self, key, timestamp):
+        with self._lock:
+            self._waiting[key].append(timestamp)
+            self.sent += 1
+            depth = self.sent - self.arrived
+            self._depth_sum += depth
+            if depth > self.max_depth:
+                self.max_depth = depth
+
+    def __call__(self, address, value):
+        # state listener, receive thread
+        now = time.perf_counter()
+        key = (address, value)
+        with self._lock:
+            waiting = self._waiting.get(key)
+            if not waiting:
+                return
+            self.lags.append(now - waiting.popleft())
+            self.arrived += 1
+            self._lock.notify()
+
+    def wait_below(self, depth, timeout=IN_FLIGHT_WAIT):
+        """Block until fewer than depth messages are on their way; gives up
+        after timeout without an arrival (they may have been dropped)."""
+        with self._lock:
+            while self.sent - self.arrived >= depth:
+                if not self._lock.wait(timeout):
+                    return
+
+    def report(self) -> dict:
+        lags = sorted(self.lags)
+
+        def percentile(q):
+            return lags[min(len(lags) - 1, int(q * len(lags)))] if lags else math.nan
+
+        return {
+            "sent": self.sent,
+            "arrived": self.arrived,
+            "dropped": self.sent - self.arrived,
+            "max_depth": self.max_depth,
+            "mean_depth": self._depth_sum / self.sent if self.sent else 0.0,
+            "lag_p50": percentile(0.5),
+            "lag_p99": percentile(0.99),
+            "lag_max": lags[-1] if lags else math.nan,
+        }
+
+
+def _pace(start, timestamp, speed, probe, window):
+    if not speed:
+        # maximum speed: only as fast as the target takes them
+        probe.wait_below(window)
+        return
+    delay = start + timestamp / speed - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def replay_to_emulator(records, emulator, speed=1.0, settle=0.5, window=MAX_IN_FLIGHT):
+    """Send the client -> console traffic of a log to an X32Emulator.
+
+    Set messages are timed until the emulator pushes them to a monitoring
+    X32Subscription. speed None is maximum speed, with at most window
+    messages in flight. Returns (LoadProbe report, elapsed send time).
+    """
+    probe = LoadProbe()
+    sockets = {}
+    target = (emulator.host, emulator.port)
+    with X32Subscription(emulator.host, emulator.port) as monitor:
+        monitor.add_listener(probe)
+        time.sleep(0.05)  # /xremote registered before the first set
+        start = time.perf_counter()
+        for record in records:
+            if record.direction != TO_CONSOLE:
+                continue
+            sock = sockets.get(record.client)
+            if sock is None:
+                sock = sockets[record.client] = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            _pace(start, record.timestamp, speed, probe, window)
+            key = _key(record.dgram)
+            if key is not None:
+                probe.sending(key, time.perf_counter())
+            sock.sendto(record.dgram, target)
+        elapsed = time.perf_counter() - start
+        time.sleep(settle)
+    for sock in sockets.values():
+        sock.close()
+    return probe.report(), elapsed
+
+
+def replay_to_client(records, state_factory=X32Subscription, speed=1.0, settle=0.5,
+                     window=MAX_IN_FLIGHT):
+    """Play the console -> client traffic of a log to an X32Subscription.
+
+    This function stands in for the console: it binds a socket, starts the
+    client against it, waits for its /xremote and then sends the recorded
+    messages. Returns (LoadProbe report, elapsed send time).
+    """
+    probe = LoadProbe()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(2.0)
+    host, port = sock.getsockname()
+    with state_factory(host, port) as state:
+        state.add_listener(probe)
+        # the client's first datagram (/xremote) tells us where to send
+        _, client = sock.recvfrom(65536)
+        start = time.perf_counter()
+        for record in records:
+            if record.direction != FROM_CONSOLE:
+                continue
+            _pace(start, record.timestamp, speed, probe, window)
+            key = _key(record.dgram)
+            if key is not None:
+                probe.sending(key, time.perf_counter())
+            sock.sendto(record.dgram, client)
+        elapsed = time.perf_counter() - start
+        time.sleep(settle)
+    sock.close()
+    return probe.report(), elapsed
+
+
+def synth_show(path, channels=32, rate=30.0, seconds=10.0, seed=None):
+    """Write a log of a busy show: every channel fader moving, each sending
+    rate updates per second, as both the operator's writes and the console's
+    pushes. Returns the number of records."""
+    with CaptureWriter(path) as writer:
+        start = time.monotonic()
+        writer.write(TO_CONSOLE, 0, build_message("/xremote"), start)
+        steps = int(seconds * rate)
+        for step in range(steps):
+            t = start + step / rate
+            for ch in range(channels):
+                # stagger the channels within one step
+                when = t + ch / (rate * channels)
+                level = 0.5 + 0.45 * math.sin(when * 1.5 + ch * 0.7 + (seed or 0))
+                dgram = build_message(f"/ch/{ch + 1:02d}/mix/fader", level)
+                writer.write(TO_CONSOLE, 0, dgram, when)
+                writer.write(FROM_CONSOLE, 0, dgram, when + 0.0005)
+        return writer.records
+
+
+def _print_report(label, report, elapsed, duration):
+    print(f"{label}: {report['sent']} messages in {elapsed:.2f} s "
+          f"(recorded {duration:.2f} s), {report['dropped']} dropped")
+    print(f"  queue depth max {report['max_depth']}, mean {report['mean_depth']:.1f}")
+    print(f"  lag p50 {report['lag_p50'] * 1000:.2f} ms, p99 {report['lag_p99'] * 1000:.2f} ms, "
+          f"max {report['lag_max'] * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSC capture and replay")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    capture = commands.add_parser("capture", help="proxy and log traffic to a console")
+    capture.add_argument("log")
+    capture.add_argument("--console", default="192.168.20.226", help="console IP")
+    capture.add_argument("--console-port", type=int, default=X32_PORT)
+    capture.add_argument("--listen-port", type=int, default=X32_PORT,
+                         help="point the clients at this port")
+
+    replay = commands.add_parser("replay", help="play a log back and measure")
+    replay.add_argument("log")
+    replay.add_argument("--target", choices=("emulator", "client"), default="emulator")
+    replay.add_argument("--speed", type=float, default=1.0, help="1 = recorded pace, 10 = ten times faster")
+    replay.add_argument("--max", action="store_true", help="as fast as possible")
+
+    synth = commands.add_parser("synth", help="write a synthetic busy show log")
+    synth.add_argument("log")
+    synth.add_argument("--channels", type=int, default=32)
+    synth.add_argument("--rate", type=float, default=30.0, help="updates per channel per second")
+    synth.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.command == "capture":
+        with CaptureWriter(args.log) as writer, \
+                CaptureProxy(args.console, writer, args.console_port, port=args.listen_port) as proxy:
+            print(f"capturing on port {proxy.port}, Ctrl-C to stop")
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
+        print(f"{writer.records} messages ({proxy.to_console} to, {proxy.from_console} from console)")
+    elif args.command == "synth":
+        records = synth_show(args.log, args.channels, args.rate, args.seconds)
+        print(f"wrote {records} messages to {args.log}")
+    else:
+        records = list(read_capture(args.log))
+        duration = records[-1].timestamp if records else 0.0
+        speed = None if args.max else args.speed
+        label = "max" if speed is None else f"{speed:g}x"
+        if args.target == "emulator":
+            from x32_emulator import X32Emulator
+            with X32Emulator() as emulator:
+                report, elapsed = replay_to_emulator(records, emulator, speed)
+        else:
+            report, elapsed = replay_to_client(records, speed=speed)
+        _print_report(f"{args.target} {label}", report, elapsed, duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Preallocated OSC encoding for fixed-shape X32 writes.
+
+build_message() goes through pythonosc's generic builder for every write:
+the address and type tags are encoded again and a new bytes object is made
+each time. Fader, pan, send level and mute writes always have the same
+shape (one float or one int argument), so MessageTemplate encodes the
+address and type tag once into a bytearray and pack() only overwrites the
+4 argument bytes in place; the returned memoryview can go straight to
+sendto(), with no allocation per message.
+
+Bundles ("#bundle", time tag "immediately") are packed the same way into
+one reusable buffer, for sending several faders in one datagram.
+
+The bytes are identical to x32_subscription.build_message() for the same
+address and value (see bench_osc_fast.py). Only a float for a float slot and
+an int for an int slot take the fast path; for anything else (e.g. a bool,
+which pythonosc encodes as a T/F tag) send() returns False and the caller
+uses the generic path, as X32Subscription.send() does.
+"""
+import struct
+import threading
+
+_FLOAT = struct.Struct(">f")
+_INT = struct.Struct(">i")
+_BUNDLE_HEADER = b"#bundle\0" + struct.pack(">Q", 1)  # time tag 1: immediately
+# most messages in one bundle, keeps a bundle well inside one datagram
+MAX_BUNDLE = 32
+
+
+def _padded(text: str) -> bytes:
+    data = text.encode("ascii") + b"\0"
+    return data + b"\0" * (-len(data) % 4)
+
+
+def message_tag(address: str):
+    """Type tag ("f" or "i") for addresses with a fixed-shape write, else None."""
+    if address.endswith("/mix/on"):
+        return "i"
+    if address.endswith(("/mix/fader", "/mix/pan", "/level")):
+        return "f"
+    return None
+
+
+class MessageTemplate:
+    """An OSC message with one argument, encoded once and patched in place."""
+    __slots__ = ("address", "tag", "buffer", "view", "_offset", "_struct", "_type")
+
+    def __init__(self, address: str, tag: str):
+        if tag not in ("f", "i"):
+            raise ValueError(f"unsupported type tag {tag!r}")
+        self.address = address
+        self.tag = tag
+        head = _padded(address) + _padded("," + tag)
+        self._offset = len(head)
+        self._struct = _FLOAT if tag == "f" else _INT
+        self._type = float if tag == "f" else int
+        self.buffer = bytearray(head + b"\0" * 4)
+        self.view = memoryview(self.buffer)
+
+    def accepts(self, value) -> bool:
+        # exact type: a bool is an int but must not be sent as one
+        return type(value) is self._type
+
+    def pack(self, value) -> memoryview:
+        """Write value into the buffer; returns the (reused) message view."""
+        self._struct.pack_into(self.buffer, self._offset, value)
+        return self.view
+
+    def pack_into(self, buffer, offset, value) -> int:
+        """Copy the message with value into buffer at offset; returns the end offset."""
+        end = offset + len(self.buffer)
+        buffer[offset:end] = self.buffer
+        self._struct.pack_into(buffer, offset + self._offset, value)
+        return end
+
+
+class FastSender:
+    """Sends fixed-shape writes on sock through per-address templates.
+
+    send() is safe to call from several threads; each send holds a lock
+    while its template buffer is patched and sent.
+    """
+
+    def __init__(self, sock, target, max_bundle=MAX_BUNDLE):
+        self._sock = sock
+        self.target = target
+        self._templates = {}
+        self._lock = threading.Lock()
+        self.max_bundle = max_bundle
+        # grown to the largest bundle sent, then reused
+        self._bundle = bytearray(_BUNDLE_HEADER)
+        # counters
+        self.sent = 0
+        self.bundles = 0
+
+    def template(self, address):
+        """Cached template for address, or None when it has no fixed shape."""
+        template = self._templates.get(address)
+        if template is None:
+            tag = message_tag(address)
+            if tag is None:
+                return None
+            template = self._templates[address] = MessageTemplate(address, tag)
+        return template
+
+    def precompile(self, addresses):
+        """Build the templates up front, e.g. for every strip on screen."""
+        for address in addresses:
+            self.template(address)
+
+    def send(self, address: str, value) -> bool:
+        """Send through the template; False (nothing sent) if address or value does not fit one."""
+        template = self.template(address)
+        if template is None or not template.accepts(value):
+            return False
+        with self._lock:
+            self._sock.sendto(template.pack(value), self.target)
+        self.sent += 1
+        return True
+
+    def send_bundle(self, items) -> list:
+        """Send [(address, value), ...] as OSC bundles of up to max_bundle messages.
+
+        Returns the items that do not fit a template, unsent.
+        """
+        rest = []
+        batch = []
+        for address, value in items:
+            template = self.template(address)
+            if template is None or not template.accepts(value):
+                rest.append((address, value))
+                continue
+            batch.append((template, value))
+            if len(batch) == self.max_bundle:
+                self._send_bundle(batch)
+                batch = []
+        if batch:
+            self._send_bundle(batch)
+        return rest
+
+    def _send_bundle(self, batch):
+        needed = len(_BUNDLE_HEADER) + sum(4 + len(template.buffer) for template, _ in batch)
+        with self._lock:
+            buffer = self._bundle
+            if len(buffer) < needed:
+                buffer.extend(bytes(needed - len(buffer)))
+            offset = len(_BUNDLE_HEADER)
+            for template, value in batch:
+                _INT.pack_into(buffer, offset, len(template.buffer))
+                offset = template.pack_into(buffer, offset + 4, value)
+            with memoryview(buffer) as view:
+                self._sock.sendto(view[:offset], self.target)
+        self.bundles += 1
+        self.sent += len(batch)
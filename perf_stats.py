@@ -0,0 +1,142 @@
+"""Low-overhead latency histograms and counters for the hot paths.
+
+Each histogram has fixed power-of-two buckets from 1 us to ~8 s, so a
+record() is a bisect and a few integer adds, cheap enough to leave on in
+production. Updates are not locked; under heavy contention from several
+threads a sample can very rarely be lost, which is fine for monitoring.
+
+Everything recorded goes to the module level REGISTRY by default. Query it
+at runtime with REGISTRY.snapshot() or write it out with
+REGISTRY.dump("stats.json") / REGISTRY.dump("stats.prom") (Prometheus text).
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+
+# bucket upper bounds in seconds: 1 us, 2 us, 4 us ... ~8.4 s
+BUCKET_BOUNDS = tuple(1e-6 * 2 ** i for i in range(24))
+
+
+class Histogram:
+    __slots__ = ("name", "buckets", "count", "total", "max")
+
+    def __init__(self, name):
+        self.name = name
+        # one extra bucket for values above the last bound
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.buckets[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile."""
+        if self.count == 0:
+            return 0.0
+        target = p / 100.0 * self.count
+        seen = 0
+        for bound, n in zip(BUCKET_BOUNDS, self.buckets):
+            seen += n
+            if seen >= target:
+                return bound
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": list(self.buckets),
+        }
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.histogram.record(time.perf_counter() - self.start)
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram(name))
+        return histogram
+
+    def record(self, name: str, seconds: float):
+        self.histogram(name).record(seconds)
+
+    def timed(self, name: str) -> _Timer:
+        """with REGISTRY.timed("osc_set"): ... records the block's duration."""
+        return _Timer(self.histogram(name))
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        # histograms are zeroed in place, callers may hold on to them
+        with self._lock:
+            for histogram in self.histograms.values():
+                histogram.__init__(histogram.name)
+            self.counters.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            "histograms": {name: h.snapshot() for name, h in list(self.histograms.items())},
+            "counters": dict(self.counters),
+        }
+
+    def to_prometheus(self, prefix: str = "x32_") -> str:
+        lines = []
+        for name, h in sorted(self.histograms.items()):
+            metric = f"{prefix}{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, n in zip(BUCKET_BOUNDS, h.buckets):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {h.count}')
+            lines.append(f"{metric}_sum {h.total:.9f}")
+            lines.append(f"{metric}_count {h.count}")
+        for name, value in sorted(self.counters.items()):
+            metric = f"{prefix}{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """Write JSON if path ends in .json, Prometheus text otherwise."""
+        if path.endswith(".json"):
+            text = json.dumps(self.snapshot(), indent=1)
+        else:
+            text = self.to_prometheus()
+        with open(path, "w") as f:
+            f.write(text)
+
+
+REGISTRY = Registry()
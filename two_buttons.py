@@ -4,23 +4,24 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 
 from DFRobot_VisualRotaryEncoder import *
+from encoder_scheduler import EncoderScheduler, BUTTON
 
+#poll rate per encoder (Hz)
+poll_rate = 50
 
 
 def main():
     sensor1 = DFRobot_VisualRotaryEncoder(i2c_addr = 0x54, bus = 1, gain_coefficient=51)
     sensor2 = DFRobot_VisualRotaryEncoder(i2c_addr = 0x55, bus = 1, gain_coefficient=51)
     time.sleep(1)
-    while True:
-        #handle sensor button updates
-        sensor1.handle_sensor()
-        sensor2.handle_sensor()
-        #print the button presses
-        if sensor1.check_down_button_unhandled():
-            print("Sensor 1 Button pressed!")
-        if sensor2.check_down_button_unhandled():
-            print("Sensor 2 Button pressed!")
+    #poll both encoders on a background thread instead of spinning here
+    with EncoderScheduler([sensor1, sensor2], rate=poll_rate) as scheduler:
+        while True:
+            event = scheduler.events.get()
+            #print the button presses
+            if event.kind == BUTTON and event.value:
+                print("Sensor %d Button pressed!" % (event.encoder + 1))
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,85 @@
+"""Dirty-checked widget updates.
+
+A ViewModel remembers the value last put on screen for every bound widget
+property. update() only queues a setter call when the new value differs, and
+flush() applies everything queued in one go, once per frame. Restyling and
+repainting the heavy touch widgets is then only paid for real changes.
+"""
+import threading
+
+_UNSET = object()
+
+
+class ViewModel:
+    def __init__(self):
+        self._setters = {}
+        self._shown = {}
+        self._pending = {}
+        # counters
+        self.applied = 0
+        self.skipped = 0
+
+    def bind(self, key, setter):
+        """setter(value) puts a value for key on screen."""
+        self._setters[key] = setter
+
+    def update(self, key, value):
+        """Queue value for key unless it is already what is shown (or queued)."""
+        if self._pending.get(key, self._shown.get(key, _UNSET)) == value:
+            self.skipped += 1
+            return
+        self._pending[key] = value
+
+    def note(self, key, value):
+        """Record a value that reached the screen some other way, e.g. the user
+        dragging a slider, so it is not set again."""
+        self._shown[key] = value
+        self._pending.pop(key, None)
+
+    def invalidate(self, key=None):
+        """Forget what is shown for key (all keys if None); the next update applies."""
+        if key is None:
+            self._shown.clear()
+        else:
+            self._shown.pop(key, None)
+
+    def flush(self) -> int:
+        """Apply all queued updates; returns how many widgets were touched."""
+        pending = self._pending
+        if not pending:
+            return 0
+        self._pending = {}
+        for key, value in pending.items():
+            self._shown[key] = value
+            self._setters[key](value)
+        self.applied += len(pending)
+        return len(pending)
+
+
+class DirtySet:
+    """Addresses changed since the last take().
+
+    An instance is a state listener, callable as listener(address, value)
+    from the receive thread. It holds no reference to the widgets, so a
+    window is never kept alive (or destroyed) by the network thread.
+    """
+
+    def __init__(self, addresses=None):
+        # only these addresses are tracked, all if None
+        self._addresses = frozenset(addresses) if addresses is not None else None
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, address, value=None):
+        if self._addresses is None or address in self._addresses:
+            with self._lock:
+                self._dirty.add(address)
+
+    def __bool__(self):
+        return bool(self._dirty)
+
+    def take(self) -> set:
+        """Return the changed addresses and start over."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
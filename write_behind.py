@@ -0,0 +1,125 @@
+"""Coalescing, rate-limited write path for mixer parameters.
+
+Writes are queued per parameter key and sent from a background thread. If a
+newer value arrives for a key before the previous one went out, the old one
+is dropped (latest value wins). Each key is sent at most max_rate times per
+second and the last value written is always sent eventually.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# default maximum send rate per parameter (Hz)
+DEFAULT_MAX_RATE = 50.0
+
+
+class CoalescingWriter:
+    """Write-behind queue, one pending value per key.
+
+    writer.write(key, value, send) schedules send(value) on the writer
+    thread. Use as a context manager or call start()/stop(); stop() flushes
+    whatever is still pending.
+    """
+
+    def __init__(self, max_rate=DEFAULT_MAX_RATE):
+        self.min_interval = 1.0 / max_rate
+        self._pending = {}
+        self._last_sent = {}
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        # counters
+        self.submitted = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.stop()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def write(self, key, value, send):
+        """Queue send(value) for key, replacing any value not yet sent."""
+        with self._cond:
+            self.submitted += 1
+            if key in self._pending:
+                self.coalesced += 1
+            self._pending[key] = (send, value)
+            self._cond.notify()
+
+    def flush(self):
+        """Send everything pending right now, ignoring the rate limit."""
+        with self._cond:
+            items = list(self._pending.items())
+            self._pending.clear()
+        for key, (send, value) in items:
+            self._send(key, send, value)
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def stats(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+        }
+
+    def _send(self, key, send, value):
+        try:
+            send(value)
+            self.sent += 1
+        except Exception:
+            self.failed += 1
+            logger.exception("write to %s failed", key)
+        self._last_sent[key] = time.monotonic()
+
+    def _take_due(self):
+        # returns (due items, seconds until the next key becomes due)
+        now = time.monotonic()
+        due = []
+        wait = None
+        for key in list(self._pending):
+            remaining = self._last_sent.get(key, 0.0) + self.min_interval - now
+            if remaining <= 0:
+                due.append((key, self._pending.pop(key)))
+            elif wait is None or remaining < wait:
+                wait = remaining
+        return due, wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._running:
+                        return
+                    due, wait = self._take_due()
+                    if due:
+                        break
+                    self._cond.wait(wait)
+            for key, (send, value) in due:
+                self._send(key, send, value)
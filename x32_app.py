@@ -0,0 +1,137 @@
+"""Entry point for the X32 control surface.
+
+Importing this module is cheap: Qt (PySide6), numpy and smbus3 are only
+imported by the mode that needs them.
+
+  GUI       the console subscription is started on a background thread
+            first, then Qt is imported and the window built while the cache
+            seeds; the GUI's worker checks the console answers /xinfo
+  headless  encoders drive the console through X32Subscription only; Qt is
+            never loaded (for a Pi without a display)
+
+--exit-when-ready quits once the window has been painted (GUI) or the state
+cache has been seeded (headless) and prints the time taken; bench_startup.py
+uses it.
+
+Usage: python x32_app.py [--ip 192.168.20.226] [--strips ch9,ch10,bus1]
+       python x32_app.py --headless [--bus 1]
+"""
+import argparse
+import sys
+import time
+
+from x32_subscription import X32Subscription, X32_PORT, channel_address
+
+# interpreter start is a little earlier, bench_startup.py measures from the outside
+STARTED = time.perf_counter()
+
+DEFAULT_IP = "192.168.20.226"
+DEFAULT_STRIPS = "ch9"
+DEFAULT_STATS_FILE = "mixer_stats.prom"
+# parameters each strip shows (see interface_test2.StripWidget)
+STRIP_PARAMS = ("config/name", "mix/fader", "mix/on")
+
+
+def parse_strips(text):
+    """"ch9,ch10,bus1" -> [("ch", 8), ("ch", 9), ("bus", 0)] (1 based like the console)."""
+    strips = []
+    for item in text.split(","):
+        item = item.strip()
+        kind = item.rstrip("0123456789")
+        if kind not in ("ch", "bus") or kind == item:
+            raise ValueError(f"bad strip {item!r}, expected e.g. ch9 or bus1")
+        strips.append((kind, int(item[len(kind):]) - 1))
+    return strips
+
+
+def strip_addresses(strips):
+    return [channel_address(kind, index, param) for kind, index in strips for param in STRIP_PARAMS]
+
+
+def wait_seeded(state, addresses, timeout):
+    """Block until the cache holds a value for every address; False on timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(state.get(address) is not None for address in addresses):
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def ready(mode):
+    print(f"ready {mode} {time.perf_counter() - STARTED:.3f} s", flush=True)
+
+
+def run_headless(args, state):
+    from encoder_bridge import binding_address, bindings
+
+    addresses = strip_addresses(args.strips) + [binding_address(b) for b in bindings]
+    state.watch(*addresses)
+    if args.exit_when_ready:
+        seeded = wait_seeded(state, addresses, args.connect_timeout)
+        ready("headless" if seeded else "headless (not seeded)")
+        return 0 if seeded else 1
+
+    # I2C is only touched from here on
+    from DFRobot_VisualRotaryEncoder import DFRobot_VisualRotaryEncoder
+    from encoder_bridge import ENCODER_CENTER, run
+
+    encoders = []
+    for binding in bindings:
+        encoder = DFRobot_VisualRotaryEncoder(i2c_addr=binding.i2c_addr, bus=args.bus, gain_coefficient=51)
+        encoder.set_encoder_value(ENCODER_CENTER)
+        encoders.append(encoder)
+    run(state, encoders, bindings, args.rate)
+    return 0
+
+
+def run_gui(args, state):
+    # seeding starts now, while Qt is imported and the window is built
+    state.watch(*strip_addresses(args.strips))
+
+    import interface_test2
+    interface_test2.run_gui(args.ip, args.port, args.strips, args.max_write_rate,
+                            args.stats_file, state=state, connect_timeout=args.connect_timeout,
+                            fullscreen=not args.windowed,
+                            on_first_frame=_quit_when_ready if args.exit_when_ready else None)
+    return 0
+
+
+def _quit_when_ready(app):
+    # --exit-when-ready: called once the window has painted its first frame
+    ready("gui")
+    app.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="X32 control surface")
+    parser.add_argument("--ip", default=DEFAULT_IP)
+    parser.add_argument("--port", type=int, default=X32_PORT)
+    parser.add_argument("--strips", type=parse_strips, default=parse_strips(DEFAULT_STRIPS),
+                        help="strips to show, e.g. ch1,ch2,bus1")
+    parser.add_argument("--headless", action="store_true", help="encoders only, no Qt")
+    parser.add_argument("--bus", type=int, default=1, help="I2C bus number (headless)")
+    parser.add_argument("--rate", type=float, default=50.0, help="encoder poll rate (Hz, headless)")
+    parser.add_argument("--max-write-rate", type=float, default=50.0,
+                        help="fader/mute writes per second per parameter")
+    parser.add_argument("--connect-timeout", type=float, default=2.0)
+    parser.add_argument("--stats-file", default=DEFAULT_STATS_FILE,
+                        help="latency histograms written on exit ('' to disable)")
+    parser.add_argument("--windowed", action="store_true", help="not full screen")
+    parser.add_argument("--exit-when-ready", action="store_true",
+                        help="quit after the first frame (GUI) or once seeded (headless)")
+    args = parser.parse_args(argv)
+
+    # listening for pushes before anything slow is imported
+    state = X32Subscription(args.ip, args.port)
+    state.start()
+    try:
+        if args.headless:
+            return run_headless(args, state)
+        return run_gui(args, state)
+    finally:
+        state.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
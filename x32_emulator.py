@@ -0,0 +1,259 @@
+"""Local X32 OSC emulator for testing and benchmarking off-site.
+
+Implements the part of the parameter tree this project touches:
+
+  /ch/NN/mix/fader, /ch/NN/mix/on, /ch/NN/mix/pan, /ch/NN/mix/MM/level,
+  /ch/NN/config/name (and the same for /bus/NN)
+  /xinfo, /xremote and /meters
+
+A message with no arguments is a query and is answered with the current
+value, a message with arguments sets the value and is pushed to every other
+client registered with /xremote. OSC bundles are unpacked and their
+messages handled in order. Replies can be delayed (latency) and
+packets dropped at random in both directions (loss).
+
+Run standalone with: python x32_emulator.py [--port 10023] [--latency 0.005]
+"""
+import argparse
+import heapq
+import math
+import random
+import select
+import socket
+import struct
+import threading
+import time
+
+from pythonosc import osc_bundle
+from pythonosc.osc_bundle import OscBundle
+from pythonosc.osc_message import OscMessage, ParseError
+
+from fader_law import db_to_fader
+from x32_meters import METER_SIZES
+from x32_subscription import build_message
+
+NUM_CHANNELS = 32
+NUM_BUSES = 16
+# the console forgets /xremote and /meters clients after 10 s
+SUBSCRIPTION_TIMEOUT = 10.0
+# /meters sends every 50 ms times the requested time factor
+METER_PERIOD = 0.05
+
+
+def default_parameters() -> dict:
+    params = {}
+    for prefix, count in (("ch", NUM_CHANNELS), ("bus", NUM_BUSES)):
+        for i in range(1, count + 1):
+            root = f"/{prefix}/{i:02d}"
+            params[f"{root}/mix/fader"] = db_to_fader(0.0)
+            params[f"{root}/mix/on"] = 1
+            params[f"{root}/mix/pan"] = 0.5
+            params[f"{root}/config/name"] = ""
+    # channel sends to the mix buses
+    for i in range(1, NUM_CHANNELS + 1):
+        for bus in range(1, NUM_BUSES + 1):
+            params[f"/ch/{i:02d}/mix/{bus:02d}/level"] = 0.0
+    return params
+
+
+class X32Emulator:
+    """UDP X32 stand-in running on a background thread.
+
+    port=0 picks a free port, read it back from .port after construction.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, loss=0.0, seed=None):
+        self.latency = latency
+        self.loss = loss
+        self.params = default_parameters()
+        self._random = random.Random(seed)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, port))
+        self.host, self.port = self._sock.getsockname()
+        self._lock = threading.Lock()
+        self._outbox = []  # heap of (due time, seq, dgram, address)
+        self._seq = 0
+        self._remotes = {}  # client address -> expiry
+        self._meters = {}  # (client address, meter address) -> [expiry, period, next send]
+        self._running = False
+        self._thread = None
+        # counters
+        self.received = 0
+        self.sent = 0
+        self.dropped = 0
+        self.writes = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.stop()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._sock.close()
+
+    def set_parameter(self, address: str, value):
+        """Change a value as if done on the console surface; pushed to /xremote clients."""
+        with self._lock:
+            self.params[address] = value
+        self._push(address, value, None)
+
+    def get_parameter(self, address: str):
+        with self._lock:
+            return self.params.get(address)
+
+    def _lost(self) -> bool:
+        if self.loss and self._random.random() < self.loss:
+            self.dropped += 1
+            return True
+        return False
+
+    def _queue(self, dgram: bytes, client):
+        if self._lost():
+            return
+        with self._lock:
+            self._seq += 1
+            heapq.heappush(self._outbox, (time.monotonic() + self.latency, self._seq, dgram, client))
+
+    def _push(self, address, value, origin):
+        now = time.monotonic()
+        dgram = build_message(address, value)
+        for client, expiry in list(self._remotes.items()):
+            if expiry < now:
+                del self._remotes[client]
+            elif client != origin:
+                self._queue(dgram, client)
+
+    def _meter_blob(self, address: str) -> bytes:
+        count = METER_SIZES[address]
+        # synthetic levels that follow the channel faders so meters move
+        phase = time.monotonic() * 2.0
+        levels = []
+        for i in range(count):
+            fader = self.params.get(f"/ch/{i % NUM_CHANNELS + 1:02d}/mix/fader", 0.0)
+            levels.append(fader * (0.5 + 0.5 * math.sin(phase + i * 0.3)))
+        return struct.pack(f"<i{count}f", count, *levels)
+
+    def _handle(self, dgram: bytes, client):
+        if OscBundle.dgram_is_bundle(dgram):
+            try:
+                bundle = OscBundle(dgram)
+            except osc_bundle.ParseError:
+                return
+            for content in bundle:
+                self._handle(content.dgram, client)
+            return
+        try:
+            msg = OscMessage(dgram)
+        except ParseError:
+            return
+        address = msg.address
+        args = msg.params
+        now = time.monotonic()
+        if address == "/xinfo":
+            self._queue(build_message("/xinfo", self.host, "X32-Emulator", "X32", "4.06"), client)
+        elif address == "/xremote":
+            self._remotes[client] = now + SUBSCRIPTION_TIMEOUT
+        elif address == "/meters":
+            if args and args[0] in METER_SIZES:
+                factor = args[-1] if len(args) > 1 and isinstance(args[-1], int) else 1
+                period = METER_PERIOD * max(1, factor)
+                self._meters[(client, args[0])] = [now + SUBSCRIPTION_TIMEOUT, period, now]
+        elif address == "/renew":
+            for key, sub in self._meters.items():
+                if key[0] == client:
+                    sub[0] = now + SUBSCRIPTION_TIMEOUT
+        elif address in self.params:
+            if args:
+                with self._lock:
+                    self.params[address] = args[0]
+                self.writes += 1
+                self._push(address, args[0], client)
+            else:
+                self._queue(build_message(address, self.params[address]), client)
+
+    def _send_meters(self, now):
+        for key, sub in list(self._meters.items()):
+            expiry, period, next_send = sub
+            if expiry < now:
+                del self._meters[key]
+            elif next_send <= now:
+                sub[2] = next_send + period if next_send + period > now else now + period
+                client, address = key
+                self._queue(build_message(address, self._meter_blob(address)), client)
+
+    def _flush_outbox(self, now):
+        while True:
+            with self._lock:
+                if not self._outbox or self._outbox[0][0] > now:
+                    return
+                _, _, dgram, client = heapq.heappop(self._outbox)
+            try:
+                self._sock.sendto(dgram, client)
+                self.sent += 1
+            except OSError:
+                pass
+
+    def _next_wakeup(self, now) -> float:
+        wakeup = now + 0.05
+        with self._lock:
+            if self._outbox:
+                wakeup = min(wakeup, self._outbox[0][0])
+        for _, _, next_send in self._meters.values():
+            wakeup = min(wakeup, next_send)
+        return wakeup
+
+    def _run(self):
+        while self._running:
+            now = time.monotonic()
+            self._send_meters(now)
+            self._flush_outbox(now)
+            timeout = max(0.0, self._next_wakeup(time.monotonic()) - time.monotonic())
+            try:
+                readable, _, _ = select.select([self._sock], [], [], timeout)
+            except (OSError, ValueError):
+                break
+            if not readable:
+                continue
+            try:
+                dgram, client = self._sock.recvfrom(4096)
+            except OSError:
+                continue
+            self.received += 1
+            if self._lost():
+                continue
+            self._handle(dgram, client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local X32 OSC emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=10023)
+    parser.add_argument("--latency", type=float, default=0.0, help="reply delay in seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="packet loss probability 0..1")
+    args = parser.parse_args()
+
+    with X32Emulator(args.host, args.port, args.latency, args.loss) as emulator:
+        print(f"X32 emulator listening on {emulator.host}:{emulator.port}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    print(f"received {emulator.received}, sent {emulator.sent}, dropped {emulator.dropped}")
+
+
+if __name__ == "__main__":
+    main()
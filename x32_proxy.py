@@ -0,0 +1,278 @@
+"""Local OSC fan-out proxy: many touch panels, one console session.
+
+The proxy answers on the X32 port like a console, so xair_api, MixerWorker
+and X32Subscription can be pointed at it unchanged. Behind it a single
+X32Subscription holds the only /xremote session with the real console and
+is the authoritative parameter cache.
+
+  queries  answered from the cache; a miss is forwarded once, however many
+           clients are waiting for it
+  sets     stored in the cache, pushed to the other /xremote clients at once
+           (like the console does) and sent upstream through a
+           CoalescingWriter, so N panels dragging faders cost the console at
+           most max_write_rate messages per parameter
+  pushes   changes from the console are fanned out to every /xremote client
+  /meters  one upstream subscription per meter bank, blobs fanned out to the
+           clients that asked for it
+
+Console load therefore depends on what is on screen and how fast it changes,
+not on how many panels are running.
+
+Usage: python x32_proxy.py --console 192.168.20.226 [--port 10023]
+"""
+import argparse
+import socket
+import threading
+import time
+from functools import partial
+
+from pythonosc import osc_bundle
+from pythonosc.osc_bundle import OscBundle
+from pythonosc.osc_message import OscMessage, ParseError
+
+from write_behind import CoalescingWriter, DEFAULT_MAX_RATE
+from x32_subscription import X32Subscription, X32_PORT, build_message
+
+# downstream clients are forgotten like the console forgets them
+CLIENT_TIMEOUT = 10.0
+# a forwarded query with no reply after this long is forwarded again
+QUERY_RETRY = 0.5
+
+_UNSET = object()
+
+
+def _args(value):
+    # cache values are stored bare for single argument messages
+    return list(value) if isinstance(value, tuple) else [value]
+
+
+class X32Proxy:
+    """Console stand-in on (host, port) backed by one session with the console.
+
+    port=0 picks a free port, read it back from .port after construction.
+    """
+
+    def __init__(self, console_ip, console_port=X32_PORT, host="0.0.0.0", port=X32_PORT,
+                 max_write_rate=DEFAULT_MAX_RATE):
+        self.state = X32Subscription(console_ip, console_port)
+        self.writer = CoalescingWriter(max_write_rate)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, port))
+        self._sock.settimeout(0.05)
+        self.host, self.port = self._sock.getsockname()
+        self._lock = threading.Lock()
+        self._remotes = {}  # client address -> expiry
+        self._meters = {}  # meter address -> {client address: expiry}
+        self._pending = {}  # address -> [forwarded at, set of waiting clients]
+        self._values = {}  # address -> value last fanned out
+        self._running = False
+        self._thread = None
+        # counters
+        self.received = 0
+        self.sent = 0
+        self.cache_hits = 0
+        self.forwarded = 0
+        self.writes = 0
+        self.state.add_listener(self._on_console)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.stop()
+
+    def start(self):
+        if self._running:
+            return
+        self.state.start()
+        self.writer.start()
+        # answered from the cache from now on
+        self.state.watch("/xinfo")
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.writer.stop()
+        self.state.stop()
+        self._sock.close()
+
+    @property
+    def clients(self) -> int:
+        """Number of live /xremote clients."""
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for expiry in self._remotes.values() if expiry >= now)
+
+    def _sendto(self, dgram, clients):
+        for client in clients:
+            try:
+                self._sock.sendto(dgram, client)
+                self.sent += 1
+            except OSError:
+                pass
+
+    def _live_remotes(self, now, exclude=None):
+        # caller holds self._lock
+        live = []
+        for client, expiry in list(self._remotes.items()):
+            if expiry < now:
+                del self._remotes[client]
+            elif client != exclude:
+                live.append(client)
+        return live
+
+    def _on_console(self, address, value):
+        # upstream receive thread: a push or a reply to a forwarded query
+        with self._lock:
+            pending = self._pending.pop(address, None)
+            changed = self._values.get(address, _UNSET) != value
+            self._values[address] = value
+            targets = set(self._live_remotes(time.monotonic())) if changed else set()
+        if pending is not None:
+            targets |= pending[1]
+        if targets:
+            self._sendto(build_message(address, *_args(value)), targets)
+
+    def _on_meters(self, address, params):
+        now = time.monotonic()
+        with self._lock:
+            clients = self._meters.get(address, {})
+            for client, expiry in list(clients.items()):
+                if expiry < now:
+                    del clients[client]
+            targets = list(clients)
+        if targets:
+            self._sendto(build_message(address, *params), targets)
+
+    def _query(self, address, client):
+        value = self.state.get(address)
+        if value is not None:
+            self.cache_hits += 1
+            self._sendto(build_message(address, *_args(value)), (client,))
+            return
+        now = time.monotonic()
+        with self._lock:
+            pending = self._pending.get(address)
+            if pending is None:
+                pending = self._pending[address] = [0.0, set()]
+            pending[1].add(client)
+            forward = now - pending[0] > QUERY_RETRY
+            if forward:
+                pending[0] = now
+        if forward:
+            self.forwarded += 1
+            self.state.watch(address)
+
+    def _set(self, address, params, dgram, client):
+        value = params[0] if len(params) == 1 else tuple(params)
+        with self._lock:
+            # recorded first so the cache listener does not echo it back
+            self._values[address] = value
+            others = self._live_remotes(time.monotonic(), exclude=client)
+        self.state.update(address, value)
+        self.writes += 1
+        self.writer.write(address, params, partial(self._send_upstream, address))
+        self._sendto(dgram, others)
+
+    def _send_upstream(self, address, params):
+        # writer thread
+        self.state.send(address, *params)
+
+    def _subscribe_meters(self, address, params, client):
+        with self._lock:
+            clients = self._meters.get(address)
+            first = clients is None
+            if first:
+                clients = self._meters[address] = {}
+            clients[client] = time.monotonic() + CLIENT_TIMEOUT
+        if first:
+            self.state.route(address, partial(self._on_meters, address))
+            self.state.subscribe("/meters", *params)
+
+    def _handle(self, dgram, client):
+        if OscBundle.dgram_is_bundle(dgram):
+            # X32Subscription.set_many() sends bundles, handle each message
+            try:
+                bundle = OscBundle(dgram)
+            except osc_bundle.ParseError:
+                return
+            for content in bundle:
+                self._handle(content.dgram, client)
+            return
+        try:
+            msg = OscMessage(dgram)
+        except ParseError:
+            return
+        address = msg.address
+        params = msg.params
+        now = time.monotonic()
+        if address == "/xremote":
+            with self._lock:
+                self._remotes[client] = now + CLIENT_TIMEOUT
+        elif address == "/meters":
+            if params and isinstance(params[0], str):
+                self._subscribe_meters(params[0], params, client)
+        elif address == "/renew":
+            with self._lock:
+                for clients in self._meters.values():
+                    if client in clients:
+                        clients[client] = now + CLIENT_TIMEOUT
+        elif params:
+            self._set(address, params, dgram, client)
+        else:
+            self._query(address, client)
+
+    def _run(self):
+        while self._running:
+            try:
+                dgram, client = self._sock.recvfrom(4096)
+            except socket.timeout:
+                continue
+            except OSError:
+                if not self._running:
+                    break
+                continue
+            self.received += 1
+            self._handle(dgram, client)
+
+    def stats(self) -> dict:
+        return {
+            "clients": self.clients,
+            "received": self.received,
+            "sent": self.sent,
+            "cache_hits": self.cache_hits,
+            "forwarded": self.forwarded,
+            "writes": self.writes,
+            "upstream_writes": self.writer.sent,
+            "coalesced": self.writer.coalesced,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="X32 fan-out proxy")
+    parser.add_argument("--console", default="192.168.20.226", help="console IP")
+    parser.add_argument("--console-port", type=int, default=X32_PORT)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=X32_PORT, help="port the panels connect to")
+    parser.add_argument("--max-write-rate", type=float, default=DEFAULT_MAX_RATE,
+                        help="upstream writes per second per parameter")
+    args = parser.parse_args()
+
+    with X32Proxy(args.console, args.console_port, args.host, args.port, args.max_write_rate) as proxy:
+        print(f"proxying {args.console}:{args.console_port} on {proxy.host}:{proxy.port}")
+        try:
+            while True:
+                time.sleep(10)
+                print(proxy.stats())
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Pipelined scene snapshot and restore for the X32 channel strips.
+
+Instead of one blocking round trip per parameter, all queries go through
+osc_bulk.BulkQuery: many are kept in flight at once (bounded by a window),
+replies are matched by address and anything not answered in time is re-sent.
+A restore sends each value and queries it back in the same window, so lost
+sets are retried as well.
+
+Scenes are plain {address: value} dicts and are stored in a compact binary
+file: a header, then one fixed size record per channel (fader, on, name).
+
+Usage:
+  python x32_snapshot.py save scene.x32s [--ip 192.168.20.226]
+  python x32_snapshot.py restore scene.x32s [--ip 192.168.20.226]
+"""
+import argparse
+import struct
+import time
+
+from osc_bulk import BulkQuery, DEFAULT_WINDOW
+from x32_subscription import X32_PORT, strip_address
+
+NUM_CHANNELS = 32
+# parameters captured per channel, in file record order
+SNAPSHOT_PARAMS = ("mix/fader", "mix/on", "config/name")
+# X32 channel names are at most 12 characters
+NAME_SIZE = 12
+
+FILE_MAGIC = b"X32S"
+FILE_VERSION = 1
+_HEADER = struct.Struct("<4sBH")
+_RECORD = struct.Struct(f"<fB{NAME_SIZE}s")
+
+
+def snapshot_addresses(channels=NUM_CHANNELS):
+    return [strip_address(i, param) for i in range(channels) for param in SNAPSHOT_PARAMS]
+
+
+def take_snapshot(ip, port=X32_PORT, channels=NUM_CHANNELS, window=DEFAULT_WINDOW):
+    """Read fader, on and name of every channel. Returns (scene, failed)."""
+    return BulkQuery(ip, port, window).query(snapshot_addresses(channels))
+
+
+def restore_snapshot(ip, scene, port=X32_PORT, window=DEFAULT_WINDOW):
+    """Write every value of scene and confirm it. Returns (confirmed, failed)."""
+    return BulkQuery(ip, port, window).query(list(scene), scene)
+
+
+def _name_bytes(name: str) -> bytes:
+    # cut to NAME_SIZE bytes without splitting a multibyte character
+    return name.encode("utf-8")[:NAME_SIZE].decode("utf-8", "ignore").encode("utf-8")
+
+
+def save_scene(path, scene, channels=NUM_CHANNELS):
+    records = [_HEADER.pack(FILE_MAGIC, FILE_VERSION, channels)]
+    for i in range(channels):
+        fader = scene.get(strip_address(i, "mix/fader"), 0.0)
+        on = scene.get(strip_address(i, "mix/on"), 1)
+        name = scene.get(strip_address(i, "config/name"), "")
+        records.append(_RECORD.pack(fader, on, _name_bytes(name)))
+    with open(path, "wb") as f:
+        f.write(b"".join(records))
+
+
+def load_scene(path) -> dict:
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, channels = _HEADER.unpack_from(data)
+    if magic != FILE_MAGIC or version != FILE_VERSION:
+        raise ValueError(f"{path} is not an X32 scene file")
+    scene = {}
+    records = data[_HEADER.size:_HEADER.size + channels * _RECORD.size]
+    for i, (fader, on, name) in enumerate(_RECORD.iter_unpack(records)):
+        scene[strip_address(i, "mix/fader")] = fader
+        scene[strip_address(i, "mix/on")] = on
+        scene[strip_address(i, "config/name")] = name.rstrip(b"\0").decode("utf-8", "ignore")
+    return scene
+
+
+def main():
+    parser = argparse.ArgumentParser(description="X32 channel scene snapshot/restore")
+    parser.add_argument("action", choices=("save", "restore"))
+    parser.add_argument("path")
+    parser.add_argument("--ip", default="192.168.20.226")
+    parser.add_argument("--port", type=int, default=X32_PORT)
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="requests in flight")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.action == "save":
+        scene, failed = take_snapshot(args.ip, args.port, window=args.window)
+        save_scene(args.path, scene)
+    else:
+        scene, failed = restore_snapshot(args.ip, load_scene(args.path), args.port, args.window)
+    elapsed = time.perf_counter() - start
+    print(f"{args.action}: {len(scene)} parameters in {elapsed * 1000:.0f} ms, {len(failed)} failed")
+    for address in failed:
+        print(f"  no reply for {address}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Push-based X32 parameter cache.
+
+Registers with the console through /xremote and keeps a local cache of every
+parameter the console pushes back. The console forgets remote clients after
+10 s, so the registration is renewed from the receive thread. Reading the
+cache costs no network traffic, so the UI can refresh from it as often as it
+likes.
+
+Local writes (set(), update()) are optimistic: the cache takes the new value
+at once, and console values for that parameter are checked against the
+pending writes (optimistic_state) so echoes and stale replies cannot undo
+them.
+
+Works against any host/port, so it can be pointed at a real console or at a
+local fake X32 UDP responder.
+"""
+import socket
+import threading
+import time
+
+from pythonosc.osc_message import OscMessage, ParseError
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+from optimistic_state import PendingWrites, CONFLICT, ACCEPT
+from osc_fast import FastSender
+from perf_stats import REGISTRY
+
+X32_PORT = 10023
+# the console drops /xremote clients after 10 s, renew well before that
+XREMOTE_RENEW_INTERVAL = 8.0
+
+
+def channel_address(kind: str, index: int, param: str) -> str:
+    """OSC address of a "ch" or "bus" parameter, index is 0 based like mixer.strip[]"""
+    return f"/{kind}/{index + 1:02d}/{param}"
+
+
+def strip_address(index: int, param: str) -> str:
+    """OSC address of a strip parameter, index is 0 based like mixer.strip[]"""
+    return channel_address("ch", index, param)
+
+
+def build_message(address: str, *args) -> bytes:
+    builder = OscMessageBuilder(address=address)
+    for arg in args:
+        builder.add_arg(arg)
+    return builder.build().dgram
+
+
+class X32Subscription:
+    """Keeps a local copy of the console state up to date from pushed messages.
+
+    Use as a context manager (like xair_api.connect) or call start()/stop().
+    """
+
+    def __init__(self, ip, port=X32_PORT, renew_interval=XREMOTE_RENEW_INTERVAL):
+        self.console_address = (ip, port)
+        self.renew_interval = renew_interval
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(("", 0))
+        self._sock.settimeout(0.05)
+        # fader/pan/level/mute writes skip the generic message builder
+        self._fast = FastSender(self._sock, self.console_address)
+        self._cache = {}
+        # local writes the console has not confirmed yet
+        self.pending = PendingWrites()
+        self._lock = threading.Lock()
+        self._listeners = []
+        # address -> handler(params) for streams that bypass the cache
+        self._routes = {}
+        # (address, args) re-sent on every renewal, e.g. /meters
+        self._subscriptions = []
+        # address -> perf_counter() of queries awaiting a reply
+        self._queries = {}
+        self._query_stats = REGISTRY.histogram("osc_query")
+        self._version = 0
+        self._running = False
+        self._thread = None
+        self._next_renew = 0.0
+        # statistics
+        self.received = 0
+        self.renewals = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.stop()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._renew()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._sock.close()
+
+    def send(self, address: str, *args):
+        if len(args) == 1 and self._fast.send(address, args[0]):
+            return
+        self._sock.sendto(build_message(address, *args), self.console_address)
+
+    def send_bundle(self, items):
+        """Send [(address, value), ...] together, as OSC bundles where possible."""
+        for address, value in self._fast.send_bundle(items):
+            self.send(address, value)
+
+    def watch(self, *addresses):
+        """Ask the console for the current value of each address once.
+
+        /xremote only pushes changes, so this seeds the cache; from then on
+        the values are kept current without further requests.
+        """
+        for address in addresses:
+            self._queries[address] = time.perf_counter()
+            self.send(address)
+
+    def sync(self, addresses, **options) -> list:
+        """Read every address now, pipelined with retries, into the cache.
+
+        Unlike watch() this blocks until all replies are in (roughly one
+        round trip for hundreds of addresses) and returns the addresses that
+        never answered. options are passed to osc_bulk.BulkQuery.
+        """
+        # imported here, osc_bulk builds on this module
+        from osc_bulk import BulkQuery
+        values, failed = BulkQuery(*self.console_address, **options).query(addresses)
+        for address, value in values.items():
+            self._receive(address, value)
+        return failed
+
+    def subscribe(self, address: str, *args):
+        """Send a subscription request now and again on every renewal."""
+        self._subscriptions.append((address, args))
+        self.send(address, *args)
+
+    def route(self, address: str, handler):
+        """Deliver messages for address to handler(params) instead of the cache.
+
+        Used for high rate streams such as /meters blobs, which would
+        otherwise bump the cache version on every packet.
+        """
+        self._routes[address] = handler
+
+    def set(self, address: str, value):
+        """Write a value to the console and update the cache immediately."""
+        self.send(address, value)
+        self.update(address, value)
+
+    def set_many(self, items):
+        """set() for several values, sent as bundles."""
+        items = list(items)
+        self.send_bundle(items)
+        for address, value in items:
+            self.update(address, value)
+
+    def update(self, address: str, value) -> bool:
+        """Record a local write in the cache without sending it, for writes
+        sent some other way (e.g. later, through a CoalescingWriter).
+
+        Returns False, changing nothing, if the cache already holds value
+        and no other local write is pending: sending it would be redundant.
+        """
+        if not self.pending.local(address, value, self.get(address)):
+            return False
+        self._store(address, value)
+        return True
+
+    def get(self, address: str, default=None):
+        with self._lock:
+            return self._cache.get(address, default)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._cache)
+
+    @property
+    def version(self) -> int:
+        """Incremented on every cache update; cheap way to detect changes."""
+        return self._version
+
+    def add_listener(self, callback):
+        """callback(address, value) is called from the receive thread."""
+        self._listeners.append(callback)
+
+    def _renew(self):
+        self.send("/xremote")
+        for address, args in self._subscriptions:
+            self.send(address, *args)
+        self.renewals += 1
+        self._next_renew = time.monotonic() + self.renew_interval
+
+    def _store(self, address, value):
+        with self._lock:
+            self._cache[address] = value
+            self._version += 1
+        for callback in self._listeners:
+            callback(address, value)
+
+    def _handle(self, dgram: bytes):
+        try:
+            msg = OscMessage(dgram)
+        except ParseError:
+            return
+        params = msg.params
+        self.received += 1
+        sent = self._queries.pop(msg.address, None)
+        if sent is not None:
+            self._query_stats.record(time.perf_counter() - sent)
+        handler = self._routes.get(msg.address)
+        if handler is not None:
+            handler(params)
+            return
+        # single argument replies are stored bare, e.g. fader -> float
+        value = params[0] if len(params) == 1 else tuple(params)
+        self._receive(msg.address, value)
+
+    def _receive(self, address, value):
+        # a value from the console; echoes and stale replies of pending
+        # local writes are dropped, a conflicting change wins over them
+        decision = self.pending.remote(address, value)
+        if decision == ACCEPT:
+            self._store(address, value)
+        elif decision == CONFLICT:
+            self._store(address, value)
+            # our write may have reached the console after this value; the
+            # reply is this value again (dropped) or our write's echo (taken)
+            self.watch(address)
+
+    def _run(self):
+        while self._running:
+            if time.monotonic() >= self._next_renew:
+                try:
+                    self._renew()
+                except OSError:
+                    pass
+            try:
+                dgram, _ = self._sock.recvfrom(4096)
+            except socket.timeout:
+                continue
+            except OSError:
+                if not self._running:
+                    break
+                continue
+            self._handle(dgram)